@@ -0,0 +1,270 @@
+"""Email address pattern learned per domain.
+
+Evidence comes from Hunter domain-search (its `pattern` and the named emails it
+returns), from addresses a verifier confirmed, and from LinkedIn CSV imports.
+Each observation is a vote for a local-part template such as "{first}.{last}";
+the template with most votes wins. Domains known to accept every address
+(catch-all / accept_all) are flagged, since verifying guesses there proves nothing.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+
+from .utils import sqlite_db
+
+IS_VERCEL = os.getenv("VERCEL") == "1" or bool(os.getenv("VERCEL_ENV"))
+DEFAULT_DB_PATH = os.environ.get("EMAIL_PATTERNS_DB_PATH") or ("/tmp/email_patterns.sqlite3" if IS_VERCEL else "./data/email_patterns.sqlite3")
+ENABLED = os.environ.get("EMAIL_PATTERNS_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+TTL_SECONDS = int(os.environ.get("EMAIL_PATTERNS_TTL_DAYS", "183")) * 24 * 3600
+# rows older than TTL_SECONDS (votes, flags, addresses already counted) are deleted at most this often
+PURGE_INTERVAL_SECONDS = int(os.environ.get("EMAIL_PATTERNS_PURGE_INTERVAL_SECONDS", "3600"))
+
+# Local-part templates we can recognise, most common first ({f}/{l} = initials)
+KNOWN_PATTERNS = [
+    "{first}.{last}", "{first}{last}", "{f}{last}", "{first}_{last}", "{first}-{last}", "{f}.{last}",
+    "{last}.{first}", "{last}{first}", "{last}{f}", "{last}.{f}", "{first}.{l}", "{first}{l}", "{first}", "{last}",
+]
+
+# Vote weight per evidence source
+WEIGHTS = {"hunter": 3, "verifier": 2, "hunter_email": 1, "linkedin_import": 1}
+
+
+@dataclass
+class DomainPattern:
+    domain: str
+    pattern: Optional[str] = None  # local-part template, e.g. "{first}.{last}"
+    votes: int = 0
+    accept_all: bool = False
+
+    def email_for(self, first: str, last: str) -> Optional[str]:
+        if not self.pattern:
+            return None
+        return format_email(self.pattern, first, last, self.domain)
+
+
+def _init(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS pattern_votes (
+            domain TEXT NOT NULL,
+            pattern TEXT NOT NULL,
+            votes INTEGER NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (domain, pattern)
+        )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS counted_emails (
+            domain TEXT NOT NULL,
+            email TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (domain, email)
+        )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS catch_all_domains (
+            domain TEXT PRIMARY KEY,
+            accept_all INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_counted_emails_updated_at ON counted_emails(updated_at)")
+
+
+def _db(path: str):
+    return sqlite_db.connection(path, _init)
+
+
+def _name_part(s: str) -> str:
+    # "De Luca" -> "deluca", "D'Amico" -> "damico"
+    return re.sub(r"[\s'’\-.]", "", (s or "").strip().lower())
+
+
+def _ascii(s: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
+
+
+def format_email(pattern: str, first: str, last: str, domain: str) -> str:
+    return pattern.format(first=first, last=last, f=first[:1], l=last[:1]) + "@" + domain
+
+
+def infer_pattern(email: str, first: str, last: str) -> Optional[str]:
+    """Template that turns (first, last) into the local part of email, if any."""
+    local = (email or "").strip().lower().split("@", 1)[0]
+    first, last = _name_part(first), _name_part(last)
+    if not local or not first or not last:
+        return None
+    for f, l in dict.fromkeys([(first, last), (_ascii(first), _ascii(last))]):
+        for pattern in KNOWN_PATTERNS:
+            if pattern.format(first=f, last=l, f=f[:1], l=l[:1]) == local:
+                return pattern
+    return None
+
+
+def get_pattern(domain: str, db_path: str = DEFAULT_DB_PATH) -> Optional[DomainPattern]:
+    """What we know about a domain (None if nothing fresh)."""
+    domain = (domain or "").lower()
+    try:
+        with _db(db_path) as conn:
+            cutoff = time.time() - TTL_SECONDS
+            row = conn.execute(
+                "SELECT pattern, votes FROM pattern_votes WHERE domain = ? AND updated_at >= ? ORDER BY votes DESC, updated_at DESC LIMIT 1",
+                (domain, cutoff),
+            ).fetchone()
+            flag = conn.execute(
+                "SELECT accept_all FROM catch_all_domains WHERE domain = ? AND updated_at >= ?",
+                (domain, cutoff),
+            ).fetchone()
+    except Exception:
+        return None
+    if not row and not flag:
+        return None
+    return DomainPattern(
+        domain=domain,
+        pattern=row[0] if row else None,
+        votes=int(row[1]) if row else 0,
+        accept_all=bool(flag[0]) if flag else False,
+    )
+
+
+def _vote(conn: sqlite3.Connection, observations: Iterable[Tuple[str, str, int]], now: float) -> int:
+    rows = [(d.lower(), p, int(w), now) for d, p, w in observations if d and p in KNOWN_PATTERNS and w > 0]
+    conn.executemany(
+        """INSERT INTO pattern_votes(domain, pattern, votes, updated_at) VALUES (?, ?, ?, ?)
+           ON CONFLICT(domain, pattern) DO UPDATE SET votes = votes + excluded.votes, updated_at = excluded.updated_at""",
+        rows,
+    )
+    return len(rows)
+
+
+def learn_patterns(observations: Iterable[Tuple[str, str, int]], db_path: str = DEFAULT_DB_PATH) -> int:
+    """Add votes for (domain, pattern, weight) observations in one transaction. Returns rows written."""
+    observations = list(observations)
+    if not observations:
+        return 0
+    try:
+        with _db(db_path) as conn:
+            now = time.time()
+            n = _vote(conn, observations, now)
+            _maybe_purge(conn, now)
+            conn.commit()
+            return n
+    except Exception:
+        return 0
+
+
+def _not_counted(conn: sqlite3.Connection, observations: list, now: float) -> list:
+    """The (email, domain, pattern, weight) observations whose address has not voted within
+    the TTL; they are marked as counted (the caller commits, with their votes)."""
+    fresh = []
+    for obs in observations:
+        email, domain = obs[0], obs[1]
+        n = conn.execute(
+            """INSERT INTO counted_emails(domain, email, updated_at) VALUES (?, ?, ?)
+               ON CONFLICT(domain, email) DO UPDATE SET updated_at = excluded.updated_at WHERE updated_at < ?""",
+            (domain, email, now, now - TTL_SECONDS),
+        ).rowcount
+        if n:
+            fresh.append(obs)
+    return fresh
+
+
+def learn_from_emails(
+    samples: Iterable[Tuple[str, str, str]],
+    source: str,
+    db_path: str = DEFAULT_DB_PATH,
+    once: bool = False,
+) -> int:
+    """Learn from known (email, first, last) triples; the domain is the email's.
+
+    once=True: an address votes once per TTL, however often it is seen (re-imported contacts)."""
+    weight = WEIGHTS.get(source, 1)
+    observations = []
+    for email, first, last in samples:
+        pattern = infer_pattern(email, first, last)
+        if pattern and "@" in email:
+            email = email.strip().lower()
+            observations.append((email, email.split("@", 1)[1], pattern, weight))
+    if not once:
+        return learn_patterns([(d, p, w) for _, d, p, w in observations], db_path)
+    if not observations:
+        return 0
+    try:
+        with _db(db_path) as conn:
+            # marks and votes commit together: a failed batch can be learned again
+            now = time.time()
+            fresh = _not_counted(conn, observations, now)
+            n = _vote(conn, [(d, p, w) for _, d, p, w in fresh], now)
+            _maybe_purge(conn, now)
+            conn.commit()
+            return n
+    except Exception:
+        return 0
+
+
+_last_purge = 0.0
+
+
+def _purge(conn: sqlite3.Connection, now: float) -> int:
+    global _last_purge
+    _last_purge = time.monotonic()
+    cutoff = now - TTL_SECONDS
+    n = 0
+    for table in ("counted_emails", "pattern_votes", "catch_all_domains"):
+        n += int(conn.execute(f"DELETE FROM {table} WHERE updated_at < ?", (cutoff,)).rowcount or 0)
+    return n
+
+
+def _maybe_purge(conn: sqlite3.Connection, now: float) -> int:
+    """Amortized purge on the writer's connection: at most once per PURGE_INTERVAL_SECONDS."""
+    if _last_purge and time.monotonic() - _last_purge < PURGE_INTERVAL_SECONDS:
+        return 0
+    return _purge(conn, now)
+
+
+def purge_expired(db_path: str = DEFAULT_DB_PATH) -> int:
+    """Delete votes, flags and counted addresses older than the TTL. Returns deleted rows (best effort)."""
+    try:
+        with _db(db_path) as conn:
+            n = _purge(conn, time.time())
+            conn.commit()
+            return n
+    except Exception:
+        return 0
+
+
+def set_accept_all(domain: str, accept_all: bool, db_path: str = DEFAULT_DB_PATH) -> None:
+    try:
+        with _db(db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO catch_all_domains(domain, accept_all, updated_at) VALUES (?, ?, ?)",
+                ((domain or "").lower(), int(bool(accept_all)), time.time()),
+            )
+            conn.commit()
+    except Exception:
+        return
+
+
+def hunter_pattern(pattern: Optional[str]) -> Optional[str]:
+    """Hunter's domain pattern ("{first}.{last}") if it is one we can generate."""
+    p = (pattern or "").strip().lower()
+    return p if p in KNOWN_PATTERNS else None
+
+
+def learn_from_hunter(domain: str, data: Dict[str, Any], db_path: str = DEFAULT_DB_PATH) -> None:
+    """Learn from a Hunter domain-search `data` payload: pattern, named emails, accept_all."""
+    pattern = hunter_pattern(data.get("pattern"))
+    if pattern:
+        learn_patterns([(domain, pattern, WEIGHTS["hunter"])], db_path)
+    learn_from_emails(
+        [(e.get("value") or "", e.get("first_name") or "", e.get("last_name") or "") for e in data.get("emails") or []],
+        "hunter_email",
+        db_path,
+    )
+    if data.get("accept_all") is not None:
+        set_accept_all(domain, bool(data["accept_all"]), db_path)
@@ -1,7 +1,8 @@
 from __future__ import annotations
-import httpx
 from typing import Any, Dict, List
 
+from ..utils.http import request
+
 class OpenAIProvider:
     def __init__(self, api_key: str):
         self.api_key = api_key
@@ -10,9 +11,8 @@ class OpenAIProvider:
         url = "https://api.openai.com/v1/chat/completions"
         headers = {"Authorization": f"Bearer {self.api_key}"}
         payload = {"model": model, "messages": messages, "temperature": temperature}
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.post(url, headers=headers, json=payload)
-            r.raise_for_status()
-            data = r.json()
+        r = await request("POST", url, headers=headers, json=payload)
+        r.raise_for_status()
+        data = r.json()
         content = data["choices"][0]["message"]["content"]
         return {"content": content, "raw": data, "usage": data.get("usage")}
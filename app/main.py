@@ -1,31 +1,58 @@
 from __future__ import annotations
+import asyncio
 import io
 import json
 import os
+import uuid
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal, Tuple
 
 from .settings import settings
 from .security import require_bearer
 from .config_loader import load_focus_config
-from .telemetry import init_db, log_event, TelemetryEvent
+from .telemetry import init_db, log_event, TelemetryEvent, start_writer, stop_writer
+from .run_worker import start_worker, stop_worker, notify_worker
+from .utils.http import open_client, close_client
 from .models import (
     DiscoverRequest, EnrichRequest, IdentifyRequest, VerifyRequest, ScoreRequest, ExportRequest, RunRequest, RunResponse,
-    CompanyCandidate, CompanyProfile, LeadRecord
+    ApiKeys, CompanyCandidate, CompanyProfile, LeadRecord, ProjectProfile
 )
 from .pipeline.discover import discover_candidates
 from .pipeline.enrich import enrich_candidates
 from .pipeline.identify import identify_for_companies
 from .pipeline.verify import verify_leads
 from .pipeline.score import score_leads
-from .pipeline.exporter import export_leads, export_leads_bytes, EXPORT_DIR
-from .pipeline.orchestrator import run_pipeline
+from .pipeline.presets import load_preset
+from .pipeline.exporter import export_leads, export_leads_stream, EXPORT_DIR
+from .pipeline.orchestrator import RESUME_IGNORED_FIELDS, run_pipeline, stream_pipeline
 from .profile_cache import purge_expired, flush_cache
-from .pipeline.linkedin_import import parse_linkedin_csv
-
-app = FastAPI(title="Lead Scouting Agent (B2B)", version="0.1.0")
+from . import page_cache, verify_cache, run_store
+from .providers.search_cache import SEARCH_CACHE
+from .pipeline.linkedin_import import iter_linkedin_csv
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP client for the whole process (keep-alive across requests)
+    await open_client()
+    # Telemetry events are queued and written in batches by a background task
+    if FOCUS.telemetry_enabled:
+        await start_writer()
+    # Background runs (POST /runs) executed in this process (dev / single container)
+    if settings.RUN_WORKER_IN_PROCESS:
+        await start_worker(FOCUS)
+    try:
+        yield
+    finally:
+        await stop_worker()
+        # Mangum runs the lifespan around each invocation: queued events are flushed here
+        await stop_writer()
+        await close_client()
+
+app = FastAPI(title="Lead Scouting Agent (B2B)", version="0.1.0", lifespan=lifespan)
 FOCUS = load_focus_config(settings.FOCUS_CONFIG_PATH)
 
 if FOCUS.telemetry_enabled:
@@ -209,8 +236,12 @@ async function downloadExport(fmt){
     alert('Esegui prima la pipeline.');
     return;
   }
-  const payload = {leads: window.lastRun.leads, file_format: fmt, session_id: 'ui'};
-  const r = await fetch('/export/download', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(payload)});
+  // the run's leads are already stored on the server: export by run_id, re-upload them only if that fails
+  let r = await fetch('/runs/' + encodeURIComponent(window.lastRun.run_id) + '/export?session_id=ui&file_format=' + fmt);
+  if(!r.ok){
+    const payload = {leads: window.lastRun.leads, file_format: fmt, session_id: 'ui'};
+    r = await fetch('/export/download', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(payload)});
+  }
   if(!r.ok){
     const t = await r.text();
     alert('Errore export: ' + t);
@@ -310,7 +341,7 @@ async function importLinkedIn(){
 @app.post("/discover", dependencies=[Depends(require_bearer)])
 async def discover(req: DiscoverRequest):
     try:
-        res = await discover_candidates(FOCUS, req.industry, req.geography, req.segment, limit=req.limit, api_keys=req.api_keys)
+        res = await discover_candidates(FOCUS, req.industry, req.geography, req.segment, limit=req.limit, api_keys=req.api_keys, force_refresh=req.force_refresh_search)
         if FOCUS.telemetry_enabled:
             log_event(TelemetryEvent(session_id=req.session_id, event_type="discover", payload={"industry": req.industry, "limit": req.limit, "results": len(res)}))
         return {"candidates": [c.model_dump() for c in res]}
@@ -357,11 +388,12 @@ async def export(req: ExportRequest):
 
 @app.post("/export/download", dependencies=[Depends(require_bearer)])
 async def export_download(req: ExportRequest):
-    content, fname, mime = export_leads_bytes(req.leads, file_format=req.file_format)
+    # rows are streamed as they are written (CSV) or from a spooled temp file (XLSX, write-only mode)
+    chunks, fname, mime = export_leads_stream(req.leads, file_format=req.file_format)
     if FOCUS.telemetry_enabled:
         log_event(TelemetryEvent(session_id=req.session_id, event_type="export_download", payload={"file_format": req.file_format, "file": fname}))
     headers = {"Content-Disposition": f'attachment; filename="{fname}"'}
-    return StreamingResponse(io.BytesIO(content), media_type=mime, headers=headers)
+    return StreamingResponse(chunks, media_type=mime, headers=headers)
 
 @app.get("/download/{filename}", dependencies=[Depends(require_bearer)])
 async def download(filename: str):
@@ -374,34 +406,129 @@ async def download(filename: str):
     return FileResponse(path)
 
 
+IMPORT_STORE_BATCH = 500  # leads per run store transaction (output=run)
+
+def _import_to_run_store(stream, map_obj, filename: str, session_id: str) -> Dict[str, Any]:
+    run_id = uuid.uuid4().hex[:12]
+    run_store.start_run(run_id, json.dumps({"source": "linkedin_import", "file": filename}), session_id)
+    batch: List[Tuple[int, int, str]] = []
+    n = 0
+    for n, lead in enumerate(iter_linkedin_csv(stream, mapping=map_obj), 1):
+        batch.append((n, n - 1, lead.model_dump_json()))
+        if len(batch) >= IMPORT_STORE_BATCH:
+            run_store.add_leads(run_id, batch)
+            batch = []
+    if batch:
+        run_store.add_leads(run_id, batch)
+    run_store.finish_run(run_id, {"source": "linkedin_import", "leads": n})
+    return {"run_id": run_id, "imported_rows": n}
+
 @app.post("/import/linkedin", dependencies=[Depends(require_bearer)])
-async def import_linkedin(file: UploadFile = File(...), session_id: str = "linkedin", mapping: str = Form(default="")):
-    content = await file.read()
+async def import_linkedin(
+    file: UploadFile = File(...),
+    session_id: str = "linkedin",
+    mapping: str = Form(default=""),
+    output: Literal["json", "ndjson", "run"] = "json",
+):
+    """Import a LinkedIn / Sales Navigator CSV. The upload is parsed as a stream (flat memory):
+    output=json returns all leads at once, ndjson streams one event per lead, run saves the
+    leads under a new run_id (then GET /runs/{run_id}/leads, /runs/{run_id}/export, ...)."""
     map_obj = None
     if mapping:
         try:
             map_obj = json.loads(mapping)
         except Exception:
             map_obj = None
-    leads = parse_linkedin_csv(content, mapping=map_obj)
-    if FOCUS.telemetry_enabled:
-        log_event(TelemetryEvent(session_id=session_id, event_type="linkedin_import", payload={"rows": len(leads)}))
-    return {"imported_rows": len(leads), "leads": [l.model_dump() for l in leads]}
+
+    def _log(rows: int, run_id: str | None = None) -> None:
+        if FOCUS.telemetry_enabled:
+            log_event(TelemetryEvent(session_id=session_id, event_type="linkedin_import", payload={"rows": rows, "output": output, "run_id": run_id}))
+
+    # iter_linkedin_csv writes the learned email patterns: always iterate it off the event loop
+    if output == "run":
+        res = await asyncio.to_thread(_import_to_run_store, file.file, map_obj, file.filename or "", session_id)
+        _log(res["imported_rows"], res["run_id"])
+        return {**res, "leads_url": f"/runs/{res['run_id']}/leads", "download_url": f"/runs/{res['run_id']}/export?file_format=xlsx"}
+
+    if output == "ndjson":
+        # FastAPI closes the upload as soon as the endpoint returns, before the body is
+        # streamed: take its spooled file over and close it when done
+        stream, file.file = file.file, io.BytesIO()
+
+        def lines():
+            # sync generator: StreamingResponse runs it in the threadpool
+            n = 0
+            try:
+                for lead in iter_linkedin_csv(stream, mapping=map_obj):
+                    n += 1
+                    yield '{"event": "lead", "lead": ' + lead.model_dump_json() + "}\n"
+            finally:
+                stream.close()
+            yield json.dumps({"event": "summary", "imported_rows": n}) + "\n"
+            _log(n)
+        return StreamingResponse(lines(), media_type=STREAM_MEDIA_TYPES["ndjson"])
+
+    leads = await asyncio.to_thread(lambda: [l.model_dump() for l in iter_linkedin_csv(file.file, mapping=map_obj)])
+    _log(len(leads))
+    return {"imported_rows": len(leads), "leads": leads}
 
 
 @app.post("/admin/cache/purge", dependencies=[Depends(require_bearer)])
 async def admin_cache_purge():
-    purged = purge_expired()
+    purged = await asyncio.to_thread(purge_expired)
     return {"purged": purged, "ttl_days": int(os.environ.get("PROFILE_CACHE_TTL_DAYS", "183"))}
 
 @app.post("/admin/cache/flush", dependencies=[Depends(require_bearer)])
 async def admin_cache_flush():
-    deleted = flush_cache()
+    deleted = await asyncio.to_thread(flush_cache)
+    return {"deleted": deleted}
+
+@app.post("/admin/cache/pages/flush", dependencies=[Depends(require_bearer)])
+async def admin_page_cache_flush():
+    deleted = await asyncio.to_thread(page_cache.flush_cache)
     return {"deleted": deleted}
 
+@app.get("/admin/cache/search/stats", dependencies=[Depends(require_bearer)])
+async def admin_search_cache_stats():
+    return SEARCH_CACHE.info()
+
+@app.post("/admin/cache/search/flush", dependencies=[Depends(require_bearer)])
+async def admin_search_cache_flush():
+    deleted = SEARCH_CACHE.flush()
+    return {"deleted": deleted}
+
+@app.get("/admin/cache/verify/stats", dependencies=[Depends(require_bearer)])
+async def admin_verify_cache_stats():
+    return await asyncio.to_thread(verify_cache.info)
+
+@app.post("/admin/cache/verify/purge", dependencies=[Depends(require_bearer)])
+async def admin_verify_cache_purge(all: bool = False):
+    """Drop expired verification results (all=true: every cached result)."""
+    deleted = await asyncio.to_thread(verify_cache.flush_cache if all else verify_cache.purge_expired)
+    return {"deleted": deleted, "all": all}
+
+@app.post("/admin/runs/purge", dependencies=[Depends(require_bearer)])
+async def admin_runs_purge():
+    """Drop expired runs (leads, checkpoints) from the run store."""
+    deleted = await asyncio.to_thread(run_store.purge_expired)
+    return {"deleted": deleted, "ttl_hours": run_store.TTL_SECONDS // 3600}
+
+async def _resume(req: RunRequest) -> str | None:
+    """Take over req.resume_run_id for this request before the run starts (409 if it is
+    done, still running, or was started with another request); None for a new run."""
+    if not req.resume_run_id:
+        return None
+    try:
+        await asyncio.to_thread(
+            run_store.resume_run, req.resume_run_id, req.model_dump_json(exclude={"api_keys"}), req.session_id, RESUME_IGNORED_FIELDS
+        )
+    except run_store.RunConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return req.resume_run_id
+
 @app.post("/run", response_model=RunResponse, dependencies=[Depends(require_bearer)])
 async def run(req: RunRequest):
-    result = await run_pipeline(req, FOCUS)
+    result = await run_pipeline(req, FOCUS, run_id=await _resume(req))
     if FOCUS.telemetry_enabled:
         log_event(TelemetryEvent(session_id=req.session_id, event_type="run", payload={"run_id": result["run_id"], "leads": len(result["leads"])}))
     # Serialize leads to dicts for response_model compatibility
@@ -411,3 +538,141 @@ async def run(req: RunRequest):
         export=result.get("export") or None,
         email_drafts=result.get("email_drafts") or None,
     )
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def _encode_event(ev: Dict[str, Any], fmt: str) -> str:
+    data = json.dumps(jsonable_encoder(ev), ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {ev['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+@app.post("/run/stream", dependencies=[Depends(require_bearer)])
+async def run_stream(req: RunRequest, format: str = "ndjson"):
+    """Same run as /run, streamed while it happens: stage events, each lead as soon as it is
+    scored, then a summary (an "error" event if the run fails midway).
+    format=ndjson (one JSON object per line) or sse (text/event-stream)."""
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be ndjson or sse")
+    resume_run_id = await _resume(req)  # refused before the stream starts
+
+    async def events():
+        run_id, n, completed = None, 0, False
+        try:
+            async for ev in stream_pipeline(req, FOCUS, run_id=resume_run_id):
+                if ev["event"] == "start":
+                    run_id = ev["run_id"]
+                elif ev["event"] == "lead":
+                    n += 1
+                elif ev["event"] == "summary":
+                    completed = True
+                yield _encode_event(ev, format)
+        except Exception as e:
+            yield _encode_event({"event": "error", "run_id": run_id, "detail": str(e)}, format)
+        finally:
+            if FOCUS.telemetry_enabled:
+                log_event(TelemetryEvent(session_id=req.session_id, event_type="run_stream", payload={"run_id": run_id, "leads": n, "completed": completed}))
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[format], headers=headers)
+
+@app.post("/runs", status_code=202, dependencies=[Depends(require_bearer)])
+async def submit_run(req: RunRequest):
+    """Queue a background run and return its run_id at once; poll GET /runs/{run_id}."""
+    # the caller's API keys stay in the store only until a worker claims the run
+    api_keys_json = req.api_keys.model_dump_json() if req.api_keys else None
+    run_id = await asyncio.to_thread(run_store.create_run, req.model_dump_json(exclude={"api_keys"}), req.session_id, api_keys_json)
+    notify_worker()
+    if FOCUS.telemetry_enabled:
+        log_event(TelemetryEvent(session_id=req.session_id, event_type="run_submit", payload={"run_id": run_id}))
+    return {"run_id": run_id, "status": "queued"}
+
+@app.get("/runs/{run_id}", dependencies=[Depends(require_bearer)])
+async def get_run(run_id: str):
+    """Status (queued/running/done/failed), current stage and progress, leads so far, summary."""
+    run = await asyncio.to_thread(run_store.get_run, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+@app.get("/runs/{run_id}/leads", dependencies=[Depends(require_bearer)])
+async def get_run_leads(run_id: str, offset: int = 0, limit: int = 50):
+    """A page of the run's leads in completion order (already available while it runs)."""
+    run = await asyncio.to_thread(run_store.get_run, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    limit = max(1, min(limit, 500))
+    leads = await asyncio.to_thread(run_store.get_leads, run_id, offset, limit)
+    return {"run_id": run_id, "status": run["status"], "total": run["leads"], "offset": offset, "limit": limit, "leads": leads}
+
+# Run-based variants of /export/download, /score and /verify: the leads are read from the run
+# store by run_id, nothing is uploaded again (export rows come straight from the stored JSON)
+
+async def _finished_run(run_id: str) -> Dict[str, Any]:
+    run = await asyncio.to_thread(run_store.get_run, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found or expired")
+    if run["status"] in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Run is {run['status']}")
+    return run
+
+def _load_run_leads(run_id: str) -> List[Tuple[int, LeadRecord]]:
+    return [(seq, LeadRecord.model_validate(d)) for seq, d in run_store.load_leads(run_id)]
+
+def _save_run_leads(run_id: str, leads: List[Tuple[int, LeadRecord]]) -> None:
+    run_store.update_leads(run_id, [(seq, l.model_dump_json()) for seq, l in leads])
+
+def _by_class(leads: List[LeadRecord]) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for l in leads:
+        out[l.score_class] = out.get(l.score_class, 0) + 1
+    return out
+
+@app.get("/runs/{run_id}/export", dependencies=[Depends(require_bearer)])
+async def export_run(run_id: str, file_format: Literal["xlsx", "csv"] = "xlsx", session_id: str = "export"):
+    """Download the run's leads as XLSX/CSV (streamed, like /export/download)."""
+    await _finished_run(run_id)
+    chunks, fname, mime = export_leads_stream(run_store.iter_leads(run_id), file_format=file_format)
+    if FOCUS.telemetry_enabled:
+        log_event(TelemetryEvent(session_id=session_id, event_type="export_download", payload={"file_format": file_format, "file": fname, "run_id": run_id}))
+    headers = {"Content-Disposition": f'attachment; filename="{fname}"'}
+    return StreamingResponse(chunks, media_type=mime, headers=headers)
+
+@app.post("/runs/{run_id}/score", dependencies=[Depends(require_bearer)])
+async def score_run(run_id: str, session_id: str = "score"):
+    """Rescore the run's stored leads with the current focus config (leads: GET /runs/{run_id}/leads).
+
+    Preset and project profile are the run's own (its request and summary), as in the run."""
+    run = await _finished_run(run_id)
+
+    def rescore() -> List[LeadRecord]:
+        req = run_store.get_request(run_id) or {}
+        preset = load_preset(req.get("preset"))
+        profile_data = (run.get("summary") or {}).get("project_profile")
+        project_profile = ProjectProfile.model_validate(profile_data) if profile_data else None
+        stored = _load_run_leads(run_id)
+        score_leads([l for _, l in stored], FOCUS, project_profile=project_profile, preset=preset)
+        _save_run_leads(run_id, stored)
+        return [l for _, l in stored]
+
+    leads = await asyncio.to_thread(rescore)
+    if FOCUS.telemetry_enabled:
+        log_event(TelemetryEvent(session_id=session_id, event_type="score", payload={"items": len(leads), "run_id": run_id}))
+    return {"run_id": run_id, "leads": len(leads), "by_class": _by_class(leads)}
+
+@app.post("/runs/{run_id}/verify", dependencies=[Depends(require_bearer)])
+async def verify_run(run_id: str, api_keys: ApiKeys | None = None, session_id: str = "verify"):
+    """Verify the run's stored leads again and save the results (leads: GET /runs/{run_id}/leads).
+    The body is optional: the caller's ApiKeys (Hunter, verifier), as in the run request, since
+    the run does not keep them; without it the server's keys are used."""
+    await _finished_run(run_id)
+    stored = await asyncio.to_thread(_load_run_leads, run_id)
+    await verify_leads([l for _, l in stored], api_keys=api_keys)
+    await asyncio.to_thread(_save_run_leads, run_id, stored)
+    if FOCUS.telemetry_enabled:
+        log_event(TelemetryEvent(session_id=session_id, event_type="verify", payload={"items": len(stored), "run_id": run_id}))
+    statuses: Dict[str, int] = {}
+    for _, l in stored:
+        st = l.verified_email.status if l.verified_email else "none"
+        statuses[st] = statuses.get(st, 0) + 1
+    return {"run_id": run_id, "leads": len(stored), "email_status": statuses}
@@ -82,6 +82,7 @@ class LeadRecord(BaseModel):
 
 class RunRequest(BaseModel):
     force_refresh_profile: bool = False
+    force_refresh_search: bool = False  # ignore cached search results (they are still re-cached)
     enable_project_profile: bool = True
     api_keys: Optional[ApiKeys] = None
     reference_company_url: Optional[str] = None
@@ -94,6 +95,8 @@ class RunRequest(BaseModel):
     limit: int = 30
     include_email_drafts: bool = False
     session_id: str = "run"
+    # Continue the run with this id from its checkpoints (or start a new run under this id)
+    resume_run_id: Optional[str] = Field(default=None, pattern=r"^[A-Za-z0-9_-]{1,64}$")
 
 class DiscoverRequest(BaseModel):
     reference_company_url: Optional[str] = None
@@ -103,6 +106,7 @@ class DiscoverRequest(BaseModel):
     investment_window_months: List[int] = Field(default_factory=lambda:[4,6])
     allowed_channels: List[str] = Field(default_factory=lambda:["email","linkedin"])
     limit: int = 30
+    force_refresh_search: bool = False
     session_id: str = "discover"
 
 class EnrichRequest(BaseModel):
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+import os
+import re
+import sqlite3
+import time
+
+from .utils import sqlite_db
+
+IS_VERCEL = os.getenv("VERCEL") == "1" or bool(os.getenv("VERCEL_ENV"))
+DEFAULT_DB_PATH = os.environ.get("PAGE_CACHE_DB_PATH") or ("/tmp/page_cache.sqlite3" if IS_VERCEL else "./data/page_cache.sqlite3")
+ENABLED = os.environ.get("PAGE_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+DEFAULT_TTL_SECONDS = int(os.environ.get("PAGE_CACHE_TTL_SECONDS", str(3 * 24 * 3600)))  # 3 days
+NEGATIVE_TTL_SECONDS = int(os.environ.get("PAGE_CACHE_NEGATIVE_TTL_SECONDS", str(24 * 3600)))  # 404/410 pages
+MAX_TTL_SECONDS = 30 * 24 * 3600
+MAX_BYTES = int(os.environ.get("PAGE_CACHE_MAX_MB", "100")) * 1024 * 1024
+# set_page checks the cache size (SUM over the table) once this share of max_bytes has been written
+EVICT_EVERY = 0.05
+
+# Only "page does not exist" answers are cached negatively; 5xx/429 are transient.
+NEGATIVE_STATUSES = (404, 410)
+
+
+@dataclass
+class CachedPage:
+    url: str
+    status: int
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    expires_at: float = 0.0
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+
+# bytes written per db file since its size was last checked
+_written: Dict[str, int] = {}
+
+
+def _init(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            status INTEGER NOT NULL,
+            body TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            size INTEGER NOT NULL
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages(last_access)")
+
+
+def _db(path: str):
+    return sqlite_db.connection(path, _init)
+
+
+def ttl_from_headers(cache_control: Optional[str], default: int = DEFAULT_TTL_SECONDS) -> Optional[int]:
+    """TTL for a response: Cache-Control max-age if present (capped), None when it must not be stored."""
+    cc = (cache_control or "").lower()
+    if "no-store" in cc:
+        return None
+    m = re.search(r"max-age=(\d+)", cc)
+    if m:
+        # max-age=0 / no-cache still allow a conditional revalidation on the next fetch
+        return min(int(m.group(1)), MAX_TTL_SECONDS)
+    return default
+
+
+def get_page(url: str, db_path: str = DEFAULT_DB_PATH) -> Optional[CachedPage]:
+    """Return the cached entry for url (fresh or stale), refreshing its LRU position."""
+    try:
+        with _db(db_path) as conn:
+            row = conn.execute(
+                "SELECT status, body, etag, last_modified, expires_at FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+            conn.commit()
+            status, body, etag, last_modified, expires_at = row
+            return CachedPage(url=url, status=int(status), body=body, etag=etag, last_modified=last_modified, expires_at=float(expires_at))
+    except Exception:
+        return None
+
+
+def set_page(
+    url: str,
+    body: str,
+    status: int = 200,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    db_path: str = DEFAULT_DB_PATH,
+    max_bytes: int = MAX_BYTES,
+) -> None:
+    try:
+        with _db(db_path) as conn:
+            now = time.time()
+            size = len(body.encode("utf-8", errors="replace"))
+            conn.execute(
+                "INSERT OR REPLACE INTO pages(url, status, body, etag, last_modified, expires_at, last_access, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, int(status), body, etag, last_modified, now + ttl_seconds, now, size),
+            )
+            written = _written.get(db_path, 0) + size
+            # the size check scans the whole table: run it only every EVICT_EVERY * max_bytes
+            # written, so the cache overshoots max_bytes by at most that much per process
+            if written >= max_bytes * EVICT_EVERY:
+                _evict(conn, max_bytes)
+                written = 0
+            conn.commit()
+            _written[db_path] = written
+    except Exception:
+        return
+
+
+def revalidated(url: str, ttl_seconds: int = DEFAULT_TTL_SECONDS, db_path: str = DEFAULT_DB_PATH) -> None:
+    """Mark an entry fresh again after a 304 Not Modified."""
+    try:
+        with _db(db_path) as conn:
+            now = time.time()
+            conn.execute("UPDATE pages SET expires_at = ?, last_access = ? WHERE url = ?", (now + ttl_seconds, now, url))
+            conn.commit()
+    except Exception:
+        return
+
+
+def _evict(conn: sqlite3.Connection, max_bytes: int) -> int:
+    """Drop least recently used pages until the cache fits in max_bytes. Returns evicted rows."""
+    total = int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0] or 0)
+    if total <= max_bytes:
+        return 0
+    evicted = 0
+    for url, size in conn.execute("SELECT url, size FROM pages ORDER BY last_access ASC").fetchall():
+        if total <= max_bytes:
+            break
+        conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+        total -= int(size or 0)
+        evicted += 1
+    return evicted
+
+
+def flush_cache(db_path: str = DEFAULT_DB_PATH) -> int:
+    """Delete all cached pages. Returns number of deleted rows (best effort)."""
+    try:
+        with _db(db_path) as conn:
+            cur = conn.execute("SELECT COUNT(*) FROM pages")
+            n = int(cur.fetchone()[0] or 0)
+            conn.execute("DELETE FROM pages")
+            conn.commit()
+            _written[db_path] = 0
+            return n
+    except Exception:
+        return 0
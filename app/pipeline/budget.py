@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import Optional, Tuple
-import re
 from ..models import CompanyProfile
+from ..utils.keyword_match import get_matcher
 
 # Robust-ish heuristic to estimate whether a prospect likely has budget 30k–50k+
 # for projects in security/ICT/plant operations domains.
@@ -69,21 +69,19 @@ def estimate_budget(company: CompanyProfile, project_profile=None, preset=None)
         " ".join(company.technologies or []),
     ]).lower()
 
-    kw = 0.0
-    for pat, b in KEYWORD_BOOSTS:
-        if re.search(pat, corpus, re.IGNORECASE):
-            kw += b
-
-    # Preset-specific boosts
+    # Built-in + preset-specific boosts, matched in one pass over the corpus
+    boosts = list(KEYWORD_BOOSTS)
     if preset and getattr(preset, 'budget_keyword_boosts', None):
         for item in preset.budget_keyword_boosts:
             try:
                 pat = item.get('pattern')
                 b = float(item.get('boost', 0))
-                if pat and re.search(pat, corpus, re.IGNORECASE):
-                    kw += b
+                if pat:
+                    boosts.append((pat, b))
             except Exception:
                 continue
+    matcher = get_matcher(tuple(pat for pat, _ in boosts))
+    kw = sum(boosts[i][1] for i in sorted(matcher.matches(corpus)))
     if kw:
         boost = _clamp(kw, 0.0, 0.35)
         score += boost
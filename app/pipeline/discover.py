@@ -1,9 +1,11 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
 from ..models import CompanyCandidate, Evidence, Geography, Segment
 from ..utils.url import normalize_url, domain_from_url
 from .providers_factory import get_search_provider, get_news_provider
 from ..config_loader import FocusConfig
+from ..settings import settings
 
 def _build_queries(industry: str, geo: Geography, growth_keywords: List[str]) -> List[str]:
     provinces = geo.provinces or []
@@ -15,7 +17,8 @@ def _build_queries(industry: str, geo: Geography, growth_keywords: List[str]) ->
         # general
         q.append(f'{industry} aziende {prov}')
         q.append(f'{industry} {prov} investe ampliamento')
-    return q
+    # identical queries (duplicated provinces/keywords) are sent once
+    return list(dict.fromkeys(q))
 
 def _result_to_evidence(item: Dict[str, Any], source: str) -> Evidence:
     return Evidence(
@@ -26,6 +29,11 @@ def _result_to_evidence(item: Dict[str, Any], source: str) -> Evidence:
         source=source,
     )
 
+async def _run_query(search, news, q: str, sem: asyncio.Semaphore) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    async with sem:
+        web_results, news_results = await asyncio.gather(search.web_search(q, num=10), news.news_search(q, num=5))
+    return web_results, news_results
+
 async def discover_candidates(
     focus: FocusConfig,
     industry: str,
@@ -34,29 +42,38 @@ async def discover_candidates(
     limit: int = 30,
     api_keys=None,
     preset=None,
+    force_refresh: bool = False,
+    concurrency: Optional[int] = None,
 ) -> List[CompanyCandidate]:
-    search = get_search_provider(api_keys)
-    news = get_news_provider(api_keys)
+    """Send all queries concurrently and merge their results in query order.
+
+    Results are merged as soon as every earlier query has answered, so the output
+    is the same as a one-by-one run; outstanding queries are cancelled once
+    `limit` unique domains are collected (a query shared with another run through
+    the search cache keeps going for that run). Provider rate limits are applied by the
+    search cache layer (see SearchProvider.max_qps).
+    """
+    search = get_search_provider(api_keys, force_refresh=force_refresh)
+    news = get_news_provider(api_keys, force_refresh=force_refresh)
 
     queries = _build_queries(industry=industry, geo=geo, growth_keywords=focus.growth_keywords)
-    seen_domains: Set[str] = set()
+    # domain -> candidate: the set of seen domains and the lookup used to merge news evidence
+    by_domain: Dict[str, CompanyCandidate] = {}
     candidates: List[CompanyCandidate] = []
 
-    for q in queries:
-        if len(candidates) >= limit:
-            break
+    def add_candidate(dom: str, cand: CompanyCandidate) -> None:
+        by_domain[dom] = cand
+        candidates.append(cand)
 
-        # Web results
-        web_results = await search.web_search(q, num=10)
+    def merge_web(web_results: List[Dict[str, Any]]) -> None:
         for item in web_results:
             url = item.get("link") or ""
             if not url:
                 continue
             dom = domain_from_url(url)
-            if not dom or dom in seen_domains:
+            if not dom or dom in by_domain:
                 continue
-            seen_domains.add(dom)
-            candidates.append(CompanyCandidate(
+            add_candidate(dom, CompanyCandidate(
                 company_name=dom,
                 website=normalize_url(dom),
                 province=None,
@@ -67,11 +84,7 @@ async def discover_candidates(
             if len(candidates) >= limit:
                 break
 
-        if len(candidates) >= limit:
-            break
-
-        # News results (growth signals)
-        news_results = await news.news_search(q, num=5)
+    def merge_news(news_results: List[Dict[str, Any]]) -> None:
         for item in news_results:
             url = item.get("link") or item.get("url") or ""
             if not url:
@@ -81,16 +94,13 @@ async def discover_candidates(
                 continue
             # attach evidence to existing or create new
             ev = _result_to_evidence(item, source="news")
-            existing = next((c for c in candidates if domain_from_url(c.website) == dom), None)
+            existing = by_domain.get(dom)
             if existing:
                 existing.evidences.append(ev)
                 if item.get("title"):
                     existing.growth_signals.append(item.get("title"))
             else:
-                if dom in seen_domains:
-                    continue
-                seen_domains.add(dom)
-                candidates.append(CompanyCandidate(
+                add_candidate(dom, CompanyCandidate(
                     company_name=dom,
                     website=normalize_url(dom),
                     province=None,
@@ -101,4 +111,25 @@ async def discover_candidates(
             if len(candidates) >= limit:
                 break
 
+    if limit <= 0 or not queries:
+        return []
+
+    sem = asyncio.Semaphore(max(1, concurrency or settings.DISCOVER_CONCURRENCY))
+    tasks = [asyncio.ensure_future(_run_query(search, news, q, sem)) for q in queries]
+    try:
+        for task in tasks:
+            # in query order: a slow early query holds back merging, never reorders it
+            web_results, news_results = await task
+            merge_web(web_results)
+            if len(candidates) >= limit:
+                break
+            merge_news(news_results)
+            if len(candidates) >= limit:
+                break
+    finally:
+        pending = [t for t in tasks if not t.done()]
+        for t in pending:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
     return candidates[:limit]
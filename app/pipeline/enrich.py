@@ -1,14 +1,20 @@
 from __future__ import annotations
-from typing import List, Dict, Any
-import re
+from typing import List, Dict, Any, Optional
+import asyncio
 
 from ..models import CompanyCandidate, CompanyProfile, Evidence
 from ..utils.scrape import fetch
 from ..utils.tech_detect import detect_technologies
+from ..utils.html_page import ParsedPage
 from ..utils.url import normalize_url, domain_from_url
+from ..utils.limits import KeyedSemaphore, gather_limited
+from ..utils.keyword_match import get_matcher
 from ..providers.opencorporates import OpenCorporatesClient
 from ..settings import settings
 
+SERVICE_PATTERN = r"(servizi|soluzioni|prodotti|impianti|software|sistemi)"
+TARGET_PATTERN = r"(clienti|settori|industria|retail|logistica|produzione|B2B|PMI|enterprise)"
+
 ABOUT_PATHS = ["/chi-siamo", "/azienda", "/about", "/company", "/contatti", "/contact", "/lavora-con-noi", "/careers", "/news"]
 
 def _guess_company_name(domain: str) -> str:
@@ -18,68 +24,84 @@ def _extract_services_and_target(text: str) -> tuple[list[str], list[str]]:
     # Minimal heuristic extraction: bullet-like lines or keyword sections
     services = []
     targets = []
-    for line in text.splitlines():
-        s = line.strip(" -•	")
-        if 3 <= len(s) <= 120:
-            if re.search(r"(servizi|soluzioni|prodotti|impianti|software|sistemi)", s, re.IGNORECASE):
-                services.append(s)
-            if re.search(r"(clienti|settori|industria|retail|logistica|produzione|B2B|PMI|enterprise)", s, re.IGNORECASE):
-                targets.append(s)
+    lines = [s for s in (line.strip(" -•	") for line in text.splitlines()) if 3 <= len(s) <= 120]
+    for s, hits in zip(lines, get_matcher((SERVICE_PATTERN, TARGET_PATTERN)).by_line(lines)):
+        if 0 in hits:
+            services.append(s)
+        if 1 in hits:
+            targets.append(s)
         if len(services) > 12 and len(targets) > 12:
             break
     return list(dict.fromkeys(services))[:12], list(dict.fromkeys(targets))[:12]
 
-async def enrich_company(candidate: CompanyCandidate) -> CompanyProfile:
+async def _fetch_limited(url: str, sem: Optional[asyncio.Semaphore]) -> str:
+    if sem is None:
+        return await fetch(url)
+    async with sem:
+        return await fetch(url)
+
+async def _fetch_optional(url: str, sem: Optional[asyncio.Semaphore]) -> str:
+    try:
+        return await _fetch_limited(url, sem)
+    except Exception:
+        return ""
+
+async def enrich_company(candidate: CompanyCandidate, domain_limits: Optional[KeyedSemaphore] = None) -> CompanyProfile:
     base = normalize_url(candidate.website)
     domain = domain_from_url(base)
+    sem = domain_limits.get(domain) if domain_limits else None
     html = ""
     evidences = list(candidate.evidences)
 
-    # Fetch homepage
+    # Fetch homepage and the first about pages concurrently (the about pages only need the base URL)
+    about_paths = ABOUT_PATHS[:4]
+    home_task = asyncio.ensure_future(_fetch_limited(base, sem))
+    about_tasks = [asyncio.ensure_future(_fetch_optional(base.rstrip("/") + p, sem)) for p in about_paths]
     try:
-        html = await fetch(base)
+        html = await home_task
     except Exception:
         # retry http if https fails
         if base.startswith("https://"):
             try:
-                html = await fetch("http://" + domain)
+                html = await _fetch_limited("http://" + domain, sem)
                 base = "http://" + domain
             except Exception:
                 html = ""
+            if base.startswith("http://"):
+                # the https about pages are moot now: re-issue them against the http base
+                for t in about_tasks:
+                    t.cancel()
+                await asyncio.gather(*about_tasks, return_exceptions=True)
+                about_tasks = [asyncio.ensure_future(_fetch_optional(base.rstrip("/") + p, sem)) for p in about_paths]
+    about_pages = await asyncio.gather(*about_tasks)
 
     description = None
     services = []
     targets = []
-    tech = detect_technologies(html) if html else []
+    tech = []
 
     if html:
-        from bs4 import BeautifulSoup
-        # Use stdlib parser to avoid heavy lxml dependency (Vercel-friendly)
-        soup = BeautifulSoup(html, "html.parser")
-        title = (soup.title.string.strip() if soup.title and soup.title.string else None)
-        if title:
-            evidences.append(Evidence(title=title, url=base, snippet=None, source="site"))
+        # one parse feeds title, meta, visible text and tech detection
+        page = ParsedPage.parse(html)
+        tech = detect_technologies(page)
+        if page.title:
+            evidences.append(Evidence(title=page.title, url=base, snippet=None, source="site"))
         # meta description
-        md = soup.find("meta", attrs={"name": "description"})
-        if md and md.get("content"):
-            description = md["content"].strip()
+        description = page.meta.get("description") or None
 
         # extract from visible text
-        from ..utils.scrape import clean_text
-        text = clean_text(html)
-        services, targets = _extract_services_and_target(text)
+        services, targets = _extract_services_and_target(page.text)
 
-    # Try a few common pages for more context
-    for path in ABOUT_PATHS[:4]:
+    # Merge a few common pages for more context (input order, so output stays deterministic)
+    for path, phtml in zip(about_paths, about_pages):
         try:
-            phtml = await fetch(base.rstrip("/") + path)
             if phtml:
-                from ..utils.scrape import clean_text
-                t = clean_text(phtml)
+                ppage = ParsedPage.parse(phtml)
+                t = ppage.text
                 s2, t2 = _extract_services_and_target(t)
                 services.extend(s2)
                 targets.extend(t2)
-                tech.extend(detect_technologies(phtml))
+                tech.extend(detect_technologies(ppage))
                 evidences.append(Evidence(title=f"page:{path}", url=base.rstrip('/')+path, snippet=t[:250], source="site"))
         except Exception:
             continue
@@ -122,8 +144,12 @@ async def enrich_company(candidate: CompanyCandidate) -> CompanyProfile:
         evidences=evidences,
     )
 
-async def enrich_candidates(candidates: List[CompanyCandidate]) -> List[CompanyProfile]:
-    out: List[CompanyProfile] = []
-    for c in candidates:
-        out.append(await enrich_company(c))
-    return out
+async def enrich_candidates(
+    candidates: List[CompanyCandidate],
+    concurrency: Optional[int] = None,
+    per_domain: Optional[int] = None,
+) -> List[CompanyProfile]:
+    """Enrich candidates concurrently; the output keeps the input order."""
+    limit = concurrency or settings.ENRICH_CONCURRENCY
+    domain_limits = KeyedSemaphore(per_domain or settings.ENRICH_PER_DOMAIN_CONCURRENCY)
+    return await gather_limited((enrich_company(c, domain_limits) for c in candidates), limit)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any, Tuple
+from typing import Iterable, Iterator, List, Dict, Any, Tuple, Union
 from datetime import datetime
 from pathlib import Path
+from tempfile import SpooledTemporaryFile
+import codecs
 import csv
 import io
 import os
@@ -19,98 +21,158 @@ MIME_BY_FORMAT = {
     "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
 }
 
+HEADERS = [
+    "Azienda",
+    "Sito",
+    "Settore",
+    "Provincia",
+    "Dimensione_dipendenti",
+    "Fatturato_EUR",
+    "Trigger_crescita",
+    "Fonti_trigger",
+    "Budget_stimato_EUR",
+    "Timing_investimento",
+    "Decision_maker",
+    "Ruolo",
+    "Email_verificata",
+    "Stato_email",
+    "Fonte_contatto",
+    "Score",
+    "Classe",
+    "Stato",
+]
+
+CSV_CHUNK_ROWS = 500  # rows encoded per chunk sent to the client
+XLSX_SPOOL_BYTES = 8 * 1024 * 1024  # XLSX files larger than this are spooled to disk
+READ_CHUNK_BYTES = 64 * 1024
+
+
+def _row(l: LeadRecord) -> List[Any]:
+    """Export values of one lead, in HEADERS order."""
+    c = l.company
+    dm = l.decision_maker
+    ve = l.verified_email
+    return [
+        c.company_name,
+        c.website,
+        c.industry,
+        c.province,
+        c.employees_est,
+        c.revenue_est_eur,
+        " | ".join(c.recent_projects or []),
+        " | ".join([e.url for e in (c.evidences or [])[:5]]),
+        l.estimated_budget_eur,
+        "-".join(map(str, l.investment_window_months or [])),
+        (dm.name if dm else None),
+        (dm.role if dm else None),
+        (ve.email if ve else None),
+        (ve.status if ve else None),
+        l.contact_source,
+        l.score,
+        l.score_class,
+        l.status,
+    ]
 
-def _rows(leads: List[LeadRecord]) -> Tuple[List[str], List[Dict[str, Any]]]:
-    rows: List[Dict[str, Any]] = []
-    for l in leads:
-        c = l.company
-        dm = l.decision_maker
-        ve = l.verified_email
-        rows.append(
-            {
-                "Azienda": c.company_name,
-                "Sito": c.website,
-                "Settore": c.industry,
-                "Provincia": c.province,
-                "Dimensione_dipendenti": c.employees_est,
-                "Fatturato_EUR": c.revenue_est_eur,
-                "Trigger_crescita": " | ".join(c.recent_projects or []),
-                "Fonti_trigger": " | ".join([e.url for e in (c.evidences or [])[:5]]),
-                "Budget_stimato_EUR": l.estimated_budget_eur,
-                "Timing_investimento": "-".join(map(str, l.investment_window_months or [])),
-                "Decision_maker": (dm.name if dm else None),
-                "Ruolo": (dm.role if dm else None),
-                "Email_verificata": (ve.email if ve else None),
-                "Stato_email": (ve.status if ve else None),
-                "Fonte_contatto": l.contact_source,
-                "Score": l.score,
-                "Classe": l.score_class,
-                "Stato": l.status,
-            }
-        )
-
-    headers = list(rows[0].keys()) if rows else [
-        "Azienda",
-        "Sito",
-        "Settore",
-        "Provincia",
-        "Dimensione_dipendenti",
-        "Fatturato_EUR",
-        "Trigger_crescita",
-        "Fonti_trigger",
-        "Budget_stimato_EUR",
-        "Timing_investimento",
-        "Decision_maker",
-        "Ruolo",
-        "Email_verificata",
-        "Stato_email",
-        "Fonte_contatto",
-        "Score",
-        "Classe",
-        "Stato",
+
+def _dict_row(l: Dict[str, Any]) -> List[Any]:
+    """Same as _row, from a lead as stored (plain dict from its JSON): no model validation."""
+    c = l.get("company") or {}
+    dm = l.get("decision_maker") or None
+    ve = l.get("verified_email") or None
+    return [
+        c.get("company_name"),
+        c.get("website"),
+        c.get("industry"),
+        c.get("province"),
+        c.get("employees_est"),
+        c.get("revenue_est_eur"),
+        " | ".join(c.get("recent_projects") or []),
+        " | ".join([e.get("url") for e in (c.get("evidences") or [])[:5]]),
+        l.get("estimated_budget_eur"),
+        "-".join(map(str, l.get("investment_window_months") or [])),
+        (dm.get("name") if dm else None),
+        (dm.get("role") if dm else None),
+        (ve.get("email") if ve else None),
+        (ve.get("status") if ve else None),
+        l.get("contact_source"),
+        l.get("score"),
+        l.get("score_class"),
+        l.get("status"),
     ]
-    return headers, rows
 
 
-def export_leads_bytes(leads: List[LeadRecord], file_format: str = "xlsx") -> Tuple[bytes, str, str]:
-    """Create an XLSX/CSV export in memory (serverless-safe)."""
+def iter_rows(leads: Iterable[Union[LeadRecord, Dict[str, Any]]]) -> Iterator[List[Any]]:
+    for l in leads:
+        yield _dict_row(l) if isinstance(l, dict) else _row(l)
+
+
+def iter_csv(leads: Iterable[Union[LeadRecord, Dict[str, Any]]], chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[bytes]:
+    """CSV export as a stream of UTF-8 chunks (BOM first, for Excel); one chunk in memory at a time."""
+    yield codecs.BOM_UTF8
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(HEADERS)
+    for n, row in enumerate(iter_rows(leads), 1):
+        writer.writerow(["" if v is None else v for v in row])
+        if n % chunk_rows == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def write_xlsx(leads: Iterable[Union[LeadRecord, Dict[str, Any]]], fileobj) -> None:
+    """XLSX export in openpyxl write-only mode: rows are streamed to the file, not kept as cells."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Leads")
+    ws.append(HEADERS)
+    for row in iter_rows(leads):
+        ws.append(row)
+    wb.save(fileobj)
+
+
+def iter_xlsx(leads: Iterable[Union[LeadRecord, Dict[str, Any]]], chunk_bytes: int = READ_CHUNK_BYTES) -> Iterator[bytes]:
+    """XLSX export as a stream of chunks, built in a spooled temp file (memory, then disk if large)."""
+    with SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES) as f:
+        write_xlsx(leads, f)
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_leads_stream(leads: Iterable[Union[LeadRecord, Dict[str, Any]]], file_format: str = "xlsx") -> Tuple[Iterator[bytes], str, str]:
+    """Lazy XLSX/CSV export: (chunks, filename, mime). Nothing is built until iterated, so it
+    can go straight into a StreamingResponse (sync iterators run in the threadpool there).
+    Leads may also be plain dicts as stored in the run store (run_store.iter_leads)."""
     fmt = (file_format or "xlsx").lower()
     if fmt not in ("xlsx", "csv"):
         fmt = "xlsx"
 
-    headers, rows = _rows(leads)
-
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     fname = f"leads_{ts}.{fmt}"
-    mime = MIME_BY_FORMAT[fmt]
-
-    if fmt == "csv":
-        sio = io.StringIO()
-        writer = csv.DictWriter(sio, fieldnames=headers)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow({k: ("" if r.get(k) is None else r.get(k)) for k in headers})
-        return sio.getvalue().encode("utf-8-sig"), fname, mime
+    chunks = iter_csv(leads) if fmt == "csv" else iter_xlsx(leads)
+    return chunks, fname, MIME_BY_FORMAT[fmt]
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Leads"
-    ws.append(headers)
-    for r in rows:
-        ws.append([r.get(h) for h in headers])
 
-    bio = io.BytesIO()
-    wb.save(bio)
-    return bio.getvalue(), fname, mime
+def export_leads_bytes(leads: List[LeadRecord], file_format: str = "xlsx") -> Tuple[bytes, str, str]:
+    """Create an XLSX/CSV export in memory (serverless-safe)."""
+    chunks, fname, mime = export_leads_stream(leads, file_format=file_format)
+    return b"".join(chunks), fname, mime
 
 
 def export_leads(leads: List[LeadRecord], file_format: str = "xlsx") -> Dict[str, Any]:
     """Best-effort file export to the filesystem (defaults to /tmp)."""
-    content, fname, mime = export_leads_bytes(leads, file_format=file_format)
+    chunks, fname, mime = export_leads_stream(leads, file_format=file_format)
     try:
         EXPORT_DIR.mkdir(parents=True, exist_ok=True)
         path = EXPORT_DIR / fname
-        path.write_bytes(content)
+        with open(path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
         return {"file": fname, "path": str(path), "mime": mime}
     except Exception:
         # Still return something useful even if FS write fails
@@ -1,8 +1,12 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import re
 
 from ..models import CompanyProfile, DecisionMaker
+from ..settings import settings
+from ..utils.keyword_match import get_matcher
+from ..utils.limits import gather_limited
 from ..utils.scrape import fetch, clean_text
 
 DM_ROLE_PATTERNS = [
@@ -17,21 +21,21 @@ DM_ROLE_PATTERNS = [
 
 PEOPLE_PAGES = ["/team","/chi-siamo","/azienda","/about","/contatti","/contact","/organigramma"]
 
+ROLE_PRIORITY = {role: i for i, (role, _) in enumerate(DM_ROLE_PATTERNS)}
+
 def _extract_people(text: str) -> List[DecisionMaker]:
     # Heuristic: find "Name Surname – Role" like patterns in lines
     dms: List[DecisionMaker] = []
-    for line in text.splitlines():
-        s = line.strip()
-        if len(s) < 8 or len(s) > 140:
-            continue
-        # look for roles
-        for role, pat in DM_ROLE_PATTERNS:
-            if re.search(pat, s, re.IGNORECASE):
-                # try to capture a name before role
-                m = re.search(r"([A-ZÀ-ÖØ-Ý][\w'’\-]+\s+[A-ZÀ-ÖØ-Ý][\w'’\-]+)", s)
-                name = m.group(1) if m else "N/D"
-                dms.append(DecisionMaker(name=name, role=role, source_url=None, linkedin_url=None))
-                break
+    lines = [s for s in (line.strip() for line in text.splitlines()) if 8 <= len(s) <= 140]
+    # one scan for all roles; per line the highest-priority matching role wins
+    role_hits = get_matcher(tuple(pat for _, pat in DM_ROLE_PATTERNS)).by_line(lines)
+    for s, hits in zip(lines, role_hits):
+        if hits:
+            role = DM_ROLE_PATTERNS[min(hits)][0]
+            # try to capture a name before role
+            m = re.search(r"([A-ZÀ-ÖØ-Ý][\w'’\-]+\s+[A-ZÀ-ÖØ-Ý][\w'’\-]+)", s)
+            name = m.group(1) if m else "N/D"
+            dms.append(DecisionMaker(name=name, role=role, source_url=None, linkedin_url=None))
         if len(dms) >= 6:
             break
     # de-dup by (name,role)
@@ -44,10 +48,56 @@ def _extract_people(text: str) -> List[DecisionMaker]:
             uniq.append(d)
     return uniq
 
-async def identify_decision_maker(company: CompanyProfile) -> Optional[DecisionMaker]:
+async def _probe_page(url: str) -> Optional[DecisionMaker]:
+    """Fetch one people page and return its highest-priority decision maker (if any)."""
+    html = await fetch(url)
+    people = _extract_people(clean_text(html))
+    if not people:
+        return None
+    best = min(people, key=lambda d: ROLE_PRIORITY.get(d.role, len(ROLE_PRIORITY)))
+    best.source_url = url
+    return best
+
+def _best_hit(found: Dict[int, Optional[DecisionMaker]]) -> Optional[Tuple[int, int]]:
+    """(role rank, page index) of the best match so far: role priority first, then PEOPLE_PAGES order."""
+    hits = [(ROLE_PRIORITY.get(dm.role, len(ROLE_PRIORITY)), i) for i, dm in found.items() if dm]
+    return min(hits) if hits else None
+
+def _is_certain(best: Optional[Tuple[int, int]], found: Dict[int, Optional[DecisionMaker]]) -> bool:
+    # No pending page can beat a top-role match once every page before it has answered
+    return bool(best) and best[0] == 0 and all(j in found for j in range(best[1]))
+
+async def _identify_parallel(base: str) -> Optional[DecisionMaker]:
+    tasks = {asyncio.ensure_future(_probe_page(base + path)): i for i, path in enumerate(PEOPLE_PAGES)}
+    found: Dict[int, Optional[DecisionMaker]] = {}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                try:
+                    found[tasks[t]] = t.result()
+                except Exception:
+                    found[tasks[t]] = None
+            if _is_certain(_best_hit(found), found):
+                break
+    finally:
+        # cancel the remaining probes once the winner is certain
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    best = _best_hit(found)
+    return found[best[1]] if best else None
+
+async def identify_decision_maker(company: CompanyProfile, parallel: Optional[bool] = None) -> Optional[DecisionMaker]:
     base = company.website.rstrip("/")
     best: Optional[DecisionMaker] = None
 
+    if settings.IDENTIFY_PARALLEL if parallel is None else parallel:
+        return await _identify_parallel(base)
+
     # Try people pages
     for path in PEOPLE_PAGES:
         try:
@@ -65,8 +115,12 @@ async def identify_decision_maker(company: CompanyProfile) -> Optional[DecisionM
     # fallback: none found
     return None
 
-async def identify_for_companies(companies: List[CompanyProfile]) -> List[tuple[CompanyProfile, Optional[DecisionMaker]]]:
-    out = []
-    for c in companies:
-        out.append((c, await identify_decision_maker(c)))
-    return out
+async def _identify_pair(company: CompanyProfile) -> tuple[CompanyProfile, Optional[DecisionMaker]]:
+    return company, await identify_decision_maker(company)
+
+async def identify_for_companies(
+    companies: List[CompanyProfile],
+    concurrency: Optional[int] = None,
+) -> List[tuple[CompanyProfile, Optional[DecisionMaker]]]:
+    """Identify decision makers concurrently; the output keeps the input order."""
+    return await gather_limited((_identify_pair(c) for c in companies), concurrency or settings.IDENTIFY_CONCURRENCY)
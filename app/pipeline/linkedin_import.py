@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from typing import List, Optional, Dict, Any
+from typing import BinaryIO, Iterator, List, Optional, Dict, Any, Tuple
 import csv
 import io
+import itertools
 import re
 
+from .. import email_patterns
 from ..models import CompanyProfile, DecisionMaker, LeadRecord, VerifiedEmail, Evidence
 from .budget import estimate_budget
 
@@ -65,87 +67,143 @@ def _sniff_dialect(sample: str) -> csv.Dialect:
         return csv.get_dialect("excel")
 
 
-def parse_linkedin_csv(content: bytes, mapping: Optional[Dict[str, Any]] = None) -> List[LeadRecord]:
-    # Handle UTF-8 BOM and strange encodings gracefully
-    text = content.decode("utf-8-sig", errors="replace")
-    sample = "\n".join(text.splitlines()[:5])
-    dialect = _sniff_dialect(sample)
-
-    f = io.StringIO(text)
-    reader = csv.DictReader(f, dialect=dialect)
-    cols = [c for c in (reader.fieldnames or []) if c is not None]
-
-    c_first = _mapped(mapping, "first_name", cols) or _pick_col(cols, COLUMN_ALIASES["first_name"])
-    c_last = _mapped(mapping, "last_name", cols) or _pick_col(cols, COLUMN_ALIASES["last_name"])
-    c_company = _mapped(mapping, "company", cols) or _pick_col(cols, COLUMN_ALIASES["company"])
-    c_pos = _mapped(mapping, "position", cols) or _pick_col(cols, COLUMN_ALIASES["position"])
-    c_email = _mapped(mapping, "email", cols) or _pick_col(cols, COLUMN_ALIASES["email"])
-    c_li = _mapped(mapping, "linkedin_url", cols) or _pick_col(cols, COLUMN_ALIASES["linkedin_url"])
-    c_site = _mapped(mapping, "website", cols) or _pick_col(cols, COLUMN_ALIASES["website"])
-
-    leads: List[LeadRecord] = []
-    for row in reader:
-        first = (row.get(c_first) or "").strip() if c_first else ""
-        last = (row.get(c_last) or "").strip() if c_last else ""
-        name = " ".join([x for x in [first, last] if x]).strip() or "N/D"
-
-        company_name = (row.get(c_company) or "").strip() if c_company else ""
-        role = (row.get(c_pos) or "").strip() if c_pos else "N/D"
-        email = (row.get(c_email) or "").strip() if c_email else ""
-        li = (row.get(c_li) or "").strip() if c_li else ""
-        site = (row.get(c_site) or "").strip() if c_site else ""
-
-        if not company_name and name == "N/D":
-            continue
-
-        company = CompanyProfile(
-            company_name=company_name or "N/D",
-            website=site or "",
-            province=None,
-            industry=None,
-            description=None,
-            services_products=[],
-            target_customers=[],
-            technologies=[],
-            employees_est=None,
-            revenue_est_eur=None,
-            headquarters=None,
-            recent_projects=[],
-            partners=[],
-            evidences=[Evidence(title="LinkedIn import", url=li or "", snippet=role or None, source="linkedin")],
-        )
+SNIFF_CHARS = 64 * 1024  # head of the file read to sniff the dialect and the header
+LEARN_BATCH_ROWS = 1000  # imported contacts with email per email-pattern write
 
-        dm = (
-            DecisionMaker(name=name, role=role or "N/D", source_url=None, linkedin_url=li or None)
-            if name != "N/D"
-            else None
-        )
+# (domain, email) -> (email, first, last) of the imported contacts
+EmailSamples = Dict[Tuple[str, str], Tuple[str, str, str]]
 
-        est, _ = estimate_budget(company)
-
-        ve = (
-            VerifiedEmail(
-                email=email,
-                status="unknown",
-                source="linkedin_import",
-                details={"note": "email non verificata (import)"},
-            )
-            if email
-            else None
-        )
 
-        leads.append(
-            LeadRecord(
-                company=company,
-                decision_maker=dm,
-                verified_email=ve,
-                contact_source="linkedin_import",
-                estimated_budget_eur=est,
-                investment_window_months=[4, 6],
-                score=0,
-                score_class="cold",
-                status="nuovo",
-            )
+def _lines(stream: BinaryIO) -> Tuple[io.TextIOWrapper, str, Iterator[str]]:
+    """Decode a binary stream incrementally: (wrapper, head, all lines). Only the head is read up front."""
+    # Handle UTF-8 BOM and strange encodings gracefully
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    head = text.read(SNIFF_CHARS)
+    lines = io.StringIO(head, newline="").readlines()
+    if lines and not lines[-1].endswith(("\n", "\r")):
+        lines[-1] += text.readline()  # complete the line cut by the head
+    return text, head, itertools.chain(lines, text)
+
+
+def iter_linkedin_csv(
+    stream: BinaryIO,
+    mapping: Optional[Dict[str, Any]] = None,
+    learn_patterns: bool = email_patterns.ENABLED,
+) -> Iterator[LeadRecord]:
+    """Parse a LinkedIn / Sales Navigator CSV export row by row, yielding leads as it reads.
+
+    `stream` is a binary file object (e.g. an upload's spooled file); memory stays flat
+    whatever the number of rows. With `learn_patterns` the contacts with email and name
+    vote for their domain's email pattern, LEARN_BATCH_ROWS addresses per write: the
+    writes are blocking, iterate from a worker thread.
+    """
+    text, head, lines = _lines(stream)
+    try:
+        sample = "\n".join(head.splitlines()[:5])
+        dialect = _sniff_dialect(sample)
+
+        reader = csv.DictReader(lines, dialect=dialect)
+        cols = [c for c in (reader.fieldnames or []) if c is not None]
+
+        c_first = _mapped(mapping, "first_name", cols) or _pick_col(cols, COLUMN_ALIASES["first_name"])
+        c_last = _mapped(mapping, "last_name", cols) or _pick_col(cols, COLUMN_ALIASES["last_name"])
+        c_company = _mapped(mapping, "company", cols) or _pick_col(cols, COLUMN_ALIASES["company"])
+        c_pos = _mapped(mapping, "position", cols) or _pick_col(cols, COLUMN_ALIASES["position"])
+        c_email = _mapped(mapping, "email", cols) or _pick_col(cols, COLUMN_ALIASES["email"])
+        c_li = _mapped(mapping, "linkedin_url", cols) or _pick_col(cols, COLUMN_ALIASES["linkedin_url"])
+        c_site = _mapped(mapping, "website", cols) or _pick_col(cols, COLUMN_ALIASES["website"])
+        samples: EmailSamples = {}
+
+        for row in reader:
+            first = (row.get(c_first) or "").strip() if c_first else ""
+            last = (row.get(c_last) or "").strip() if c_last else ""
+            name = " ".join([x for x in [first, last] if x]).strip() or "N/D"
+
+            company_name = (row.get(c_company) or "").strip() if c_company else ""
+            role = (row.get(c_pos) or "").strip() if c_pos else "N/D"
+            email = (row.get(c_email) or "").strip() if c_email else ""
+            li = (row.get(c_li) or "").strip() if c_li else ""
+            site = (row.get(c_site) or "").strip() if c_site else ""
+
+            if not company_name and name == "N/D":
+                continue
+            if learn_patterns and "@" in email and first and last:
+                # imported contacts teach us each domain's email pattern
+                addr = email.lower()
+                samples.setdefault((addr.split("@", 1)[1], addr), (email, first, last))
+                if len(samples) >= LEARN_BATCH_ROWS:
+                    learn_email_patterns(samples)
+                    samples = {}
+
+            yield _lead(company_name, site, role, name, email, li)
+        learn_email_patterns(samples)
+    finally:
+        text.detach()  # the caller owns the stream
+
+
+def learn_email_patterns(email_samples: EmailSamples) -> int:
+    """Vote for each domain's email pattern with a batch of imported contacts, in one write.
+    An address already counted (in an earlier batch, or the same contacts imported again)
+    does not vote again."""
+    if not email_patterns.ENABLED or not email_samples:
+        return 0
+    return email_patterns.learn_from_emails(email_samples.values(), "linkedin_import", once=True)
+
+
+def _lead(company_name: str, site: str, role: str, name: str, email: str, li: str) -> LeadRecord:
+    company = CompanyProfile(
+        company_name=company_name or "N/D",
+        website=site or "",
+        province=None,
+        industry=None,
+        description=None,
+        services_products=[],
+        target_customers=[],
+        technologies=[],
+        employees_est=None,
+        revenue_est_eur=None,
+        headquarters=None,
+        recent_projects=[],
+        partners=[],
+        evidences=[Evidence(title="LinkedIn import", url=li or "", snippet=role or None, source="linkedin")],
+    )
+
+    dm = (
+        DecisionMaker(name=name, role=role or "N/D", source_url=None, linkedin_url=li or None)
+        if name != "N/D"
+        else None
+    )
+
+    est, _ = estimate_budget(company)
+
+    ve = (
+        VerifiedEmail(
+            email=email,
+            status="unknown",
+            source="linkedin_import",
+            details={"note": "email non verificata (import)"},
         )
-
-    return leads
+        if email
+        else None
+    )
+
+    return LeadRecord(
+        company=company,
+        decision_maker=dm,
+        verified_email=ve,
+        contact_source="linkedin_import",
+        estimated_budget_eur=est,
+        investment_window_months=[4, 6],
+        score=0,
+        score_class="cold",
+        status="nuovo",
+    )
+
+
+def parse_linkedin_csv(
+    content: bytes,
+    mapping: Optional[Dict[str, Any]] = None,
+    learn_patterns: bool = email_patterns.ENABLED,
+) -> List[LeadRecord]:
+    """Whole-file variant of iter_linkedin_csv (small uploads, scripts)."""
+    return list(iter_linkedin_csv(io.BytesIO(content), mapping=mapping, learn_patterns=learn_patterns))
@@ -1,13 +1,21 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+import asyncio
+import json
+import logging
+import time
 import uuid
 
-from ..models import RunRequest, LeadRecord, Evidence
+from .. import run_store
+from ..models import RunRequest, LeadRecord, Evidence, CompanyCandidate, CompanyProfile, DecisionMaker, ProjectProfile
 from ..config_loader import FocusConfig
+from ..settings import settings
+from ..utils.limits import KeyedSemaphore
+from .stages import Stage, run_stages
 from .discover import discover_candidates
-from .enrich import enrich_candidates
-from .identify import identify_for_companies
-from .verify import verify_leads
+from .enrich import enrich_company
+from .identify import identify_decision_maker
+from .verify import LeadVerifier
 from .score import score_leads
 from .exporter import export_leads
 from .email_drafts import generate_email_drafts
@@ -15,65 +23,288 @@ from .budget import estimate_budget
 from .project_profile import build_project_profile
 from .presets import load_preset
 
-async def run_pipeline(req: RunRequest, focus: FocusConfig) -> Dict[str, Any]:
-    run_id = uuid.uuid4().hex[:12]
-    preset_cfg = load_preset(req.preset)
+logger = logging.getLogger(__name__)
 
-    project_profile = None
-    if getattr(req, "enable_project_profile", True) and req.reference_company_url:
+# RunRequest fields that may change when a run is resumed (they do not change its checkpoints)
+RESUME_IGNORED_FIELDS = ("resume_run_id", "session_id", "force_refresh_profile", "force_refresh_search")
+
+class RunCheckpoints:
+    """Stage outputs of one run saved under its run_id (run_store checkpoints): with the
+    same run_id a retry skips the stages, and per company the steps, already done.
+
+    Per-company checkpoints are buffered and written in batches (RUN_STORE_WRITE_BATCH_SIZE
+    rows or RUN_STORE_WRITE_FLUSH_SECONDS); what is buffered when the run stops is written
+    by flush_now()."""
+
+    def __init__(self, run_id: str, enabled: bool = True):
+        self.run_id = run_id
+        self.enabled = enabled
+        self.saved: Dict[str, Dict[int, str]] = {}
+        self._pending: List[Tuple[str, int, str]] = []
+        self._last_flush = time.monotonic()
+
+    async def load(self) -> int:
+        if self.enabled:
+            self.saved = await asyncio.to_thread(run_store.load_checkpoints, self.run_id)
+        return sum(len(v) for v in self.saved.values())
+
+    def get(self, stage: str, idx: int = 0) -> Optional[str]:
+        return self.saved.get(stage, {}).get(idx)
+
+    def _due(self) -> bool:
+        return len(self._pending) >= run_store.WRITE_BATCH_SIZE or time.monotonic() - self._last_flush >= run_store.WRITE_FLUSH_SECONDS
+
+    async def save(self, stage: str, idx: int, data_json: str, flush: bool = False) -> None:
+        if self.enabled:
+            self._pending.append((stage, idx, data_json))
+            if flush or self._due():
+                await self.flush()
+
+    async def maybe_flush(self) -> None:
+        if self._pending and self._due():
+            await self.flush()
+
+    async def flush(self) -> None:
+        rows, self._pending = self._pending, []
+        self._last_flush = time.monotonic()
+        if rows:
+            await asyncio.to_thread(run_store.save_checkpoints, self.run_id, rows)
+
+    def flush_now(self) -> None:
+        # run stopping (error, cancelled, consumer gone): no awaiting, a quick synchronous write
+        rows, self._pending = self._pending, []
+        if rows:
+            run_store.save_checkpoints(self.run_id, rows)
+
+    async def clear(self) -> None:
+        self._pending = []
+        if self.enabled:
+            await asyncio.to_thread(run_store.clear_checkpoints, self.run_id)
+
+async def _record(fn, *args) -> None:
+    # run store bookkeeping is best effort: it never fails the run
+    try:
+        await asyncio.to_thread(fn, *args)
+    except Exception:
+        logger.warning("run store write failed (%s)", getattr(fn, "__name__", fn), exc_info=True)
+
+def _budget_lead(comp: CompanyProfile, dm: Optional[DecisionMaker], req: RunRequest, project_profile, preset_cfg) -> LeadRecord:
+    est, rationale = estimate_budget(comp, project_profile=project_profile, preset=preset_cfg)
+    comp.evidences = (comp.evidences or []) + [
+        Evidence(title="budget_estimate", url=comp.website, snippet=rationale, source="heuristic")
+    ]
+    return LeadRecord(
+        company=comp,
+        decision_maker=dm,
+        verified_email=None,
+        contact_source=None,
+        estimated_budget_eur=est,
+        investment_window_months=req.investment_window_months,
+        score=0,
+        score_class="cold",
+        status="nuovo",
+    )
+
+async def stream_pipeline(req: RunRequest, focus: FocusConfig, run_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Run the pipeline and yield its events as they happen.
+
+    Events (dicts, "event" says which): "start"; "stage" when project_profile / discover /
+    leads / email_drafts complete; one "lead" per candidate as soon as it is scored (in
+    completion order, "index" is its discover position); a final "summary". Each candidate
+    flows enrich -> identify -> budget -> verify -> score on its own (app/pipeline/stages.py):
+    bounded queues between the stages, *_CONCURRENCY workers per network stage.
+
+    Every stage output is checkpointed under the run_id (RUN_CHECKPOINTS): given a run_id
+    (a run the caller already holds: claimed by a worker, or resume_run) or req.resume_run_id
+    the run resumes from what an interrupted attempt saved; a resume_run_id that cannot be
+    resumed raises run_store.RunConflict. The run is recorded in the run store as it goes
+    (progress, each lead, summary), so its leads stay available by run_id for RUN_RESULTS_TTL_HOURS.
+    """
+    resuming = bool(run_id or req.resume_run_id)
+    # the caller's API keys are never stored with the run
+    request_json = req.model_dump_json(exclude={"api_keys"})
+    await _record(run_store.maybe_purge)
+    if req.resume_run_id and not run_id:
+        run_id = req.resume_run_id
+        await asyncio.to_thread(run_store.resume_run, run_id, request_json, req.session_id, RESUME_IGNORED_FIELDS)
+    else:
+        run_id = run_id or uuid.uuid4().hex[:12]
+        await _record(run_store.start_run, run_id, request_json, req.session_id)
+    # finished leads are written in batches, each with the run's progress
+    pending: List[Tuple[int, int, str]] = []
+    progress: Dict[str, Any] = {}
+    last_flush = time.monotonic()
+    try:
+        async for ev in _pipeline_events(req, focus, run_id, resuming):
+            if ev["event"] == "stage":
+                progress = {k: v for k, v in ev.items() if k not in ("event", "stage")}
+                await _record(run_store.set_progress, run_id, ev["stage"], progress)
+            elif ev["event"] == "lead":
+                pending.append((ev["done"], ev["index"], ev["lead"].model_dump_json()))
+                progress = {"done": ev["done"], "total": ev["total"]}
+                if (
+                    ev["done"] == ev["total"]
+                    or len(pending) >= run_store.WRITE_BATCH_SIZE
+                    or time.monotonic() - last_flush >= run_store.WRITE_FLUSH_SECONDS
+                ):
+                    rows, pending, last_flush = pending, [], time.monotonic()
+                    await _record(run_store.add_leads, run_id, rows, progress)
+            elif ev["event"] == "summary":
+                await _record(run_store.finish_run, run_id, {k: v for k, v in ev.items() if k != "event"})
+            yield ev
+    except Exception as e:
+        if pending:
+            await _record(run_store.add_leads, run_id, pending, progress)
+        await _record(run_store.fail_run, run_id, f"{type(e).__name__}: {e}")
+        raise
+    except BaseException:
+        # cancelled or consumer gone: no awaiting here, quick synchronous writes
         try:
-            project_profile = await build_project_profile(
-                req.reference_company_url,
-                req.api_keys,
-                force_refresh=req.force_refresh_profile,
-            )
+            if pending:
+                run_store.add_leads(run_id, pending, progress)
+            run_store.fail_run(run_id, "interrupted")
         except Exception:
-            project_profile = None
-
-    candidates = await discover_candidates(
-        focus=focus,
-        industry=req.industry,
-        geo=req.geography,
-        segment=req.segment,
-        limit=req.limit,
-        api_keys=req.api_keys,
-        preset=preset_cfg,
-    )
-    companies = await enrich_candidates(candidates)
-
-    pairs = await identify_for_companies(companies)
-    leads: List[LeadRecord] = []
-    for comp, dm in pairs:
-        est, rationale = estimate_budget(comp, project_profile=project_profile, preset=preset_cfg)
-        comp.evidences = (comp.evidences or []) + [
-            Evidence(title="budget_estimate", url=comp.website, snippet=rationale, source="heuristic")
+            pass
+        raise
+
+async def _pipeline_events(req: RunRequest, focus: FocusConfig, run_id: str, resuming: bool) -> AsyncIterator[Dict[str, Any]]:
+    ck = RunCheckpoints(run_id, settings.RUN_CHECKPOINTS)
+    try:
+        restored = await ck.load() if resuming else 0
+        preset_cfg = load_preset(req.preset)
+        yield {"event": "start", "run_id": run_id, "preset": (preset_cfg.id if preset_cfg else None), "checkpoints": restored}
+
+        project_profile = None
+        if getattr(req, "enable_project_profile", True) and req.reference_company_url:
+            saved = ck.get("project_profile")
+            if saved is not None:
+                project_profile = ProjectProfile.model_validate_json(saved) if saved != "null" else None
+            else:
+                try:
+                    project_profile = await build_project_profile(
+                        req.reference_company_url,
+                        req.api_keys,
+                        force_refresh=req.force_refresh_profile,
+                    )
+                except Exception:
+                    project_profile = None
+                await ck.save("project_profile", 0, project_profile.model_dump_json() if project_profile else "null", flush=True)
+            yield {"event": "stage", "stage": "project_profile", "status": "done", "found": project_profile is not None}
+
+        saved = ck.get("discover")
+        if saved is not None:
+            candidates = [CompanyCandidate.model_validate(c) for c in json.loads(saved)]
+        else:
+            candidates = await discover_candidates(
+                focus=focus,
+                industry=req.industry,
+                geo=req.geography,
+                segment=req.segment,
+                limit=req.limit,
+                api_keys=req.api_keys,
+                preset=preset_cfg,
+                force_refresh=req.force_refresh_search,
+            )
+            await ck.save("discover", 0, json.dumps([c.model_dump(mode="json") for c in candidates], ensure_ascii=False), flush=True)
+        yield {"event": "stage", "stage": "discover", "status": "done", "count": len(candidates)}
+
+        domain_limits = KeyedSemaphore(settings.ENRICH_PER_DOMAIN_CONCURRENCY)
+        verifier = LeadVerifier(req.api_keys)
+
+        # items are (discover index, value); a step already checkpointed for that index is not redone
+        async def enrich(item: Tuple[int, CompanyCandidate]) -> Tuple[int, CompanyProfile]:
+            i, cand = item
+            saved = ck.get("enrich", i)
+            if saved is not None:
+                return i, CompanyProfile.model_validate_json(saved)
+            comp = await enrich_company(cand, domain_limits)
+            await ck.save("enrich", i, comp.model_dump_json())
+            return i, comp
+
+        async def identify(item: Tuple[int, CompanyProfile]) -> Tuple[int, Tuple[CompanyProfile, Optional[DecisionMaker]]]:
+            i, comp = item
+            saved = ck.get("identify", i)
+            if saved is not None:
+                return i, (comp, DecisionMaker.model_validate_json(saved) if saved != "null" else None)
+            dm = await identify_decision_maker(comp)
+            await ck.save("identify", i, dm.model_dump_json() if dm else "null")
+            return i, (comp, dm)
+
+        async def budget(item: Tuple[int, Tuple[CompanyProfile, Optional[DecisionMaker]]]) -> Tuple[int, LeadRecord]:
+            i, (comp, dm) = item
+            return i, _budget_lead(comp, dm, req, project_profile, preset_cfg)
+
+        async def verify(item: Tuple[int, LeadRecord]) -> Tuple[int, LeadRecord]:
+            i, lead = item
+            saved = ck.get("verify", i)
+            if saved is not None:
+                return i, LeadRecord.model_validate_json(saved)
+            lead = await verifier.verify(lead)
+            await ck.save("verify", i, lead.model_dump_json())
+            return i, lead
+
+        async def score(item: Tuple[int, LeadRecord]) -> LeadRecord:
+            return score_leads([item[1]], focus, project_profile=project_profile, preset=preset_cfg)[0]
+
+        stages = [
+            Stage("enrich", enrich, settings.ENRICH_CONCURRENCY),
+            Stage("identify", identify, settings.IDENTIFY_CONCURRENCY),
+            Stage("budget", budget),
+            Stage("verify", verify, settings.VERIFY_CONCURRENCY),
+            Stage("score", score),
         ]
-        leads.append(LeadRecord(
-            company=comp,
-            decision_maker=dm,
-            verified_email=None,
-            contact_source=None,
-            estimated_budget_eur=est,
-            investment_window_months=req.investment_window_months,
-            score=0,
-            score_class="cold",
-            status="nuovo",
-        ))
-
-    leads = await verify_leads(leads, api_keys=req.api_keys)
-    leads = score_leads(leads, focus, project_profile=project_profile, preset=preset_cfg)
-
-    export_info = {"file_format": "xlsx", "download_url": "/export/download"}
-
-    drafts = []
-    if req.include_email_drafts:
-        drafts = await generate_email_drafts(leads, api_keys=req.api_keys, project_profile=project_profile, preset=preset_cfg)
+        leads: List[Optional[LeadRecord]] = [None] * len(candidates)
+        done = 0
+        flow = run_stages(list(enumerate(candidates)), stages, settings.PIPELINE_QUEUE_SIZE)
+        try:
+            async for i, lead in flow:
+                leads[i] = lead
+                done += 1
+                yield {"event": "lead", "index": i, "done": done, "total": len(candidates), "lead": lead}
+                await ck.maybe_flush()
+        finally:
+            await flow.aclose()  # consumer gone: stop the workers now, not at garbage collection
+        yield {"event": "stage", "stage": "leads", "status": "done", "count": len(leads)}
+
+        export_info = {"file_format": "xlsx", "download_url": f"/runs/{run_id}/export?file_format=xlsx"}
+
+        drafts = []
+        if req.include_email_drafts:
+            drafts = await generate_email_drafts(leads, api_keys=req.api_keys, project_profile=project_profile, preset=preset_cfg)
+            yield {"event": "stage", "stage": "email_drafts", "status": "done", "count": len(drafts)}
+
+        await ck.clear()  # complete: nothing left to resume
+
+        by_class: Dict[str, int] = {}
+        for lead in leads:
+            by_class[lead.score_class] = by_class.get(lead.score_class, 0) + 1
+        yield {
+            "event": "summary",
+            "run_id": run_id,
+            "preset": (preset_cfg.id if preset_cfg else None),
+            "project_profile": project_profile,
+            "leads": len(leads),
+            "by_class": by_class,
+            "export": export_info,
+            "email_drafts": drafts,
+        }
+    finally:
+        ck.flush_now()  # whatever is still buffered when the run ends or stops
+
+async def run_pipeline(req: RunRequest, focus: FocusConfig, run_id: Optional[str] = None) -> Dict[str, Any]:
+    leads: List[Tuple[int, LeadRecord]] = []
+    summary: Dict[str, Any] = {}
+    async for ev in stream_pipeline(req, focus, run_id=run_id):
+        if ev["event"] == "lead":
+            leads.append((ev["index"], ev["lead"]))
+        elif ev["event"] == "summary":
+            summary = ev
 
     return {
-        "run_id": run_id,
-        "preset": (preset_cfg.id if preset_cfg else None),
-        "project_profile": project_profile,
-        "leads": leads,
-        "export": export_info,
-        "email_drafts": drafts,
+        "run_id": summary["run_id"],
+        "preset": summary["preset"],
+        "project_profile": summary["project_profile"],
+        "leads": [lead for _, lead in sorted(leads, key=lambda x: x[0])],
+        "export": summary["export"],
+        "email_drafts": summary["email_drafts"],
     }
@@ -1,14 +1,14 @@
 from __future__ import annotations
 from typing import List, Optional, Tuple
-import re
 import json
-import httpx
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
 from ..models import ProjectProfile, ApiKeys
-from ..profile_cache import get_profile, set_profile, purge_expired, delete_profile
+from ..profile_cache import PROFILE_CACHE
 from ..settings import settings
+from ..utils.http import request
+from ..utils.html_page import ParsedPage
+from ..utils.keyword_match import get_matcher
 
 KEY_PAGES_HINTS = [
     "servizi","service","solutions","soluzioni","impianti","videosorveglianza","sicurezza",
@@ -22,30 +22,18 @@ def _same_domain(a: str, b: str) -> bool:
     except Exception:
         return False
 
-def _clean_text(html: str) -> str:
-    # Use stdlib parser to avoid heavy lxml dependency (Vercel-friendly)
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script","style","noscript"]):
-        tag.decompose()
-    text = soup.get_text("\n")
-    text = re.sub(r"\n{2,}", "\n\n", text)
-    return text.strip()
-
 async def _fetch(url: str) -> str:
-    async with httpx.AsyncClient(timeout=45, follow_redirects=True) as client:
-        r = await client.get(url, headers={"User-Agent": "lead-scouting-agent/1.0"})
-        r.raise_for_status()
-        return r.text
+    r = await request("GET", url, timeout=45, follow_redirects=True)
+    r.raise_for_status()
+    return r.text
 
-def _pick_links(base_url: str, html: str, limit: int = 8) -> List[str]:
-    soup = BeautifulSoup(html, "html.parser")
+def _pick_links(base_url: str, page: ParsedPage, limit: int = 8) -> List[str]:
     links = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
+    for href, anchor in page.links:
         u = urljoin(base_url, href)
         if not _same_domain(u, base_url):
             continue
-        txt = (a.get_text(" ") or "").strip().lower()
+        txt = anchor.strip().lower()
         href_l = href.lower()
         if any(k in txt or k in href_l for k in KEY_PAGES_HINTS):
             links.append(u)
@@ -57,20 +45,25 @@ def _pick_links(base_url: str, html: str, limit: int = 8) -> List[str]:
             break
     return out
 
+SERVICE_KEYWORDS = ["videosorveglianza","antintrusione","cctv","controllo accessi","impianti","sicurezza","manutenzione","assistenza","progettazione","installazione","cablaggio","rete","network","wi-fi","cyber","firewall","server","voip","tvcc"]
+TECH_KEYWORDS = ["siem","soc","iso","onvif","rtsp","poe","vms","cloud","azure","aws","vmware","fortinet","cisco","mikrotik","sap","erp","wms","mes"]
+INDUSTRY_KEYWORDS = ["automotive","logistica","retail","industria","produzione","hospitality","sanità","energia","pubblica amministrazione","pa"]
+PROOF_KEYWORDS = ["case","studio","cliente","referenza","partner","certificazione","progetto","installato","realizzato"]
+
+# flattened keyword -> bucket index (services, tech, industries, proof)
+_LIST_KEYWORDS = tuple(k for kws in (SERVICE_KEYWORDS, TECH_KEYWORDS, INDUSTRY_KEYWORDS, PROOF_KEYWORDS) for k in kws)
+_LIST_BUCKET = [b for b, kws in enumerate((SERVICE_KEYWORDS, TECH_KEYWORDS, INDUSTRY_KEYWORDS, PROOF_KEYWORDS)) for _ in kws]
+
 def _extract_lists(text: str) -> Tuple[List[str], List[str], List[str], List[str]]:
     lines = [l.strip(" -•\t") for l in text.splitlines() if l.strip()]
     candidates = [l for l in lines if 3 <= len(l) <= 90]
     services, tech, industries, proof = [], [], [], []
-    for c in candidates:
-        cl = c.lower()
-        if any(k in cl for k in ["videosorveglianza","antintrusione","cctv","controllo accessi","impianti","sicurezza","manutenzione","assistenza","progettazione","installazione","cablaggio","rete","network","wi-fi","cyber","firewall","server","voip","tvcc"]):
-            services.append(c)
-        if any(k in cl for k in ["siem","soc","iso","onvif","rtsp","poe","vms","cloud","azure","aws","vmware","fortinet","cisco","mikrotik","sap","erp","wms","mes"]):
-            tech.append(c)
-        if any(k in cl for k in ["automotive","logistica","retail","industria","produzione","hospitality","sanità","energia","pubblica amministrazione","pa"]):
-            industries.append(c)
-        if any(k in cl for k in ["case","studio","cliente","referenza","partner","certificazione","progetto","installato","realizzato"]):
-            proof.append(c)
+    buckets = (services, tech, industries, proof)
+    # one literal scan over all lines for the four keyword lists
+    hits = get_matcher(_LIST_KEYWORDS, flags=0, literal=True).by_line([c.lower() for c in candidates])
+    for c, rules in zip(candidates, hits):
+        for bucket in sorted({_LIST_BUCKET[r] for r in rules}):
+            buckets[bucket].append(c)
     def dedup(xs, n):
         out=[]; seen=set()
         for x in xs:
@@ -126,10 +119,9 @@ async def _llm_profile(text: str, keys: Optional[ApiKeys]) -> Optional[ProjectPr
                     {"role":"user","content": prompt + "\n\nTESTO:\n" + content}
                 ]
             }
-            async with httpx.AsyncClient(timeout=60) as client:
-                r = await client.post(url, headers=headers, json=payload)
-                r.raise_for_status()
-                data = r.json()
+            r = await request("POST", url, headers=headers, json=payload)
+            r.raise_for_status()
+            data = r.json()
             txt = data["choices"][0]["message"]["content"]
             obj = json.loads(txt)
             return ProjectProfile(reference_url="", **obj)
@@ -150,10 +142,9 @@ async def _llm_profile(text: str, keys: Optional[ApiKeys]) -> Optional[ProjectPr
                     {"role":"user","content": prompt + "\n\nTEXT:\n" + content}
                 ]
             }
-            async with httpx.AsyncClient(timeout=60) as client:
-                r = await client.post(url, headers=headers, json=payload)
-                r.raise_for_status()
-                data = r.json()
+            r = await request("POST", url, headers=headers, json=payload)
+            r.raise_for_status()
+            data = r.json()
             txt = data["choices"][0]["message"]["content"]
             obj = json.loads(txt)
             return ProjectProfile(reference_url="", **obj)
@@ -163,23 +154,23 @@ async def _llm_profile(text: str, keys: Optional[ApiKeys]) -> Optional[ProjectPr
     return None
 
 async def build_project_profile(reference_url: str, keys: Optional[ApiKeys] = None, force_refresh: bool = False) -> ProjectProfile:
-    # Cache TTL: ~6 mesi (183 giorni). Purge automatica ad ogni chiamata.
-    purge_expired()
+    # Cache TTL: ~6 mesi (183 giorni). Purge automatica, al massimo una volta ogni PROFILE_CACHE_PURGE_INTERVAL_SECONDS.
+    await PROFILE_CACHE.amaybe_purge()
     if force_refresh:
-        delete_profile(reference_url)
-    cached = get_profile(reference_url)
+        await PROFILE_CACHE.adelete(reference_url)
+    cached = await PROFILE_CACHE.aget(reference_url)
     if (not force_refresh) and cached.hit and cached.value:
         try:
             return ProjectProfile(**cached.value)
         except Exception:
             pass
-    home_html = await _fetch(reference_url)
-    links = _pick_links(reference_url, home_html, limit=8)
+    home = ParsedPage.parse(await _fetch(reference_url))
+    links = _pick_links(reference_url, home, limit=8)
 
-    pages = [_clean_text(home_html)]
+    pages = [home.text]
     for u in links:
         try:
-            pages.append(_clean_text(await _fetch(u)))
+            pages.append(ParsedPage.parse(await _fetch(u)).text)
         except Exception:
             continue
 
@@ -188,7 +179,7 @@ async def build_project_profile(reference_url: str, keys: Optional[ApiKeys] = No
     llm_prof = await _llm_profile(combined, keys)
     if llm_prof:
         llm_prof.reference_url = reference_url
-        set_profile(reference_url, llm_prof.model_dump())
+        await PROFILE_CACHE.aset(reference_url, llm_prof.model_dump())
         return llm_prof
 
     services, industries, tech, proof = _extract_lists(combined)
@@ -204,5 +195,5 @@ async def build_project_profile(reference_url: str, keys: Optional[ApiKeys] = No
         notes="profilo estratto via euristiche (nessun LLM disponibile)",
     )
 
-    set_profile(reference_url, prof.model_dump())
+    await PROFILE_CACHE.aset(reference_url, prof.model_dump())
     return prof
@@ -5,6 +5,7 @@ from ..providers.search_base import SearchProvider
 from ..providers.serper import SerperProvider
 from ..providers.newsapi import NewsAPIProvider
 from ..providers.perplexity_search import PerplexitySearchProvider
+from ..providers.search_cache import CachedSearchProvider
 from ..providers.email_verify import HunterClient, GenericVerifier
 from ..models import ApiKeys
 
@@ -14,7 +15,11 @@ def _pick(keys: Optional[ApiKeys], attr: str, fallback: Optional[str]) -> Option
 def _pref(keys: Optional[ApiKeys]) -> str:
     return (_pick(keys, "web_provider", None) or "auto").strip().lower()
 
-def get_search_provider(keys: Optional[ApiKeys] = None) -> SearchProvider:
+def get_search_provider(keys: Optional[ApiKeys] = None, force_refresh: bool = False) -> SearchProvider:
+    """Configured search provider behind the shared search-result cache."""
+    return CachedSearchProvider(_select_search_provider(keys), force_refresh=force_refresh)
+
+def _select_search_provider(keys: Optional[ApiKeys] = None) -> SearchProvider:
     pref = _pref(keys)
     serper = _pick(keys, "serper_api_key", settings.SERPER_API_KEY)
     newsapi = _pick(keys, "newsapi_key", settings.NEWSAPI_KEY)
@@ -37,8 +42,8 @@ def get_search_provider(keys: Optional[ApiKeys] = None) -> SearchProvider:
 
     raise RuntimeError("No search provider configured. Provide SERPER_API_KEY or PERPLEXITY_API_KEY (or pass api_keys.* in request).")
 
-def get_news_provider(keys: Optional[ApiKeys] = None) -> SearchProvider:
-    return get_search_provider(keys)
+def get_news_provider(keys: Optional[ApiKeys] = None, force_refresh: bool = False) -> SearchProvider:
+    return get_search_provider(keys, force_refresh=force_refresh)
 
 def get_hunter_client(keys: Optional[ApiKeys] = None) -> Optional[HunterClient]:
     hunter = _pick(keys, "hunter_api_key", settings.HUNTER_API_KEY)
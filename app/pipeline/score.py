@@ -2,6 +2,9 @@ from __future__ import annotations
 from typing import List, Dict
 from ..models import LeadRecord
 from ..config_loader import FocusConfig
+from . import score_batch
+
+BATCH_MIN_LEADS = 256  # below this the per-lead loop is as fast as the array setup
 
 def _clamp(x: float, a: float, b: float) -> float:
     return max(a, min(b, x))
@@ -12,10 +15,7 @@ def classify(score: int, classes: Dict[str, tuple[int, int]]) -> str:
             return name
     return "cold"
 
-def score_leads(leads: List[LeadRecord], focus: FocusConfig, project_profile=None, preset=None) -> List[LeadRecord]:
-    w = focus.scoring_weights
-    classes = focus.score_classes
-
+def _reference_keywords(project_profile=None, preset=None) -> set:
     # Reference keywords from Project Profile + Preset
     ref_kw = set()
     if project_profile:
@@ -32,6 +32,16 @@ def score_leads(leads: List[LeadRecord], focus: FocusConfig, project_profile=Non
         for s in preset.portfolio_keywords:
             if isinstance(s, str) and s.strip():
                 ref_kw.add(s.lower())
+    return ref_kw
+
+def score_leads(leads: List[LeadRecord], focus: FocusConfig, project_profile=None, preset=None) -> List[LeadRecord]:
+    w = focus.scoring_weights
+    classes = focus.score_classes
+    ref_kw = _reference_keywords(project_profile, preset)
+
+    # Large lists (imports, rescoring): same scores computed on NumPy arrays, when installed
+    if score_batch.HAS_NUMPY and len(leads) >= BATCH_MIN_LEADS:
+        return score_batch.score_leads_batch(leads, focus, ref_kw)
 
     for lead in leads:
         fit_settore = 0
@@ -0,0 +1,132 @@
+"""Columnar scoring for large lead lists (NumPy, optional).
+
+Same rules as score.score_leads, computed on arrays: the features are read from the
+leads once (extract_features), then the five components and the class of every lead
+come out of a few vectorized operations (score_features), for any weights. Without
+NumPy score_leads keeps scoring lead by lead.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, List, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional (requirements-extra.txt), not in the Vercel bundle
+    np = None
+
+from ..config_loader import FocusConfig
+
+HAS_NUMPY = np is not None
+
+
+@dataclass
+class LeadFeatures:
+    """What scoring looks at, one array entry per lead."""
+
+    has_industry: Any  # bool
+    has_budget: Any  # bool
+    budget: Any  # float64
+    has_window: Any  # bool
+    window_lo: Any  # int64
+    window_hi: Any  # int64
+    evidences: Any  # int64
+    services: Any  # int64
+    overlap: Any  # int64, keywords shared with the reference (0 without reference keywords)
+    has_reference: bool
+
+
+def _company_keywords(c) -> Set[str]:
+    kw = set()
+    for s in (c.services_products or []):
+        if isinstance(s, str) and s.strip():
+            kw.add(s.lower())
+    for s in (c.technologies or []):
+        if isinstance(s, str) and s.strip():
+            kw.add(s.lower())
+    if c.industry:
+        kw.add(str(c.industry).lower())
+    return kw
+
+
+def extract_features(leads: List[Any], ref_kw: Set[str]) -> LeadFeatures:
+    """One pass over the leads; everything after this is array arithmetic."""
+    n = len(leads)
+    has_industry = np.zeros(n, dtype=bool)
+    has_budget = np.zeros(n, dtype=bool)
+    budget = np.zeros(n, dtype=np.float64)
+    has_window = np.zeros(n, dtype=bool)
+    window_lo = np.zeros(n, dtype=np.int64)
+    window_hi = np.zeros(n, dtype=np.int64)
+    evidences = np.zeros(n, dtype=np.int64)
+    services = np.zeros(n, dtype=np.int64)
+    overlap = np.zeros(n, dtype=np.int64)
+    for i, lead in enumerate(leads):
+        c = lead.company
+        if c.industry:
+            has_industry[i] = True
+        if lead.estimated_budget_eur:
+            has_budget[i] = True
+            budget[i] = lead.estimated_budget_eur
+        if lead.investment_window_months:
+            has_window[i] = True
+            window_lo[i] = min(lead.investment_window_months)
+            window_hi[i] = max(lead.investment_window_months)
+        evidences[i] = len(c.evidences or [])
+        services[i] = len(c.services_products or [])
+        if ref_kw:
+            overlap[i] = len(ref_kw.intersection(_company_keywords(c)))
+    return LeadFeatures(has_industry, has_budget, budget, has_window, window_lo, window_hi, evidences, services, overlap, bool(ref_kw))
+
+
+def score_features(f: LeadFeatures, focus: FocusConfig) -> Tuple[Any, Any, List[str]]:
+    """(scores, class codes, class names): names[codes[i]] is the class of lead i."""
+    w = focus.scoring_weights
+    w_fit = w.get("fit_settore", 25)
+    w_budget = w.get("capacita_budget", 25)
+    w_timing = w.get("timing_investimento", 25)
+    w_growth = w.get("segnali_crescita", 15)
+    w_align = w.get("allineamento_referenze", 10)
+
+    # Each component as in score_leads (same int() truncations), in float64: the sums and the
+    # final truncation give the same integers as the per-lead code
+    fit = np.where(f.has_industry, float(w_fit), 0.0)
+
+    capacity = np.select(
+        [~f.has_budget, f.budget >= 100000, f.budget >= focus.budget_target, f.budget >= focus.budget_min],
+        [float(int(w_budget * 0.5)), float(w_budget), float(w_budget), float(int(w_budget * 0.7))],
+        default=float(int(w_budget * 0.3)),
+    )
+
+    in_window = f.has_window & (f.window_lo <= 6) & (f.window_hi >= 4)
+    timing = np.where(in_window, float(w_timing), float(int(w_timing * 0.5)))
+
+    growth = np.trunc(np.minimum(f.evidences / 5.0, 1.0) * w_growth)
+
+    align = np.trunc(np.minimum(np.minimum(f.services, 10) / 10.0, 1.0) * w_align)
+    if f.has_reference:
+        align = np.select(
+            [f.overlap >= 6, f.overlap >= 3, f.overlap >= 1],
+            [float(w_align), np.maximum(align, int(w_align * 0.7)), np.maximum(align, int(w_align * 0.4))],
+            default=align,
+        )
+
+    total = fit + capacity + timing + growth + align
+    scores = np.trunc(np.clip(total, 0, 100)).astype(np.int64)
+
+    # classify(): the first class whose range holds the score, else "cold"
+    names = list(focus.score_classes) + ["cold"]
+    codes = np.full(len(scores), len(names) - 1, dtype=np.int64)
+    for code in range(len(names) - 2, -1, -1):
+        lo, hi = focus.score_classes[names[code]]
+        codes = np.where((scores >= lo) & (scores <= hi), code, codes)
+    return scores, codes, names
+
+
+def score_leads_batch(leads: List[Any], focus: FocusConfig, ref_kw: Set[str]) -> List[Any]:
+    """score_leads on arrays: sets score and score_class on each lead, same values."""
+    scores, codes, names = score_features(extract_features(leads, ref_kw), focus)
+    for lead, score, code in zip(leads, scores.tolist(), codes.tolist()):
+        lead.score = score
+        lead.score_class = names[code]
+    return leads
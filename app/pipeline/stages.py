@@ -0,0 +1,58 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Sequence, Tuple
+import asyncio
+
+_FAILED = object()  # (index, _FAILED, exc) on the output queue: a worker raised
+
+
+@dataclass
+class Stage:
+    """One pipeline step: `workers` tasks apply `fn` to items coming from the previous stage."""
+
+    name: str
+    fn: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+
+
+async def run_stages(items: Sequence[Any], stages: List[Stage], queue_size: int = 16) -> AsyncIterator[Tuple[int, Any]]:
+    """Stream every item through `stages`, yielding (index, result) as each one comes out.
+
+    Stages are connected by bounded queues, so a slow stage holds back the ones
+    before it (backpressure) while the items already past it keep flowing; each item
+    moves on as soon as its own step is done, there is no barrier between stages.
+    Results come out in completion order. If a step raises, the exception is raised
+    here and all the other work is cancelled (also when the consumer stops early).
+    """
+    queues = [asyncio.Queue(maxsize=max(1, queue_size)) for _ in stages]
+    out: asyncio.Queue = asyncio.Queue()
+
+    async def feed() -> None:
+        for i, item in enumerate(items):
+            await queues[0].put((i, item))
+
+    async def work(k: int) -> None:
+        stage = stages[k]
+        nxt = queues[k + 1] if k + 1 < len(stages) else out
+        while True:
+            i, item = await queues[k].get()
+            try:
+                result = await stage.fn(item)
+            except Exception as e:
+                await out.put((i, _FAILED, e))
+                continue
+            await nxt.put((i, result))
+
+    tasks = [asyncio.ensure_future(feed())]
+    for k, stage in enumerate(stages):
+        tasks += [asyncio.ensure_future(work(k)) for _ in range(max(1, stage.workers))]
+    try:
+        for _ in range(len(items)):
+            got = await out.get()
+            if got[1] is _FAILED:
+                raise got[2]
+            yield got
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
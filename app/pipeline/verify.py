@@ -1,10 +1,14 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
 import re
 
+from .. import email_patterns, verify_cache
 from ..models import LeadRecord, VerifiedEmail
 from ..utils.url import domain_from_url
-from ..utils.email_dns import has_mx
+from ..utils.email_dns import resolve_mx, resolve_mx_many
+from ..utils.limits import gather_limited
+from ..settings import settings
 from .providers_factory import get_hunter_client, get_generic_verifier
 
 COMMON_PATTERNS = [
@@ -24,60 +28,171 @@ def _split_name(full_name: str) -> tuple[Optional[str], Optional[str]]:
     last = re.sub(r"[^a-zA-ZÀ-ÖØ-öø-ÿ]", "", parts[-1]).lower()
     return first, last
 
-async def verify_leads(leads: List[LeadRecord], api_keys=None) -> List[LeadRecord]:
-    hunter = get_hunter_client(api_keys)
-    verifier = get_generic_verifier(api_keys)
-
-    for lead in leads:
-        dom = domain_from_url(lead.company.website)
-        if not dom:
-            continue
-
-        # 1) Basic MX check
-        mx_ok, mx_info = has_mx(dom)
-        if not mx_ok:
-            lead.verified_email = VerifiedEmail(email="", status="invalid", source="mx", details={"mx": mx_info})
-            continue
-
-        # 2) If Hunter is available, try domain search for relevant emails
-        if hunter:
-            try:
-                emails = await hunter.domain_search(dom, limit=10)
-                # pick best match for role/name if possible
-                if emails:
-                    # Prefer seniority if present; else first
-                    chosen = emails[0]
-                    email = chosen.get("value") or ""
-                    # verify via hunter
-                    v = await hunter.verify(email)
-                    status = ((v.get("data") or {}).get("status")) or "unknown"
-                    # Map to our statuses
-                    mapped = "valid" if status in ("valid","accept_all") else ("invalid" if status in ("invalid","reject") else "unknown")
-                    lead.verified_email = VerifiedEmail(email=email, status=mapped, source="hunter", details={"hunter": v})
-                    lead.contact_source = "hunter"
-                    continue
-            except Exception:
-                pass
-
-        # 3) Pattern generation + optional verifier
-        if lead.decision_maker and lead.decision_maker.name and lead.decision_maker.name != "N/D":
-            first, last = _split_name(lead.decision_maker.name)
-            if first and last:
-                guesses = [p.format(first=first, last=last, f=first[:1], domain=dom) for p in COMMON_PATTERNS]
-                # de-dup
-                guesses = list(dict.fromkeys(guesses))[:5]
-                # verify guesses if verifier available
-                if verifier:
-                    for g in guesses:
-                        res = await verifier.verify(g)
-                        status = res.get("status","unknown")
-                        mapped = "valid" if status in ("valid","deliverable") else ("invalid" if status in ("invalid","undeliverable") else "unknown")
-                        if mapped == "valid":
-                            lead.verified_email = VerifiedEmail(email=g, status="valid", source="verifier", details=res)
-                            lead.contact_source = "pattern+verifier"
-                            break
-                if not lead.verified_email:
-                    lead.verified_email = VerifiedEmail(email=guesses[0], status="unknown", source="pattern", details={"mx": mx_info, "guesses": guesses})
-                    lead.contact_source = "pattern"
-
-    return leads
+def _hunter_status(v: Dict[str, Any]) -> str:
+    status = ((v.get("data") or {}).get("status")) or "unknown"
+    # Map to our statuses
+    return "valid" if status in ("valid","accept_all") else ("invalid" if status in ("invalid","reject") else "unknown")
+
+def _verifier_status(res: Dict[str, Any]) -> str:
+    status = res.get("status","unknown")
+    return "valid" if status in ("valid","deliverable") else ("invalid" if status in ("invalid","undeliverable") else "unknown")
+
+# Verifier statuses meaning "the domain accepts any address"
+CATCH_ALL_STATUSES = ("accept_all", "catch-all", "catch_all", "catchall")
+
+# Provider calls with pattern learning on each fresh answer (cached answers were learned already)
+async def _hunter_domain_search(hunter, dom: str) -> Dict[str, Any]:
+    data = await hunter.domain_search_data(dom, limit=10)
+    if email_patterns.ENABLED:
+        await asyncio.to_thread(email_patterns.learn_from_hunter, dom, data)
+    return data
+
+async def _hunter_verify(hunter, email: str) -> Dict[str, Any]:
+    v = await hunter.verify(email)
+    if email_patterns.ENABLED and ((v.get("data") or {}).get("status")) == "accept_all":
+        await asyncio.to_thread(email_patterns.set_accept_all, email.split("@")[-1], True)
+    return v
+
+async def _verify_guess(verifier, email: str, first: str, last: str) -> Dict[str, Any]:
+    # EMAIL_VERIFY_MAX_QPS: one process-wide bucket per provider, only for calls that reach it (cache misses)
+    limiter = getattr(verifier, "limiter", None)
+    if limiter is not None:
+        await limiter().acquire()
+    res = await verifier.verify(email)
+    if email_patterns.ENABLED:
+        if _verifier_status(res) == "valid":
+            await asyncio.to_thread(email_patterns.learn_from_emails, [(email, first, last)], "verifier")
+        elif str(res.get("status", "")).lower() in CATCH_ALL_STATUSES:
+            await asyncio.to_thread(email_patterns.set_accept_all, email.split("@")[-1], True)
+    return res
+
+class VerifyCalls:
+    """Paid provider calls of one verification run: answered from the verification cache when
+    possible, and a (kind, key) asked by several leads at once (same domain) is called once."""
+
+    def __init__(self, use_cache: bool = verify_cache.ENABLED):
+        self.use_cache = use_cache
+        self._calls: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def get(self, kind: str, key: str, call: Callable[[], Awaitable[Any]], status_of: Callable[[Any], str]) -> Any:
+        k = (kind, key.lower())
+        fut = self._calls.get(k)
+        if fut is None:
+            fut = self._calls[k] = asyncio.ensure_future(self._load(kind, key, call, status_of))
+        return await asyncio.shield(fut)
+
+    async def _load(self, kind: str, key: str, call: Callable[[], Awaitable[Any]], status_of: Callable[[Any], str]) -> Any:
+        if self.use_cache:
+            hit = await asyncio.to_thread(verify_cache.get_result, kind, key)
+            if hit is not None:
+                return hit
+        value = await call()  # failures are not cached
+        if self.use_cache:
+            await asyncio.to_thread(verify_cache.set_result, kind, key, status_of(value), value)
+        return value
+
+async def verify_lead(lead: LeadRecord, mx: Tuple[bool, str], hunter=None, verifier=None, calls: Optional[VerifyCalls] = None) -> LeadRecord:
+    """Verify one lead in place; `mx` is the (ok, info) MX answer for its domain."""
+    calls = calls or VerifyCalls()
+    dom = domain_from_url(lead.company.website)
+    if not dom:
+        return lead
+
+    # 1) Basic MX check
+    mx_ok, mx_info = mx
+    if not mx_ok:
+        lead.verified_email = VerifiedEmail(email="", status="invalid", source="mx", details={"mx": mx_info})
+        return lead
+
+    # 2) If Hunter is available, try domain search for relevant emails
+    if hunter:
+        try:
+            data = await calls.get(
+                verify_cache.HUNTER_DOMAIN_SEARCH, dom,
+                lambda: _hunter_domain_search(hunter, dom),
+                lambda d: "valid" if d.get("emails") else "unknown",
+            )
+            emails = data.get("emails") or []
+            # pick best match for role/name if possible
+            if emails:
+                # Prefer seniority if present; else first
+                chosen = emails[0]
+                email = chosen.get("value") or ""
+                # verify via hunter
+                v = await calls.get(verify_cache.HUNTER_VERIFY, email, lambda: _hunter_verify(hunter, email), _hunter_status)
+                mapped = _hunter_status(v)
+                lead.verified_email = VerifiedEmail(email=email, status=mapped, source="hunter", details={"hunter": v})
+                lead.contact_source = "hunter"
+                return lead
+        except Exception:
+            pass
+
+    # 3) Pattern generation + optional verifier
+    if lead.decision_maker and lead.decision_maker.name and lead.decision_maker.name != "N/D":
+        first, last = _split_name(lead.decision_maker.name)
+        if first and last:
+            guesses = [p.format(first=first, last=last, f=first[:1], domain=dom) for p in COMMON_PATTERNS]
+            # the pattern this domain is known to use goes first: usually one verification is enough
+            known = await asyncio.to_thread(email_patterns.get_pattern, dom) if email_patterns.ENABLED else None
+            if known and known.pattern:
+                guesses.insert(0, known.email_for(first, last))
+            # de-dup
+            guesses = list(dict.fromkeys(guesses))[:5]
+            details = {"mx": mx_info, "guesses": guesses}
+            if known:
+                details.update(pattern=known.pattern, accept_all=known.accept_all)
+            # verify guesses if verifier available (in order, stop at the first valid one);
+            # on catch-all domains every guess "verifies", so don't pay for it
+            if verifier and not (known and known.accept_all):
+                for g in guesses:
+                    res = await calls.get(
+                        verify_cache.verifier_kind(getattr(verifier, "provider", type(verifier).__name__)), g,
+                        lambda g=g: _verify_guess(verifier, g, first, last),
+                        _verifier_status,
+                    )
+                    if _verifier_status(res) == "valid":
+                        lead.verified_email = VerifiedEmail(email=g, status="valid", source="verifier", details=res)
+                        lead.contact_source = "pattern+verifier"
+                        break
+                    if str(res.get("status", "")).lower() in CATCH_ALL_STATUSES:
+                        details["accept_all"] = True  # the other guesses would "verify" the same way
+                        break
+            if not lead.verified_email:
+                lead.verified_email = VerifiedEmail(email=guesses[0], status="unknown", source="pattern", details=details)
+                lead.contact_source = "pattern"
+    return lead
+
+class LeadVerifier:
+    """Provider clients and call cache of one run, for verifying leads one at a time
+    (streamed runs); MX answers come from the shared, de-duplicated MX cache."""
+
+    def __init__(self, api_keys=None, use_cache: bool = verify_cache.ENABLED):
+        self.hunter = get_hunter_client(api_keys)
+        self.verifier = get_generic_verifier(api_keys)
+        self.calls = VerifyCalls(use_cache)
+
+    async def verify(self, lead: LeadRecord, mx: Optional[Tuple[bool, str]] = None) -> LeadRecord:
+        if mx is None:
+            dom = domain_from_url(lead.company.website)
+            mx = await resolve_mx(dom) if dom else (False, "no domain")
+        return await verify_lead(lead, mx, self.hunter, self.verifier, self.calls)
+
+async def verify_leads(
+    leads: List[LeadRecord],
+    api_keys=None,
+    concurrency: Optional[int] = None,
+    use_cache: bool = verify_cache.ENABLED,
+) -> List[LeadRecord]:
+    """Verify leads concurrently (VERIFY_CONCURRENCY); provider rate limits are enforced by the
+    clients, and the returned list keeps the input order. Provider answers are reused from
+    the verification cache (app/verify_cache.py) while fresh."""
+    lv = LeadVerifier(api_keys, use_cache)
+
+    # one concurrent, cached MX round for all lead domains (never blocks the event loop)
+    mx_by_domain = await resolve_mx_many(domain_from_url(lead.company.website) for lead in leads)
+
+    def _mx(lead: LeadRecord) -> Tuple[bool, str]:
+        return mx_by_domain.get(domain_from_url(lead.company.website) or "", (False, "no domain"))
+
+    limit = concurrency or settings.VERIFY_CONCURRENCY
+    return await gather_limited([lv.verify(lead, _mx(lead)) for lead in leads], limit)
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Tuple
+import asyncio
 import json
 import os
 import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 
 IS_VERCEL = os.getenv("VERCEL") == "1" or bool(os.getenv("VERCEL_ENV"))
 DEFAULT_DB_PATH = os.environ.get("PROFILE_CACHE_DB_PATH") or ("/tmp/profile_cache.sqlite3" if IS_VERCEL else "./data/profile_cache.sqlite3")
 DEFAULT_TTL_DAYS = int(os.environ.get("PROFILE_CACHE_TTL_DAYS", "183"))  # ~6 months
+MEMORY_ENTRIES = int(os.environ.get("PROFILE_CACHE_MEMORY_ENTRIES", "256"))  # in-process LRU in front of SQLite
+PURGE_INTERVAL_SECONDS = int(os.environ.get("PROFILE_CACHE_PURGE_INTERVAL_SECONDS", "3600"))
 
 
 @dataclass
@@ -22,6 +28,10 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
 def _ensure_dir(path: str) -> None:
     d = os.path.dirname(os.path.abspath(path))
     if d and not os.path.exists(d):
@@ -30,7 +40,8 @@ def _ensure_dir(path: str) -> None:
 
 def _connect(path: str) -> sqlite3.Connection:
     _ensure_dir(path)
-    conn = sqlite3.connect(path, timeout=10)
+    # one connection per ProfileCache, used from worker threads under its lock
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
     conn.execute("PRAGMA journal_mode=WAL;")
     conn.execute(
         """CREATE TABLE IF NOT EXISTS project_profiles (
@@ -39,95 +50,226 @@ def _connect(path: str) -> sqlite3.Connection:
             created_at TEXT NOT NULL
         )"""
     )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_project_profiles_created_at ON project_profiles(created_at)")
     return conn
 
 
-def _is_fresh(created_at_iso: str, ttl_days: int) -> bool:
+def _parse_created(created_at_iso: str) -> Optional[datetime]:
     try:
-        created = datetime.fromisoformat(created_at_iso.replace("Z", "+00:00"))
+        return datetime.fromisoformat(created_at_iso.replace("Z", "+00:00"))
     except Exception:
-        return False
-    return created >= (_utcnow() - timedelta(days=ttl_days))
+        return None
 
 
-def get_profile(reference_url: str, db_path: str = DEFAULT_DB_PATH, ttl_days: int = DEFAULT_TTL_DAYS) -> CacheResult:
-    """Return cached profile if present and not older than ttl_days."""
-    try:
-        conn = _connect(db_path)
+def _is_fresh(created_at_iso: str, ttl_days: int) -> bool:
+    created = _parse_created(created_at_iso)
+    return created is not None and created >= (_utcnow() - timedelta(days=ttl_days))
+
+
+class ProfileCache:
+    """Project profiles: in-process LRU over one long-lived SQLite connection.
+
+    Memory hits never touch SQLite. Expired rows are purged at most once per
+    `purge_interval` (maybe_purge), using the index on created_at. The a*
+    coroutines run SQLite work in a thread, so the event loop never blocks on it.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        ttl_days: int = DEFAULT_TTL_DAYS,
+        memory_entries: int = MEMORY_ENTRIES,
+        purge_interval: int = PURGE_INTERVAL_SECONDS,
+    ):
+        self.db_path = db_path
+        self.ttl_days = ttl_days
+        self.memory_entries = max(0, memory_entries)
+        self.purge_interval = purge_interval
+        self._memory: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()  # SQLite connection
+        self._mem_lock = threading.Lock()  # LRU (touched from the loop and from worker threads)
+        self._last_purge = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        # caller holds self._lock
+        if self._conn is None:
+            self._conn = _connect(self.db_path)
+        return self._conn
+
+    def _remember(self, reference_url: str, created_at: str, value: Dict[str, Any]) -> None:
+        if not self.memory_entries:
+            return
+        with self._mem_lock:
+            self._memory[reference_url] = (created_at, value)
+            self._memory.move_to_end(reference_url)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _forget(self, reference_url: Optional[str] = None) -> None:
+        with self._mem_lock:
+            if reference_url is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(reference_url, None)
+
+    def get_memory(self, reference_url: str, ttl_days: Optional[int] = None) -> Optional[CacheResult]:
+        """Memory tier only: a CacheResult on a fresh hit, None when SQLite must be asked."""
+        with self._mem_lock:
+            item = self._memory.get(reference_url)
+            if item is None:
+                return None
+            created_at, value = item
+            if not _is_fresh(created_at, self.ttl_days if ttl_days is None else ttl_days):
+                del self._memory[reference_url]
+                return None
+            self._memory.move_to_end(reference_url)
+        return CacheResult(hit=True, value=dict(value))
+
+    def get(self, reference_url: str, ttl_days: Optional[int] = None) -> CacheResult:
+        """Return cached profile if present and not older than ttl_days."""
+        ttl_days = self.ttl_days if ttl_days is None else ttl_days
+        hit = self.get_memory(reference_url, ttl_days)
+        if hit is not None:
+            return hit
+        try:
+            with self._lock:
+                conn = self._db()
+                row = conn.execute(
+                    "SELECT profile_json, created_at FROM project_profiles WHERE reference_url = ?",
+                    (reference_url,),
+                ).fetchone()
+                if not row:
+                    return CacheResult(hit=False)
+                profile_json, created_at = row
+                if not _is_fresh(created_at, ttl_days):
+                    conn.execute("DELETE FROM project_profiles WHERE reference_url = ?", (reference_url,))
+                    conn.commit()
+                    return CacheResult(hit=False)
+            value = json.loads(profile_json)
+            self._remember(reference_url, created_at, value)
+            return CacheResult(hit=True, value=dict(value))
+        except Exception:
+            return CacheResult(hit=False)
+
+    def set(self, reference_url: str, profile: Dict[str, Any]) -> None:
+        created_at = _iso(_utcnow())
+        self._remember(reference_url, created_at, dict(profile))
         try:
-            row = conn.execute(
-                "SELECT profile_json, created_at FROM project_profiles WHERE reference_url = ?",
-                (reference_url,),
-            ).fetchone()
-            if not row:
-                return CacheResult(hit=False)
-            profile_json, created_at = row
-            if not _is_fresh(created_at, ttl_days):
+            with self._lock:
+                conn = self._db()
+                conn.execute(
+                    "INSERT OR REPLACE INTO project_profiles(reference_url, profile_json, created_at) VALUES (?, ?, ?)",
+                    (reference_url, json.dumps(profile, ensure_ascii=False), created_at),
+                )
+                conn.commit()
+        except Exception:
+            return
+
+    def delete(self, reference_url: str) -> None:
+        self._forget(reference_url)
+        try:
+            with self._lock:
+                conn = self._db()
                 conn.execute("DELETE FROM project_profiles WHERE reference_url = ?", (reference_url,))
                 conn.commit()
-                return CacheResult(hit=False)
-            return CacheResult(hit=True, value=json.loads(profile_json))
-        finally:
-            conn.close()
-    except Exception:
-        return CacheResult(hit=False)
+        except Exception:
+            return
 
+    def purge_expired(self, ttl_days: Optional[int] = None) -> int:
+        """Delete expired cached profiles. Returns number of deleted rows (best effort)."""
+        ttl_days = self.ttl_days if ttl_days is None else ttl_days
+        self._last_purge = time.monotonic()
+        cutoff = _iso(_utcnow() - timedelta(days=ttl_days))
+        with self._mem_lock:
+            for url in [u for u, (created_at, _) in self._memory.items() if created_at < cutoff]:
+                del self._memory[url]
+        try:
+            with self._lock:
+                conn = self._db()
+                n = conn.execute("DELETE FROM project_profiles WHERE created_at < ?", (cutoff,)).rowcount
+                conn.commit()
+                return int(n or 0)
+        except Exception:
+            return 0
 
-def set_profile(reference_url: str, profile: Dict[str, Any], db_path: str = DEFAULT_DB_PATH) -> None:
-    try:
-        conn = _connect(db_path)
+    def purge_due(self) -> bool:
+        return not self._last_purge or time.monotonic() - self._last_purge >= self.purge_interval
+
+    def maybe_purge(self) -> int:
+        """Amortized purge: runs purge_expired at most once per purge_interval."""
+        return self.purge_expired() if self.purge_due() else 0
+
+    def flush(self) -> int:
+        """Delete all cached profiles. Returns number of deleted rows (best effort)."""
+        self._forget()
         try:
-            conn.execute(
-                "INSERT OR REPLACE INTO project_profiles(reference_url, profile_json, created_at) VALUES (?, ?, ?)",
-                (reference_url, json.dumps(profile, ensure_ascii=False), _utcnow().isoformat().replace("+00:00", "Z")),
-            )
-            conn.commit()
-        finally:
-            conn.close()
-    except Exception:
-        return
+            with self._lock:
+                conn = self._db()
+                n = conn.execute("DELETE FROM project_profiles").rowcount
+                conn.commit()
+                return int(n or 0)
+        except Exception:
+            return 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # async API: memory hits answer inline, SQLite work goes to a thread
+    async def aget(self, reference_url: str) -> CacheResult:
+        hit = self.get_memory(reference_url)
+        if hit is not None:
+            return hit
+        return await asyncio.to_thread(self.get, reference_url)
+
+    async def aset(self, reference_url: str, profile: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self.set, reference_url, profile)
+
+    async def adelete(self, reference_url: str) -> None:
+        await asyncio.to_thread(self.delete, reference_url)
+
+    async def amaybe_purge(self) -> int:
+        if not self.purge_due():
+            return 0
+        return await asyncio.to_thread(self.purge_expired)
+
+
+_caches: Dict[str, ProfileCache] = {}
+
+
+def get_cache(db_path: str = DEFAULT_DB_PATH) -> ProfileCache:
+    """Process-wide ProfileCache per database file."""
+    cache = _caches.get(db_path)
+    if cache is None:
+        cache = _caches[db_path] = ProfileCache(db_path)
+    return cache
+
+
+PROFILE_CACHE = get_cache()
+
+
+# Module-level API (kept for existing callers)
+def get_profile(reference_url: str, db_path: str = DEFAULT_DB_PATH, ttl_days: int = DEFAULT_TTL_DAYS) -> CacheResult:
+    """Return cached profile if present and not older than ttl_days."""
+    return get_cache(db_path).get(reference_url, ttl_days)
+
+
+def set_profile(reference_url: str, profile: Dict[str, Any], db_path: str = DEFAULT_DB_PATH) -> None:
+    get_cache(db_path).set(reference_url, profile)
 
 
 def purge_expired(db_path: str = DEFAULT_DB_PATH, ttl_days: int = DEFAULT_TTL_DAYS) -> int:
     """Delete expired cached profiles. Returns number of deleted rows (best effort)."""
-    try:
-        conn = _connect(db_path)
-        try:
-            cutoff = (_utcnow() - timedelta(days=ttl_days)).isoformat().replace("+00:00", "Z")
-            cur = conn.execute("SELECT COUNT(*) FROM project_profiles WHERE created_at < ?", (cutoff,))
-            n = int(cur.fetchone()[0] or 0)
-            conn.execute("DELETE FROM project_profiles WHERE created_at < ?", (cutoff,))
-            conn.commit()
-            return n
-        finally:
-            conn.close()
-    except Exception:
-        return 0
+    return get_cache(db_path).purge_expired(ttl_days)
 
 
 def delete_profile(reference_url: str, db_path: str = DEFAULT_DB_PATH) -> None:
-    try:
-        conn = _connect(db_path)
-        try:
-            conn.execute("DELETE FROM project_profiles WHERE reference_url = ?", (reference_url,))
-            conn.commit()
-        finally:
-            conn.close()
-    except Exception:
-        return
+    get_cache(db_path).delete(reference_url)
 
 
 def flush_cache(db_path: str = DEFAULT_DB_PATH) -> int:
     """Delete all cached profiles. Returns number of deleted rows (best effort)."""
-    try:
-        conn = _connect(db_path)
-        try:
-            cur = conn.execute("SELECT COUNT(*) FROM project_profiles")
-            n = int(cur.fetchone()[0] or 0)
-            conn.execute("DELETE FROM project_profiles")
-            conn.commit()
-            return n
-        finally:
-            conn.close()
-    except Exception:
-        return 0
+    return get_cache(db_path).flush()
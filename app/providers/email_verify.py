@@ -1,39 +1,56 @@
 from __future__ import annotations
-import httpx
 from typing import Dict, Any, Optional, List
 
+from ..settings import settings
+from ..utils.http import request_with_retry
+from ..utils.limits import TokenBucket, rate_limiter
+
 class EmailVerifier:
     async def verify(self, email: str) -> Dict[str, Any]:
         return {"status": "unknown"}
 
 class HunterClient:
     """Hunter.io: domain search (trova email pubbliche) + verification."""
+    # Published per-endpoint limits (requests per second), shared by every client in the process
+    DOMAIN_SEARCH_QPS = 15.0
+    VERIFY_QPS = 10.0
+
     def __init__(self, api_key: str):
         self.api_key = api_key
 
     async def domain_search(self, domain: str, limit: int = 5) -> List[Dict[str, Any]]:
+        data = await self.domain_search_data(domain, limit=limit)
+        return data.get("emails", []) or []
+
+    async def domain_search_data(self, domain: str, limit: int = 5) -> Dict[str, Any]:
+        """Full domain-search `data`: emails plus the domain's `pattern` and `accept_all` flag."""
         url = "https://api.hunter.io/v2/domain-search"
         params = {"domain": domain, "api_key": self.api_key, "limit": limit}
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.get(url, params=params)
-            r.raise_for_status()
-            data = r.json()
-        return (data.get("data") or {}).get("emails", []) or []
+        limiter = rate_limiter("hunter.domain_search", self.DOMAIN_SEARCH_QPS)
+        r = await request_with_retry("GET", url, params=params, limiter=limiter)
+        r.raise_for_status()
+        return r.json().get("data") or {}
 
     async def verify(self, email: str) -> Dict[str, Any]:
         url = "https://api.hunter.io/v2/email-verifier"
         params = {"email": email, "api_key": self.api_key}
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.get(url, params=params)
-            r.raise_for_status()
-            return r.json()
+        limiter = rate_limiter("hunter.verify", self.VERIFY_QPS)
+        r = await request_with_retry("GET", url, params=params, limiter=limiter)
+        r.raise_for_status()
+        return r.json()
 
 class GenericVerifier(EmailVerifier):
     """Adapter generico: implementa qui integrazioni (ZeroBounce/NeverBounce/etc.)."""
     def __init__(self, provider: str, api_key: str):
         self.provider = provider.lower()
         self.api_key = api_key
+        self.max_qps = settings.EMAIL_VERIFY_MAX_QPS
 
     async def verify(self, email: str) -> Dict[str, Any]:
-        # Placeholder: implementa in base al provider scelto
+        # Placeholder: implementa in base al provider scelto, con request_with_retry per i retry.
+        # Il rate limit (self.limiter(), EMAIL_VERIFY_MAX_QPS) lo applica già il chiamante (pipeline/verify.py)
         return {"status": "unknown", "provider": self.provider, "note": "Implementa adapter in app/providers/email_verify.py"}
+
+    def limiter(self) -> TokenBucket:
+        """Process-wide bucket of this provider: at most EMAIL_VERIFY_MAX_QPS calls per second."""
+        return rate_limiter(f"verifier.{self.provider}", self.max_qps)
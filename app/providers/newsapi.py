@@ -1,10 +1,12 @@
 from __future__ import annotations
-import httpx
 from typing import List, Dict, Any
 from .search_base import SearchProvider
+from ..utils.http import request
 
 class NewsAPIProvider(SearchProvider):
     """NewsAPI provider. Note: web_search non supportata; usa news_search."""
+    max_qps = 2.0
+
     def __init__(self, api_key: str):
         self.api_key = api_key
 
@@ -15,10 +17,9 @@ class NewsAPIProvider(SearchProvider):
         url = "https://newsapi.org/v2/everything"
         params = {"q": query, "pageSize": min(num, 100), "language": "it", "sortBy": "publishedAt"}
         headers = {"X-Api-Key": self.api_key}
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.get(url, params=params, headers=headers)
-            r.raise_for_status()
-            data = r.json()
+        r = await request("GET", url, params=params, headers=headers)
+        r.raise_for_status()
+        data = r.json()
         out = []
         for a in data.get("articles", [])[:num]:
             out.append({
@@ -1,7 +1,8 @@
 from __future__ import annotations
-import httpx
 from typing import Dict, Any, Optional
 
+from ..utils.http import request
+
 class OpenCorporatesClient:
     """Enrichment opzionale: cerca azienda per nome e restituisce dati base (se disponibili)."""
     def __init__(self, api_key: str | None = None):
@@ -12,7 +13,6 @@ class OpenCorporatesClient:
         params = {"q": query, "jurisdiction_code": f"{country_code}", "per_page": per_page}
         if self.api_key:
             params["api_token"] = self.api_key
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.get(url, params=params)
-            r.raise_for_status()
-            return r.json()
+        r = await request("GET", url, params=params)
+        r.raise_for_status()
+        return r.json()
@@ -10,9 +10,9 @@ keys like: title, link/url, snippet, date.
 """
 
 from typing import List, Dict, Any, Optional
-import httpx
 
 from .search_base import SearchProvider
+from ..utils.http import request
 
 COUNTRY_MAP = {
     "italia": "IT",
@@ -34,6 +34,8 @@ class PerplexitySearchProvider(SearchProvider):
     We expose both methods and map them to the same underlying search.
     """
 
+    max_qps = 3.0
+
     def __init__(self, api_key: str):
         self.api_key = api_key
 
@@ -59,10 +61,9 @@ class PerplexitySearchProvider(SearchProvider):
         if recency:
             payload["search_recency_filter"] = recency  # day|week|month|year
 
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.post(url, headers=headers, json=payload)
-            r.raise_for_status()
-            data = r.json()
+        r = await request("POST", url, headers=headers, json=payload)
+        r.raise_for_status()
+        data = r.json()
 
         results: List[Dict[str, Any]] = []
         for item in (data.get("results") or [])[: payload["max_results"]]:
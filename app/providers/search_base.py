@@ -1,8 +1,11 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class SearchProvider(ABC):
+    # Upstream requests per second allowed for this provider (None = unlimited)
+    max_qps: Optional[float] = None
+
     @abstractmethod
     async def web_search(self, query: str, num: int = 10, **kwargs) -> List[Dict[str, Any]]:
         ...
@@ -0,0 +1,157 @@
+"""TTL cache in front of any SearchProvider.
+
+Discover re-sends the same provinces x keywords queries on every /discover or
+/run: identical (provider, endpoint, query, params) calls are answered from
+memory for SEARCH_CACHE_TTL_SECONDS, and identical calls already in flight
+share one upstream request. Failed calls are never cached.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
+import time
+
+from .search_base import SearchProvider
+from ..utils.limits import rate_limiter
+
+DEFAULT_TTL_SECONDS = int(os.environ.get("SEARCH_CACHE_TTL_SECONDS", str(6 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "2000"))
+
+CacheKey = Tuple[str, str, str, str]
+
+
+@dataclass
+class SearchCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expired: int = 0
+    refreshes: int = 0
+
+
+class SearchCache:
+    """In-process LRU with per-entry expiry."""
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.stats = SearchCacheStats()
+        self._data: "OrderedDict[CacheKey, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        # key -> [future, number of waiters]; the upstream call is cancelled only when its last waiter is
+        self.inflight: Dict[CacheKey, list] = {}
+
+    @staticmethod
+    def key(provider: str, endpoint: str, query: str, params: Dict[str, Any]) -> CacheKey:
+        q = " ".join(query.split()).lower()
+        return (provider, endpoint, q, json.dumps(params, sort_keys=True, default=str))
+
+    def get(self, key: CacheKey) -> Optional[List[Dict[str, Any]]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.time():
+            del self._data[key]
+            self.stats.expired += 1
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: CacheKey, value: List[Dict[str, Any]]) -> None:
+        self._data[key] = (time.time() + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def flush(self) -> int:
+        n = len(self._data)
+        self._data.clear()
+        return n
+
+    def info(self) -> Dict[str, Any]:
+        total = self.stats.hits + self.stats.misses
+        return {
+            **asdict(self.stats),
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_rate": round(self.stats.hits / total, 4) if total else 0.0,
+        }
+
+
+SEARCH_CACHE = SearchCache()
+
+
+class CachedSearchProvider(SearchProvider):
+    """Wraps a provider; force_refresh skips cached reads but stores the fresh results."""
+
+    def __init__(self, inner: SearchProvider, cache: SearchCache = SEARCH_CACHE, force_refresh: bool = False):
+        self.inner = inner
+        self.cache = cache
+        self.force_refresh = force_refresh
+        self.name = type(inner).__name__
+
+    def __getattr__(self, item: str) -> Any:
+        # expose provider attributes (e.g. api_key) transparently
+        if item == "inner":
+            raise AttributeError(item)
+        return getattr(self.inner, item)
+
+    async def _cached(self, endpoint: str, query: str, num: int, kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        key = self.cache.key(self.name, endpoint, query, {"num": num, **kwargs})
+        entry = None
+        if not self.force_refresh:
+            hit = self.cache.get(key)
+            if hit is not None:
+                self.cache.stats.hits += 1
+                return list(hit)
+            entry = self._inflight_for(key)
+            if entry is not None:
+                self.cache.stats.hits += 1
+            else:
+                self.cache.stats.misses += 1
+        else:
+            self.cache.stats.refreshes += 1
+
+        if entry is None:
+            fut = asyncio.ensure_future(self._load(key, endpoint, query, num, kwargs))
+            entry = self.cache.inflight[key] = [fut, 0]
+            fut.add_done_callback(lambda f: self.cache.inflight.pop(key, None) if self.cache.inflight.get(key, [None])[0] is f else None)
+        fut = entry[0]
+        entry[1] += 1
+        try:
+            return list(await asyncio.shield(fut))
+        finally:
+            entry[1] -= 1
+            if entry[1] <= 0 and not fut.done():
+                fut.cancel()
+
+    async def _load(self, key: CacheKey, endpoint: str, query: str, num: int, kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        res = list(await self._upstream(endpoint, query, num, kwargs) or [])
+        self.cache.set(key, res)
+        return res
+
+    async def _upstream(self, endpoint: str, query: str, num: int, kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # only real provider calls count against the provider rate limit, cache hits are free
+        qps = getattr(self.inner, "max_qps", None)
+        if qps:
+            await rate_limiter(self.name, qps).acquire()
+        call = getattr(self.inner, f"{endpoint}_search")
+        return await call(query, num=num, **kwargs)
+
+    def _inflight_for(self, key: CacheKey) -> Optional[list]:
+        entry = self.cache.inflight.get(key)
+        if entry is None or entry[0].done() or entry[0].get_loop() is not asyncio.get_running_loop():
+            return None
+        return entry
+
+    async def web_search(self, query: str, num: int = 10, **kwargs) -> List[Dict[str, Any]]:
+        return await self._cached("web", query, num, kwargs)
+
+    async def news_search(self, query: str, num: int = 10, **kwargs) -> List[Dict[str, Any]]:
+        return await self._cached("news", query, num, kwargs)
@@ -0,0 +1,432 @@
+"""Background runs (POST /runs): request, status, progress and leads per run_id.
+
+Also the stage checkpoints of any run (/run, /run/stream, background): each stage's
+output per item, so a retry with the same run_id only does the missing work.
+
+Written by the worker executing the run (in-process or `python worker.py`), read by
+the polling endpoints. Runs are claimed atomically, so several workers can share
+one database file.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+from .utils import sqlite_db
+
+IS_VERCEL = os.getenv("VERCEL") == "1" or bool(os.getenv("VERCEL_ENV"))
+DEFAULT_DB_PATH = os.environ.get("RUN_STORE_DB_PATH") or ("/tmp/run_store.sqlite3" if IS_VERCEL else "./data/run_store.sqlite3")
+TTL_SECONDS = int(os.environ.get("RUN_RESULTS_TTL_HOURS", "72")) * 3600  # counted from the last start/finish
+PURGE_INTERVAL_SECONDS = int(os.environ.get("RUN_STORE_PURGE_INTERVAL_SECONDS", "3600"))
+# a worker refreshes updated_at of its running runs (heartbeat); a run claimed by a worker
+# and not refreshed for this long (worker killed, crashed) is claimed again
+LEASE_SECONDS = int(os.environ.get("RUN_LEASE_SECONDS", "300"))
+
+# Writers of a running pipeline (leads, checkpoints) buffer rows and write them in one
+# transaction per batch, or after this many seconds, whichever comes first
+WRITE_BATCH_SIZE = int(os.environ.get("RUN_STORE_WRITE_BATCH_SIZE", "50"))
+WRITE_FLUSH_SECONDS = float(os.environ.get("RUN_STORE_WRITE_FLUSH_SECONDS", "1"))
+
+# queued -> running -> done | failed (running -> queued again if its worker stops,
+# running -> running under another worker if its lease expires)
+STATUSES = ("queued", "running", "done", "failed")
+
+
+class RunConflict(Exception):
+    """The run_id cannot be resumed: finished, still running elsewhere, or started with another request."""
+
+
+def _init(conn: sqlite3.Connection) -> None:
+    # schema and migrations: once per database file and process (see _db)
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            session_id TEXT,
+            request_json TEXT NOT NULL,
+            stage TEXT,
+            progress_json TEXT,
+            summary_json TEXT,
+            error TEXT,
+            worker TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            expires_at REAL,
+            api_keys_json TEXT
+        )"""
+    )
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(runs)")}
+    if "expires_at" not in cols:
+        conn.execute("ALTER TABLE runs ADD COLUMN expires_at REAL")  # stores created before results had a TTL
+    if "api_keys_json" not in cols:
+        # stores that kept the caller's keys inside request_json
+        conn.execute("ALTER TABLE runs ADD COLUMN api_keys_json TEXT")
+        conn.execute("UPDATE runs SET request_json = json_remove(request_json, '$.api_keys') WHERE json_valid(request_json)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_expires_at ON runs(expires_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_status_created_at ON runs(status, created_at)")
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS run_leads (
+            run_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            idx INTEGER NOT NULL,
+            lead_json TEXT NOT NULL,
+            PRIMARY KEY (run_id, seq)
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_run_leads_idx ON run_leads(run_id, idx)")
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS checkpoints (
+            run_id TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            data_json TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (run_id, stage, idx)
+        )"""
+    )
+
+
+def _db(path: str):
+    # one long-lived connection per database file, used from worker threads under its lock
+    return sqlite_db.connection(path, _init)
+
+
+def close(db_path: str = DEFAULT_DB_PATH) -> None:
+    sqlite_db.close(db_path)
+
+
+def _default(o: Any) -> Any:
+    # pydantic models inside summaries (project profile, drafts)
+    if hasattr(o, "model_dump"):
+        return o.model_dump(mode="json")
+    return str(o)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=_default)
+
+
+def create_run(
+    request_json: str,
+    session_id: Optional[str] = None,
+    api_keys_json: Optional[str] = None,
+    db_path: str = DEFAULT_DB_PATH,
+) -> str:
+    """Queue a run (request_json: a serialized RunRequest without its api_keys) and return
+    its run_id. The caller's API keys (api_keys_json) are kept only until a worker claims the run."""
+    run_id = uuid.uuid4().hex[:12]
+    with _db(db_path) as conn:
+        now = time.time()
+        conn.execute(
+            "INSERT INTO runs(run_id, status, session_id, request_json, created_at, updated_at, expires_at, api_keys_json)"
+            " VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+            (run_id, session_id, request_json, now, now, now + TTL_SECONDS, api_keys_json),
+        )
+        conn.commit()
+    return run_id
+
+
+def claim_next(worker: str, db_path: str = DEFAULT_DB_PATH) -> Optional[Tuple[str, str, Optional[str]]]:
+    """Mark the oldest queued run (or a worker's run whose lease expired) as running for
+    `worker`: (run_id, request_json, api_keys_json), or None. The stored API keys are handed
+    to the worker and removed from the store."""
+    with _db(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")  # one claimer at a time across processes
+        now = time.time()
+        row = conn.execute(
+            "SELECT run_id, request_json, api_keys_json FROM runs WHERE status = 'queued'"
+            " OR (status = 'running' AND worker IS NOT NULL AND updated_at < ?) ORDER BY created_at LIMIT 1",
+            (now - LEASE_SECONDS,),
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE runs SET status = 'running', worker = ?, error = NULL, api_keys_json = NULL, updated_at = ? WHERE run_id = ?",
+                (worker, now, row[0]),
+            )
+        conn.commit()
+        return (row[0], row[1], row[2]) if row else None
+
+
+def heartbeat(worker: str, db_path: str = DEFAULT_DB_PATH) -> int:
+    """Renew the lease of every run `worker` is executing. Returns number of runs."""
+    with _db(db_path) as conn:
+        n = conn.execute(
+            "UPDATE runs SET updated_at = ? WHERE worker = ? AND status = 'running'", (time.time(), worker)
+        ).rowcount
+        conn.commit()
+        return int(n or 0)
+
+
+def start_run(run_id: str, request_json: str, session_id: Optional[str] = None, db_path: str = DEFAULT_DB_PATH) -> None:
+    """Mark a run as running (creating it unless it was queued); leads of an earlier attempt
+    are dropped, the run emits them again. A run just claimed by a worker keeps its worker
+    (and lease); any other restart runs without one."""
+    with _db(db_path) as conn:
+        now = time.time()
+        conn.execute(
+            """INSERT INTO runs(run_id, status, session_id, request_json, created_at, updated_at, expires_at)
+               VALUES (?, 'running', ?, ?, ?, ?, ?)
+               ON CONFLICT(run_id) DO UPDATE SET status = 'running', error = NULL, summary_json = NULL,
+                   worker = CASE WHEN runs.status = 'running' THEN runs.worker END,
+                   updated_at = excluded.updated_at, expires_at = excluded.expires_at""",
+            (run_id, session_id, request_json, now, now, now + TTL_SECONDS),
+        )
+        conn.execute("DELETE FROM run_leads WHERE run_id = ?", (run_id,))
+        conn.commit()
+
+
+def resume_run(
+    run_id: str,
+    request_json: str,
+    session_id: Optional[str] = None,
+    ignore: Iterable[str] = (),
+    db_path: str = DEFAULT_DB_PATH,
+) -> None:
+    """start_run for a caller resuming a run_id it chose (resume_run_id), in one transaction.
+
+    Raises RunConflict if the run is done, still running (its worker, or another caller,
+    updated it within LEASE_SECONDS), or was started with another request: its
+    checkpoints would not match. Fields in `ignore` may differ between the two requests."""
+    with _db(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        row = conn.execute(
+            "SELECT status, updated_at, request_json FROM runs WHERE run_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (run_id, now),
+        ).fetchone()
+        if row:
+            status, updated_at, stored_json = row
+            if status == "done":
+                raise RunConflict(f"run {run_id} is already done")
+            if status == "running" and updated_at >= now - LEASE_SECONDS:
+                raise RunConflict(f"run {run_id} is running")
+            stored, new = json.loads(stored_json), json.loads(request_json)
+            for k in ignore:
+                stored.pop(k, None)
+                new.pop(k, None)
+            if stored != new:
+                raise RunConflict(f"run {run_id} was started with a different request")
+        else:
+            # unknown or expired: a new run under this id, with nothing to resume from
+            conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+        conn.execute(
+            """INSERT INTO runs(run_id, status, session_id, request_json, created_at, updated_at, expires_at)
+               VALUES (?, 'running', ?, ?, ?, ?, ?)
+               ON CONFLICT(run_id) DO UPDATE SET status = 'running', error = NULL, summary_json = NULL, worker = NULL,
+                   api_keys_json = NULL, updated_at = excluded.updated_at, expires_at = excluded.expires_at""",
+            (run_id, session_id, request_json, now, now, now + TTL_SECONDS),
+        )
+        conn.execute("DELETE FROM run_leads WHERE run_id = ?", (run_id,))
+        conn.commit()
+
+
+def _update(db_path: str, run_id: str, **fields: Any) -> None:
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    with _db(db_path) as conn:
+        conn.execute(f"UPDATE runs SET {cols}, updated_at = ? WHERE run_id = ?", (*fields.values(), time.time(), run_id))
+        conn.commit()
+
+
+def set_progress(run_id: str, stage: str, progress: Dict[str, Any], db_path: str = DEFAULT_DB_PATH) -> None:
+    _update(db_path, run_id, stage=stage, progress_json=_dumps(progress))
+
+
+def add_lead(run_id: str, seq: int, idx: int, lead_json: str, db_path: str = DEFAULT_DB_PATH) -> None:
+    """Store one finished lead; seq = completion order (page order), idx = discover position."""
+    add_leads(run_id, [(seq, idx, lead_json)], db_path=db_path)
+
+
+def add_leads(
+    run_id: str,
+    rows: List[Tuple[int, int, str]],
+    progress: Optional[Dict[str, Any]] = None,
+    db_path: str = DEFAULT_DB_PATH,
+) -> None:
+    """Store a batch of (seq, idx, lead_json) in one transaction (pipeline batches, imports),
+    with the run's "leads" progress if given."""
+    with _db(db_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO run_leads(run_id, seq, idx, lead_json) VALUES (?, ?, ?, ?)",
+            [(run_id, seq, idx, lead_json) for seq, idx, lead_json in rows],
+        )
+        if progress is not None:
+            conn.execute(
+                "UPDATE runs SET stage = 'leads', progress_json = ?, updated_at = ? WHERE run_id = ?",
+                (_dumps(progress), time.time(), run_id),
+            )
+        conn.commit()
+
+
+def finish_run(run_id: str, summary: Dict[str, Any], db_path: str = DEFAULT_DB_PATH) -> None:
+    _update(
+        db_path, run_id, status="done", stage="done", summary_json=_dumps(summary), api_keys_json=None,
+        expires_at=time.time() + TTL_SECONDS,
+    )
+
+
+def fail_run(run_id: str, error: str, db_path: str = DEFAULT_DB_PATH) -> None:
+    _update(db_path, run_id, status="failed", error=error, api_keys_json=None)
+
+
+def requeue_run(run_id: str, api_keys_json: Optional[str] = None, db_path: str = DEFAULT_DB_PATH) -> None:
+    """Give an interrupted run back to the queue (its worker is shutting down), with the
+    API keys it was claimed with; its checkpoints are kept, so the next worker resumes it."""
+    with _db(db_path) as conn:
+        conn.execute("DELETE FROM run_leads WHERE run_id = ?", (run_id,))
+        conn.execute(
+            "UPDATE runs SET status = 'queued', worker = NULL, stage = NULL, progress_json = NULL, api_keys_json = ?, updated_at = ?"
+            " WHERE run_id = ?",
+            (api_keys_json, time.time(), run_id),
+        )
+        conn.commit()
+
+
+def save_checkpoint(run_id: str, stage: str, idx: int, data_json: str, db_path: str = DEFAULT_DB_PATH) -> None:
+    """Output of `stage` for item `idx` (0 for whole-run stages such as discover)."""
+    save_checkpoints(run_id, [(stage, idx, data_json)], db_path)
+
+
+def save_checkpoints(run_id: str, rows: List[Tuple[str, int, str]], db_path: str = DEFAULT_DB_PATH) -> None:
+    """A batch of (stage, idx, data_json) checkpoints in one transaction."""
+    try:
+        with _db(db_path) as conn:
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO checkpoints(run_id, stage, idx, data_json, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, stage, idx, data_json, now) for stage, idx, data_json in rows],
+            )
+            conn.commit()
+    except Exception:
+        return  # best effort: a missing checkpoint only costs a recomputation
+
+
+def load_checkpoints(run_id: str, db_path: str = DEFAULT_DB_PATH) -> Dict[str, Dict[int, str]]:
+    """stage -> idx -> data_json of everything saved for the run."""
+    out: Dict[str, Dict[int, str]] = {}
+    try:
+        with _db(db_path) as conn:
+            rows = conn.execute("SELECT stage, idx, data_json FROM checkpoints WHERE run_id = ?", (run_id,)).fetchall()
+    except Exception:
+        return out
+    for stage, idx, data_json in rows:
+        out.setdefault(stage, {})[int(idx)] = data_json
+    return out
+
+
+def clear_checkpoints(run_id: str, db_path: str = DEFAULT_DB_PATH) -> int:
+    try:
+        with _db(db_path) as conn:
+            n = conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,)).rowcount
+            conn.commit()
+            return int(n or 0)
+    except Exception:
+        return 0
+
+
+def get_run(run_id: str, db_path: str = DEFAULT_DB_PATH) -> Optional[Dict[str, Any]]:
+    """Status, progress and summary of a run (None if unknown or expired)."""
+    with _db(db_path) as conn:
+        row = conn.execute(
+            "SELECT status, session_id, stage, progress_json, summary_json, error, created_at, updated_at, expires_at FROM runs"
+            " WHERE run_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (run_id, time.time()),
+        ).fetchone()
+        if not row:
+            return None
+        (n,) = conn.execute("SELECT COUNT(*) FROM run_leads WHERE run_id = ?", (run_id,)).fetchone()
+    status, session_id, stage, progress_json, summary_json, error, created_at, updated_at, expires_at = row
+    return {
+        "run_id": run_id,
+        "status": status,
+        "session_id": session_id,
+        "stage": stage,
+        "progress": json.loads(progress_json) if progress_json else None,
+        "leads": int(n),
+        "summary": json.loads(summary_json) if summary_json else None,
+        "error": error,
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "expires_at": expires_at,
+    }
+
+
+def get_request(run_id: str, db_path: str = DEFAULT_DB_PATH) -> Optional[Dict[str, Any]]:
+    """The request a run was started with (None if unknown)."""
+    with _db(db_path) as conn:
+        row = conn.execute("SELECT request_json FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def get_leads(run_id: str, offset: int = 0, limit: int = 50, db_path: str = DEFAULT_DB_PATH) -> List[Dict[str, Any]]:
+    """A page of the run's leads, in completion order (stable while the run is going)."""
+    with _db(db_path) as conn:
+        rows = conn.execute(
+            "SELECT lead_json FROM run_leads WHERE run_id = ? ORDER BY seq LIMIT ? OFFSET ?",
+            (run_id, max(0, int(limit)), max(0, int(offset))),
+        ).fetchall()
+    return [json.loads(r[0]) for r in rows]
+
+
+def iter_leads(run_id: str, db_path: str = DEFAULT_DB_PATH) -> Iterator[Dict[str, Any]]:
+    """All leads of a run as plain dicts, in discover order, read lazily (exports).
+
+    The connection may be used from a different thread at each step (StreamingResponse
+    runs sync iterators in its threadpool), never from two at once. It is a connection of
+    its own: the shared one is not held for the whole export."""
+    with _db(db_path):
+        pass  # schema
+    conn = sqlite_db.open_db(db_path)
+    try:
+        for (lead_json,) in conn.execute("SELECT lead_json FROM run_leads WHERE run_id = ? ORDER BY idx, seq", (run_id,)):
+            yield json.loads(lead_json)
+    finally:
+        conn.close()
+
+
+def load_leads(run_id: str, db_path: str = DEFAULT_DB_PATH) -> List[Tuple[int, Dict[str, Any]]]:
+    """(seq, lead dict) of every lead of a run, in discover order."""
+    with _db(db_path) as conn:
+        rows = conn.execute("SELECT seq, lead_json FROM run_leads WHERE run_id = ? ORDER BY idx, seq", (run_id,)).fetchall()
+    return [(int(seq), json.loads(lead_json)) for seq, lead_json in rows]
+
+
+def update_leads(run_id: str, leads: List[Tuple[int, str]], db_path: str = DEFAULT_DB_PATH) -> None:
+    """Replace stored leads: (seq, lead_json) pairs, one transaction (rescoring, re-verification)."""
+    with _db(db_path) as conn:
+        conn.executemany(
+            "UPDATE run_leads SET lead_json = ? WHERE run_id = ? AND seq = ?",
+            [(lead_json, run_id, seq) for seq, lead_json in leads],
+        )
+        conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time(), run_id))
+        conn.commit()
+
+
+_last_purge = 0.0
+
+
+def purge_expired(db_path: str = DEFAULT_DB_PATH) -> int:
+    """Delete expired runs with their leads and checkpoints. Returns number of runs deleted (best effort)."""
+    global _last_purge
+    _last_purge = time.monotonic()
+    try:
+        with _db(db_path) as conn:
+            expired = "SELECT run_id FROM runs WHERE expires_at <= ?"
+            now = time.time()
+            conn.execute(f"DELETE FROM run_leads WHERE run_id IN ({expired})", (now,))
+            conn.execute(f"DELETE FROM checkpoints WHERE run_id IN ({expired})", (now,))
+            n = conn.execute("DELETE FROM runs WHERE expires_at <= ?", (now,)).rowcount
+            conn.commit()
+            return int(n or 0)
+    except Exception:
+        return 0
+
+
+def maybe_purge(db_path: str = DEFAULT_DB_PATH) -> int:
+    """Amortized purge: runs purge_expired at most once per PURGE_INTERVAL_SECONDS."""
+    if _last_purge and time.monotonic() - _last_purge < PURGE_INTERVAL_SECONDS:
+        return 0
+    return purge_expired(db_path)
@@ -0,0 +1,141 @@
+"""Executes queued background runs (app/run_store.py).
+
+The API process runs one RunWorker in its lifespan when RUN_WORKER_IN_PROCESS is on
+(dev, single container); in production `python worker.py` runs it on its own, so a
+run is no longer bound to an HTTP request timeout.
+"""
+from __future__ import annotations
+
+from typing import Optional, Set
+import asyncio
+import logging
+import os
+import socket
+import time
+
+from . import run_store
+from .config_loader import FocusConfig
+from .models import ApiKeys, RunRequest
+from .pipeline.orchestrator import stream_pipeline
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def execute_run(run_id: str, req: RunRequest, focus: FocusConfig) -> None:
+    """Run the pipeline for a claimed run; stream_pipeline records progress, leads and summary."""
+    try:
+        async for _ in stream_pipeline(req, focus, run_id=run_id):
+            pass
+    except asyncio.CancelledError:
+        # worker shutting down: someone else picks the run up again (from its checkpoints),
+        # with the caller's keys this worker took from the store
+        api_keys_json = req.api_keys.model_dump_json() if req.api_keys else None
+        await asyncio.shield(asyncio.to_thread(run_store.requeue_run, run_id, api_keys_json))
+        raise
+    except Exception as e:
+        logger.exception("run %s failed", run_id)
+        await asyncio.to_thread(run_store.fail_run, run_id, f"{type(e).__name__}: {e}")
+
+
+class RunWorker:
+    """Claims queued runs and executes up to `concurrency` of them at a time.
+
+    The store is polled every `poll_seconds`; notify() wakes the worker at once
+    (the API calls it right after queueing a run in the same process). While runs
+    are going their lease is renewed every third of RUN_LEASE_SECONDS, so a killed
+    worker's runs are claimed again by the others.
+    """
+
+    def __init__(
+        self,
+        focus: FocusConfig,
+        concurrency: int = 2,
+        poll_seconds: float = 2.0,
+    ):
+        self.focus = focus
+        self.concurrency = max(1, concurrency)
+        self.poll_seconds = max(0.1, poll_seconds)
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = asyncio.Event()
+        self._running: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._last_heartbeat = 0.0
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self.run_forever())
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    async def _heartbeat(self) -> None:
+        if not self._running or time.monotonic() - self._last_heartbeat < run_store.LEASE_SECONDS / 3:
+            return
+        self._last_heartbeat = time.monotonic()
+        try:
+            await asyncio.to_thread(run_store.heartbeat, self.name)
+        except Exception:
+            logger.exception("run store unavailable")
+
+    async def run_forever(self) -> None:
+        while True:
+            await self._heartbeat()
+            while len(self._running) < self.concurrency:
+                try:
+                    claimed = await asyncio.to_thread(run_store.claim_next, self.name)
+                except Exception:
+                    logger.exception("run store unavailable")
+                    claimed = None
+                if claimed is None:
+                    break
+                run_id, request_json, api_keys_json = claimed
+                try:
+                    req = RunRequest.model_validate_json(request_json)
+                    if api_keys_json:
+                        req.api_keys = ApiKeys.model_validate_json(api_keys_json)
+                except Exception as e:
+                    await asyncio.to_thread(run_store.fail_run, run_id, f"invalid request: {e}")
+                    continue
+                task = asyncio.ensure_future(execute_run(run_id, req, self.focus))
+                self._running.add(task)
+                task.add_done_callback(self._done)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), min(self.poll_seconds, run_store.LEASE_SECONDS / 3))
+            except asyncio.TimeoutError:
+                pass
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        self._wake.set()  # a slot is free
+
+    async def stop(self) -> None:
+        """Stop claiming; runs still going are interrupted and queued again."""
+        tasks = ([self._task] if self._task else []) + list(self._running)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+
+_worker: Optional[RunWorker] = None
+
+
+async def start_worker(focus: FocusConfig) -> None:
+    global _worker
+    if _worker is not None:
+        return
+    _worker = RunWorker(focus, settings.RUN_WORKER_CONCURRENCY, settings.RUN_WORKER_POLL_SECONDS)
+    _worker.start()
+
+
+async def stop_worker() -> None:
+    global _worker
+    worker, _worker = _worker, None
+    if worker is not None:
+        await worker.stop()
+
+
+def notify_worker() -> None:
+    if _worker is not None:
+        _worker.notify()
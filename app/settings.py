@@ -7,6 +7,11 @@ def _is_vercel() -> bool:
     return os.getenv("VERCEL") == "1" or bool(os.getenv("VERCEL_ENV"))
 
 
+def _is_serverless() -> bool:
+    # Vercel or AWS Lambda: nothing keeps running once the response is sent
+    return _is_vercel() or bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+
 def _default_telemetry_db_path() -> str:
     """Choose a writable default path for telemetry.
 
@@ -43,9 +48,47 @@ class Settings(BaseSettings):
     # Perplexity (optional)
     PERPLEXITY_API_KEY: str | None = None
 
+    # Shared HTTP client (connection pool)
+    HTTP_TIMEOUT: float = 60.0
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 6
+    HTTP2_ENABLED: bool = True  # used only if the optional `h2` package is installed
+    HTTP_RETRIES: int = 2  # extra attempts on 429/5xx/transport errors for paid provider APIs
+    HTTP_RETRY_BACKOFF: float = 0.5  # seconds, doubled at each attempt (Retry-After wins when present)
+
+    # Discover: search queries in flight at the same time (provider QPS limits still apply)
+    DISCOVER_CONCURRENCY: int = 8
+
+    # Enrichment concurrency
+    ENRICH_CONCURRENCY: int = 8  # companies enriched at the same time
+    ENRICH_PER_DOMAIN_CONCURRENCY: int = 4  # parallel page fetches against one site
+
+    # Decision maker identification
+    IDENTIFY_PARALLEL: bool = True  # probe all people pages at once (False = one after another)
+    IDENTIFY_CONCURRENCY: int = 8  # companies identified at the same time
+
+    # Email verification
+    VERIFY_CONCURRENCY: int = 8  # leads verified at the same time (provider QPS limits still apply)
+    EMAIL_VERIFY_MAX_QPS: float = 5.0  # generic verifier requests per second
+
+    # Run pipeline: items waiting between two stages (enrich -> identify -> budget -> verify -> score)
+    PIPELINE_QUEUE_SIZE: int = 16
+    RUN_CHECKPOINTS: bool = True  # save each stage's output per company (app/run_store.py) so runs can resume
+
+    # Background runs (POST /runs): executed by a RunWorker, in the API process or `python worker.py`
+    RUN_WORKER_IN_PROCESS: bool = not _is_serverless()
+    RUN_WORKER_CONCURRENCY: int = 2  # runs executed at the same time by one worker
+    RUN_WORKER_POLL_SECONDS: float = 2.0  # how often the worker looks for queued runs
+
     # Telemetry
     TELEMETRY_DB_PATH: str = _default_telemetry_db_path()
     TELEMETRY_SALT: str = "change_me"
+    TELEMETRY_BATCH_SIZE: int = 100  # events written per transaction
+    TELEMETRY_FLUSH_MS: int = 500  # max delay before queued events are written
+    TELEMETRY_QUEUE_MAX: int = 10000  # events buffered in memory before new ones are dropped
 
 
 settings = Settings()
@@ -1,14 +1,21 @@
+import asyncio
 import hashlib
 import json
-import os
+import logging
 import sqlite3
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 from .settings import settings
 
+logger = logging.getLogger(__name__)
+
+# (ts, session_hash, event_type, payload_json)
+Row = Tuple[str, str, str, str]
+
 
 @dataclass
 class TelemetryEvent:
@@ -29,6 +36,29 @@ def _ensure_parent(path: str) -> None:
         return
 
 
+def _connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    _ensure_parent(path)
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            session_hash TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            payload_json TEXT NOT NULL
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events(event_type, ts)")
+    return conn
+
+
+def _insert(conn: sqlite3.Connection, rows: List[Row]) -> None:
+    conn.executemany("INSERT INTO events (ts, session_hash, event_type, payload_json) VALUES (?,?,?,?)", rows)
+    conn.commit()
+
+
 def init_db() -> None:
     """Initialize telemetry DB.
 
@@ -38,39 +68,154 @@ def init_db() -> None:
     try:
         if not settings.TELEMETRY_DB_PATH:
             return
-        _ensure_parent(settings.TELEMETRY_DB_PATH)
-        conn = sqlite3.connect(settings.TELEMETRY_DB_PATH)
-        cur = conn.cursor()
-        cur.execute(
-            """CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ts TEXT NOT NULL,
-                session_hash TEXT NOT NULL,
-                event_type TEXT NOT NULL,
-                payload_json TEXT NOT NULL
-            )"""
-        )
-        conn.commit()
-        conn.close()
+        _connect(settings.TELEMETRY_DB_PATH).close()
     except Exception:
         # Best-effort: telemetry should never break the app
         return
 
 
+_STOP = object()  # queued by TelemetryWriter.stop(): write what is left and exit
+
+
+class TelemetryWriter:
+    """Background writer: events are queued in memory and written in batches
+    (every `batch_size` events or `flush_ms`), one transaction per batch, on one
+    long-lived WAL connection. Started/stopped by the app lifespan."""
+
+    def __init__(self, db_path: str, batch_size: int = 100, flush_ms: int = 500, queue_max: int = 10000):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0, flush_ms) / 1000.0
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_max))
+        self.dropped = 0
+        self.written = 0
+        self._full = asyncio.Event()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+
+    def put(self, row: Row) -> bool:
+        """Queue a row from the writer's loop; False if it cannot be queued here."""
+        try:
+            if asyncio.get_running_loop() is not self._loop or self._task is None or self._task.done():
+                return False
+        except RuntimeError:
+            return False
+        try:
+            self.queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return True
+        if self.queue.qsize() >= self.batch_size:
+            self._full.set()
+        return True
+
+    def _take(self, n: int) -> List[Any]:
+        items: List[Any] = []
+        while len(items) < n:
+            try:
+                items.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return items
+
+    async def _run(self) -> None:
+        while True:
+            first = await self.queue.get()
+            if first is not _STOP and self.queue.qsize() + 1 < self.batch_size:
+                # wait for a full batch, at most flush_interval
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            batch = [first] + self._take(self.batch_size - 1)
+            rows = [r for r in batch if r is not _STOP]
+            if rows:
+                await self._write(rows)
+            if len(rows) < len(batch):
+                # stopping: everything queued before the stop marker goes out now
+                rows = [r for r in self._take(self.queue.qsize()) if r is not _STOP]
+                if rows:
+                    await self._write(rows)
+                return
+
+    async def _write(self, rows: List[Row]) -> None:
+        try:
+            await asyncio.to_thread(self._write_sync, rows)
+        except Exception:
+            logger.debug("telemetry batch of %d events lost", len(rows), exc_info=True)
+
+    def _write_sync(self, rows: List[Row]) -> None:
+        # only the writer task calls this, one batch at a time
+        if self._conn is None:
+            self._conn = _connect(self.db_path, check_same_thread=False)
+        _insert(self._conn, rows)
+        self.written += len(rows)
+
+    async def stop(self) -> None:
+        """Write everything still queued, then close the connection."""
+        if self._task is not None and not self._task.done():
+            await self.queue.put(_STOP)
+            self._full.set()
+            try:
+                await self._task
+            except Exception:
+                logger.debug("telemetry writer failed", exc_info=True)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_writer: Optional[TelemetryWriter] = None
+
+
+async def start_writer() -> None:
+    global _writer
+    if not settings.TELEMETRY_DB_PATH or _writer is not None:
+        return
+    _writer = TelemetryWriter(
+        settings.TELEMETRY_DB_PATH,
+        batch_size=settings.TELEMETRY_BATCH_SIZE,
+        flush_ms=settings.TELEMETRY_FLUSH_MS,
+        queue_max=settings.TELEMETRY_QUEUE_MAX,
+    )
+    _writer.start()
+
+
+async def stop_writer() -> None:
+    """Flush queued events (lifespan shutdown: also at the end of each Mangum invocation)."""
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        await writer.stop()
+
+
+def _write_now(row: Row) -> None:
+    conn = _connect(settings.TELEMETRY_DB_PATH)
+    try:
+        _insert(conn, [row])
+    finally:
+        conn.close()
+
+
 def log_event(ev: TelemetryEvent) -> None:
-    """Best-effort telemetry logging."""
+    """Best-effort telemetry logging.
+
+    Inside the app the event is only queued for the background writer; without a
+    running writer (scripts, no lifespan) it is written synchronously.
+    """
     try:
         if not settings.TELEMETRY_DB_PATH:
             return
-        _ensure_parent(settings.TELEMETRY_DB_PATH)
-        conn = sqlite3.connect(settings.TELEMETRY_DB_PATH)
-        cur = conn.cursor()
         ts = datetime.now(timezone.utc).isoformat()
-        cur.execute(
-            "INSERT INTO events (ts, session_hash, event_type, payload_json) VALUES (?,?,?,?)",
-            (ts, _session_hash(ev.session_id), ev.event_type, json.dumps(ev.payload, ensure_ascii=False)),
-        )
-        conn.commit()
-        conn.close()
+        row = (ts, _session_hash(ev.session_id), ev.event_type, json.dumps(ev.payload, ensure_ascii=False))
+        if _writer is not None and _writer.put(row):
+            return
+        _write_now(row)
     except Exception:
         return
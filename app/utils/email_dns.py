@@ -1,11 +1,136 @@
 from __future__ import annotations
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Iterable, Optional, Tuple
+
+import dns.asyncresolver
+import dns.exception
 import dns.resolver
-from typing import Tuple
+
+from .limits import gather_limited
+
+# MX answers are cached in-process for their DNS TTL (clamped); "no mail here"
+# answers (NXDOMAIN / no MX record) for MX_NEGATIVE_TTL_SECONDS. Timeouts and
+# server failures are transient and never cached.
+MX_MIN_TTL_SECONDS = int(os.environ.get("MX_MIN_TTL_SECONDS", "300"))
+MX_MAX_TTL_SECONDS = int(os.environ.get("MX_MAX_TTL_SECONDS", str(24 * 3600)))
+MX_NEGATIVE_TTL_SECONDS = int(os.environ.get("MX_NEGATIVE_TTL_SECONDS", "900"))
+MX_CACHE_MAX_ENTRIES = int(os.environ.get("MX_CACHE_MAX_ENTRIES", "5000"))
+MX_LIFETIME_SECONDS = float(os.environ.get("MX_LIFETIME_SECONDS", "5"))
+MX_CONCURRENCY = int(os.environ.get("MX_CONCURRENCY", "32"))
+
+_NEGATIVE_ERRORS = (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)
+
+# domain -> (expires_at, ok, info); touched from the loop and from has_mx in worker threads
+_cache: "OrderedDict[str, Tuple[float, bool, str]]" = OrderedDict()
+_cache_lock = threading.Lock()
+_inflight: Dict[str, asyncio.Future] = {}
+_async_resolver: Optional[dns.asyncresolver.Resolver] = None
+
+
+def _key(domain: str) -> str:
+    return (domain or "").strip().rstrip(".").lower()
+
+
+def _cached(key: str) -> Optional[Tuple[bool, str]]:
+    with _cache_lock:
+        item = _cache.get(key)
+        if item is None:
+            return None
+        expires_at, ok, info = item
+        if expires_at <= time.time():
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+    return ok, info
+
+
+def _store(key: str, ok: bool, info: str, ttl: int) -> None:
+    with _cache_lock:
+        _cache[key] = (time.time() + ttl, ok, info)
+        _cache.move_to_end(key)
+        while len(_cache) > MX_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _remember_answer(key: str, answers) -> Tuple[bool, str]:
+    mx = ",".join([str(r.exchange).rstrip(".") for r in answers])
+    ttl = getattr(answers.rrset, "ttl", None) or MX_MIN_TTL_SECONDS
+    _store(key, True, mx, max(MX_MIN_TTL_SECONDS, min(int(ttl), MX_MAX_TTL_SECONDS)))
+    return True, mx
+
+
+def _remember_error(key: str, e: Exception) -> Tuple[bool, str]:
+    if isinstance(e, _NEGATIVE_ERRORS):
+        _store(key, False, str(e), MX_NEGATIVE_TTL_SECONDS)
+    return False, str(e)
+
 
 def has_mx(domain: str) -> Tuple[bool, str]:
+    """Blocking lookup (scripts / sync callers). Async code should use resolve_mx."""
+    key = _key(domain)
+    hit = _cached(key)
+    if hit is not None:
+        return hit
     try:
-        answers = dns.resolver.resolve(domain, "MX")
-        mx = ",".join([str(r.exchange).rstrip(".") for r in answers])
-        return True, mx
+        answers = dns.resolver.resolve(key, "MX", lifetime=MX_LIFETIME_SECONDS)
+        return _remember_answer(key, answers)
     except Exception as e:
-        return False, str(e)
+        return _remember_error(key, e)
+
+
+def _resolver() -> dns.asyncresolver.Resolver:
+    global _async_resolver
+    if _async_resolver is None:
+        _async_resolver = dns.asyncresolver.Resolver()
+    return _async_resolver
+
+
+async def _lookup(key: str) -> Tuple[bool, str]:
+    try:
+        resolver = _resolver()
+    except dns.exception.DNSException:
+        # no usable resolv.conf for the async resolver: do the blocking lookup off the loop
+        return await asyncio.to_thread(has_mx, key)
+    try:
+        answers = await resolver.resolve(key, "MX", lifetime=MX_LIFETIME_SECONDS)
+        return _remember_answer(key, answers)
+    except Exception as e:
+        return _remember_error(key, e)
+
+
+def _forget(key: str, fut: asyncio.Future) -> None:
+    if _inflight.get(key) is fut:
+        del _inflight[key]
+
+
+async def resolve_mx(domain: str) -> Tuple[bool, str]:
+    """Non-blocking has_mx: cached, and concurrent lookups of one domain share a query."""
+    key = _key(domain)
+    hit = _cached(key)
+    if hit is not None:
+        return hit
+    fut = _inflight.get(key)
+    if fut is None or fut.done() or fut.get_loop() is not asyncio.get_running_loop():
+        fut = asyncio.ensure_future(_lookup(key))
+        _inflight[key] = fut
+        fut.add_done_callback(partial(_forget, key))
+    return await asyncio.shield(fut)
+
+
+async def resolve_mx_many(domains: Iterable[str], concurrency: int = MX_CONCURRENCY) -> Dict[str, Tuple[bool, str]]:
+    """Resolve all distinct domains concurrently. Keys are the domains as given."""
+    unique = list(dict.fromkeys(d for d in domains if d))
+    results = await gather_limited([resolve_mx(d) for d in unique], concurrency)
+    return dict(zip(unique, results))
+
+
+def clear_cache() -> int:
+    with _cache_lock:
+        n = len(_cache)
+        _cache.clear()
+    return n
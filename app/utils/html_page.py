@@ -0,0 +1,230 @@
+from __future__ import annotations
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Tags whose content is never visible text
+NON_TEXT_TAGS = ["script", "style", "noscript", "iframe"]
+
+# Parser backend: auto (selectolax > lxml > html.parser, whichever is installed) or a specific one.
+# selectolax/lxml are optional: they are not in requirements.txt to keep the Vercel bundle small.
+HTML_PARSER = os.environ.get("HTML_PARSER", "auto").strip().lower()
+
+
+def visible_text(soup: BeautifulSoup) -> str:
+    """Visible text of a soup, one text node per line (mutates the soup: non-text tags are dropped)."""
+    for tag in soup(NON_TEXT_TAGS):
+        tag.decompose()
+    text = soup.get_text("\n")
+    text = re.sub(r"\n{2,}", "\n\n", text)
+    return text.strip()
+
+
+@dataclass
+class ParsedPage:
+    """A page parsed once, exposing everything the pipeline reads from HTML.
+
+    - title / meta (name or property -> content, lowercase keys)
+    - text: visible text (same output as scrape.clean_text), lines
+    - links: (href, anchor text) for every <a href>
+    - scripts: <script src> values
+    """
+    html: str
+    title: Optional[str] = None
+    meta: Dict[str, str] = field(default_factory=dict)
+    text: str = ""
+    links: List[Tuple[str, str]] = field(default_factory=list)
+    scripts: List[str] = field(default_factory=list)
+
+    @property
+    def lines(self) -> List[str]:
+        return self.text.splitlines()
+
+    @classmethod
+    def parse(cls, html: str, backend: Optional[str] = None) -> "ParsedPage":
+        """Parse with the configured backend; any backend failure falls back to html.parser."""
+        name = backend or DEFAULT_BACKEND
+        if name != "html.parser":
+            try:
+                return BACKENDS[name](html or "")
+            except Exception:
+                logger.debug("html backend %s failed, falling back to html.parser", name, exc_info=True)
+        return _parse_html_parser(html or "")
+
+
+def _finish_text(strings: Iterator[str]) -> str:
+    # same normalization as visible_text(): one text node per line, collapsed blank lines
+    text = "\n".join(strings)
+    text = re.sub(r"\n{2,}", "\n\n", text)
+    return text.strip()
+
+
+def _parse_html_parser(html: str) -> ParsedPage:
+    # Use stdlib parser to avoid heavy lxml dependency (Vercel-friendly)
+    soup = BeautifulSoup(html, "html.parser")
+    page = ParsedPage(html=html)
+    if soup.title and soup.title.string:
+        page.title = soup.title.string.strip() or None
+
+    for tag in soup.find_all(True):
+        name = tag.name
+        if name == "a" and tag.get("href"):
+            page.links.append((tag["href"], tag.get_text(" ") or ""))
+        elif name == "meta" and tag.get("content"):
+            key = tag.get("name") or tag.get("property")
+            if key:
+                page.meta.setdefault(str(key).lower(), str(tag["content"]).strip())
+        elif name == "script" and tag.get("src"):
+            page.scripts.append(tag["src"])
+
+    page.text = visible_text(soup)
+    return page
+
+
+def _parse_lxml(html: str) -> ParsedPage:
+    from lxml import html as lxml_html
+
+    page = ParsedPage(html=html)
+    if not html.strip():
+        return page
+    root = lxml_html.document_fromstring(html)
+
+    for el in root.iter():
+        name = el.tag
+        if not isinstance(name, str):  # comments / processing instructions
+            continue
+        if name == "title" and page.title is None and el.text and len(el) == 0:
+            page.title = el.text.strip() or None
+        elif name == "a" and el.get("href"):
+            page.links.append((el.get("href"), " ".join(el.itertext())))
+        elif name == "meta" and el.get("content"):
+            key = el.get("name") or el.get("property")
+            if key:
+                page.meta.setdefault(key.lower(), el.get("content").strip())
+        elif name == "script" and el.get("src"):
+            page.scripts.append(el.get("src"))
+
+    page.text = _lxml_text(root)
+    return page
+
+
+def _lxml_strings(el) -> Iterator[str]:
+    if isinstance(el.tag, str):
+        if el.tag in NON_TEXT_TAGS:
+            return
+        if el.text:
+            yield el.text
+    for child in el:
+        yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _lxml_text(root) -> str:
+    return _finish_text(_lxml_strings(root))
+
+
+def _selectolax_parser():
+    try:
+        from selectolax.lexbor import LexborHTMLParser as Parser
+    except ImportError:
+        from selectolax.parser import HTMLParser as Parser
+    return Parser
+
+
+def _selectolax_text(tree) -> str:
+    if tree.root is None:
+        return ""
+    tree.strip_tags(NON_TEXT_TAGS)
+    return _finish_text(iter([tree.root.text(separator="\n")]))
+
+
+def _parse_selectolax(html: str) -> ParsedPage:
+    tree = _selectolax_parser()(html)
+    page = ParsedPage(html=html)
+    title = tree.css_first("title")
+    if title is not None:
+        page.title = (title.text() or "").strip() or None
+
+    for node in tree.root.traverse() if tree.root is not None else []:
+        name = node.tag
+        if name.startswith("-"):  # -comment, -text, ...
+            continue
+        attrs = node.attributes
+        if name == "a" and attrs.get("href"):
+            page.links.append((attrs["href"], node.text(separator=" ")))
+        elif name == "meta" and attrs.get("content"):
+            key = attrs.get("name") or attrs.get("property")
+            if key:
+                page.meta.setdefault(key.lower(), attrs["content"].strip())
+        elif name == "script" and attrs.get("src"):
+            page.scripts.append(attrs["src"])
+
+    page.text = _selectolax_text(tree)
+    return page
+
+
+def _text_html_parser(html: str) -> str:
+    return visible_text(BeautifulSoup(html, "html.parser"))
+
+
+def _text_lxml(html: str) -> str:
+    from lxml import html as lxml_html
+
+    return _lxml_text(lxml_html.document_fromstring(html)) if html.strip() else ""
+
+
+def _text_selectolax(html: str) -> str:
+    return _selectolax_text(_selectolax_parser()(html))
+
+
+BACKENDS: Dict[str, Callable[[str], ParsedPage]] = {
+    "selectolax": _parse_selectolax,
+    "lxml": _parse_lxml,
+    "html.parser": _parse_html_parser,
+}
+
+TEXT_BACKENDS: Dict[str, Callable[[str], str]] = {
+    "selectolax": _text_selectolax,
+    "lxml": _text_lxml,
+    "html.parser": _text_html_parser,
+}
+
+
+def _available(name: str) -> bool:
+    module = {"selectolax": "selectolax", "lxml": "lxml.html"}.get(name)
+    if module is None:
+        return name in BACKENDS
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_backend(preference: str = HTML_PARSER) -> str:
+    """Backend actually used for a preference (auto/selectolax/lxml/html.parser)."""
+    order = ["selectolax", "lxml", "html.parser"]
+    if preference in BACKENDS:
+        order = [preference, "html.parser"]
+    return next(name for name in order if _available(name))
+
+
+DEFAULT_BACKEND = resolve_backend()
+
+
+def extract_text(html: str, backend: Optional[str] = None) -> str:
+    """Visible text only (cheaper than ParsedPage.parse when nothing else is needed)."""
+    name = backend or DEFAULT_BACKEND
+    if name != "html.parser":
+        try:
+            return TEXT_BACKENDS[name](html or "")
+        except Exception:
+            logger.debug("html backend %s failed, falling back to html.parser", name, exc_info=True)
+    return _text_html_parser(html or "")
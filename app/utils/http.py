@@ -0,0 +1,130 @@
+"""Shared, pooled HTTP client.
+
+One httpx.AsyncClient lives for the whole app (opened/closed by the FastAPI
+lifespan and by the CLI), so scraping and provider calls reuse keep-alive
+connections instead of paying a TCP/TLS handshake per request.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..settings import settings
+from .limits import KeyedSemaphore, TokenBucket
+
+DEFAULT_HEADERS = {"User-Agent": "lead-scouting-agent/1.0"}
+
+# Responses worth another attempt: rate limited or server-side trouble
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_limits: Optional[KeyedSemaphore] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (optional: pip install httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=limits,
+        http2=settings.HTTP2_ENABLED and _http2_available(),
+        headers=DEFAULT_HEADERS,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily (e.g. when no lifespan ran).
+
+    A pool is bound to the event loop that created it: if we are called from a
+    different loop (new asyncio.run), a fresh client is built.
+    """
+    global _client, _client_loop, _host_limits
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = _build_client()
+        _client_loop = loop
+        _host_limits = KeyedSemaphore(settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+    return _client
+
+
+async def open_client() -> httpx.AsyncClient:
+    return get_client()
+
+
+async def close_client() -> None:
+    global _client, _client_loop, _host_limits
+    client, _client, _client_loop, _host_limits = _client, None, None, None
+    if client is not None and not client.is_closed:
+        try:
+            await client.aclose()
+        except Exception:
+            return
+
+
+async def request(method: str, url: str, *, timeout: Optional[float] = None, **kwargs: Any) -> httpx.Response:
+    """Send a request through the shared pool, honouring the per-host connection limit."""
+    client = get_client()
+    host_limits = _host_limits or KeyedSemaphore(settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+    async with host_limits.get(urlsplit(url).hostname or ""):
+        return await client.request(
+            method,
+            url,
+            timeout=(httpx.USE_CLIENT_DEFAULT if timeout is None else timeout),
+            **kwargs,
+        )
+
+
+def _retry_delay(response: Optional[httpx.Response], attempt: int, backoff: float) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_AFTER_SECONDS)
+        except ValueError:
+            pass  # HTTP-date form: fall back to exponential backoff
+    return backoff * (2 ** attempt)
+
+
+async def request_with_retry(
+    method: str,
+    url: str,
+    *,
+    limiter: Optional[TokenBucket] = None,
+    retries: Optional[int] = None,
+    backoff: Optional[float] = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    """request() for provider APIs: every attempt takes a token from `limiter`, and 429/5xx
+    responses or transport errors are retried at most `retries` times (then returned/raised)."""
+    retries = settings.HTTP_RETRIES if retries is None else max(0, retries)
+    backoff = settings.HTTP_RETRY_BACKOFF if backoff is None else backoff
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            await limiter.acquire()
+        try:
+            response = await request(method, url, **kwargs)
+        except httpx.TransportError:
+            if attempt >= retries:
+                raise
+            await asyncio.sleep(_retry_delay(None, attempt, backoff))
+            continue
+        if response.status_code not in RETRY_STATUSES or attempt >= retries:
+            return response
+        await asyncio.sleep(_retry_delay(response, attempt, backoff))
+    raise AssertionError("unreachable")
@@ -0,0 +1,131 @@
+"""Compiled keyword matcher shared by the pipeline heuristics.
+
+A rule set (regexes, or literal keywords) is compiled once per process
+(get_matcher) and answers, for a text or for a list of lines:
+
+- first(text): lowest-index matching rule (identify's role priority)
+- matches(text): the set of matching rules
+- by_line(lines): the set of matching rules for every line
+
+by_line joins a block of lines and scans it once per rule, jumping to the next
+line after each hit, instead of running every rule on every line. Blocks are
+produced lazily, so callers that stop after N hits still stop early.
+Results are exactly those of a per-line `re.search` / `in`: a hit that runs
+past its line is re-checked on that line alone, and rules whose meaning
+depends on line context (anchors, lookarounds) are always matched per line.
+
+A single alternation of all rules (plain or lookahead) was measured slower
+than this under CPython's `re`: alternatives lose the literal-prefix fast
+search each rule gets on its own (see benchmarks/bench_keywords.py). For the
+same reason case-insensitive ASCII rules run lowercased on lowercased text.
+"""
+from __future__ import annotations
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+# constructs whose result can differ between a line and the same line inside the joined text
+_LINE_CONTEXT = re.compile(r"\^|\$|\\[AZ]|\(\?<?[=!]")
+
+# escapes whose meaning changes when lowercased (\S, \W, \D, \B, \A, \Z, \N{...})
+_CASE_ESCAPE = re.compile(r"\\[A-Z]")
+# characters IGNORECASE matches differently than str.lower() does (ı ~ i, ſ ~ s, İ lowers to two chars)
+_FOLD_EXCEPTIONS = "\u0130\u0131\u017f"
+
+
+class KeywordMatcher:
+    def __init__(self, patterns: Sequence[str], flags: int = re.IGNORECASE, literal: bool = False):
+        self.patterns = list(patterns)
+        self.literal = literal
+        # rule index -> compiled pattern; invalid patterns (e.g. from preset YAML) never match
+        self._rules: Dict[int, re.Pattern] = {}
+        for i, p in enumerate(self.patterns):
+            try:
+                self._rules[i] = re.compile(re.escape(p) if literal else p, flags)
+            except re.error:
+                continue
+        # literal rules are plain substring checks, so they skip the regex engine
+        self._literals: Dict[int, str] = {}
+        if literal and not flags:
+            self._literals = {i: p for i, p in enumerate(self.patterns) if p and "\n" not in p}
+        # Case-insensitive rules are also compiled lowercased, to run without IGNORECASE
+        # on lowercased text: same matches, but `re` can use its fast prefix search again.
+        self._folded: Dict[int, re.Pattern] = {}
+        if flags == re.IGNORECASE and not literal:
+            for i, p in enumerate(self.patterns):
+                if i in self._rules and p.isascii() and not _CASE_ESCAPE.search(p):
+                    try:
+                        self._folded[i] = re.compile(p.lower())
+                    except re.error:
+                        continue
+        self._per_line: Set[int] = set()
+        for i, p in enumerate(self.patterns):
+            if i in self._rules and i not in self._literals:
+                if "\n" in p or (not literal and _LINE_CONTEXT.search(p)):
+                    self._per_line.add(i)
+
+    def _view(self, text: str) -> Tuple[str, Dict[int, re.Pattern]]:
+        """(haystack, rules) to scan: lowercased text + folded rules whenever that is exact."""
+        if not self._folded or any(c in text for c in _FOLD_EXCEPTIONS):
+            return text, self._rules
+        return text.lower(), {i: self._folded.get(i, rx) for i, rx in self._rules.items()}
+
+    def first(self, text: str) -> Optional[int]:
+        text, rules = self._view(text)
+        for i, rx in rules.items():
+            if rx.search(text):
+                return i
+        return None
+
+    def matches(self, text: str) -> Set[int]:
+        text, rules = self._view(text)
+        return {i for i, rx in rules.items() if rx.search(text)}
+
+    def by_line(self, lines: Sequence[str], chunk: int = 64) -> Iterator[Set[int]]:
+        """Matching rules for each line, lazily in blocks of `chunk` lines (callers may stop early)."""
+        for first in range(0, len(lines), chunk):
+            yield from self._block(lines[first:first + chunk])
+
+    def _block(self, lines: Sequence[str]) -> List[Set[int]]:
+        out: List[Set[int]] = [set() for _ in lines]
+        text, rules = self._view("\n".join(lines))
+        if rules is not self._rules:
+            lines = text.split("\n")
+        starts: List[int] = []
+        pos = 0
+        for line in lines:
+            starts.append(pos)
+            pos += len(line) + 1
+
+        for i, rx in rules.items():
+            if i in self._per_line:
+                for idx, line in enumerate(lines):
+                    if rx.search(line):
+                        out[idx].add(i)
+                continue
+            keyword = self._literals.get(i)
+            pos = 0
+            while True:
+                if keyword is not None:
+                    start = text.find(keyword, pos)
+                    if start < 0:
+                        break
+                    end = start + len(keyword)
+                else:
+                    m = rx.search(text, pos)
+                    if m is None:
+                        break
+                    start, end = m.span()
+                idx = bisect_right(starts, start) - 1
+                if end <= starts[idx] + len(lines[idx]) or rx.search(lines[idx]):
+                    out[idx].add(i)
+                if idx + 1 >= len(lines):
+                    break
+                pos = starts[idx + 1]
+        return out
+
+
+@lru_cache(maxsize=256)
+def get_matcher(patterns: Tuple[str, ...], flags: int = re.IGNORECASE, literal: bool = False) -> KeywordMatcher:
+    return KeywordMatcher(patterns, flags=flags, literal=literal)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import Awaitable, Dict, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class KeyedSemaphore:
+    """One asyncio.Semaphore per key (e.g. per domain), created lazily."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, int(limit))
+        self._sems: Dict[str, asyncio.Semaphore] = {}
+
+    def get(self, key: str) -> asyncio.Semaphore:
+        sem = self._sems.get(key)
+        if sem is None:
+            sem = self._sems[key] = asyncio.Semaphore(self.limit)
+        return sem
+
+
+async def gather_limited(aws: Iterable[Awaitable[T]], limit: int) -> List[T]:
+    """Like asyncio.gather (results keep input order) but with at most `limit` running at once."""
+    sem = asyncio.Semaphore(max(1, int(limit)))
+
+    async def _run(aw: Awaitable[T]) -> T:
+        async with sem:
+            return await aw
+
+    return list(await asyncio.gather(*(_run(aw) for aw in aws)))
+
+
+class TokenBucket:
+    """Async token bucket: at most `rate` acquisitions per second, bursts up to `burst`.
+
+    No lock is needed: the bookkeeping happens between awaits on a single event
+    loop. Waiters reserve a token up front (the balance goes negative) and sleep
+    until it is theirs, so they are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = max(float(rate), 1e-6)
+        self.burst = max(float(burst if burst is not None else rate), 1.0)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return
+        try:
+            await asyncio.sleep(-self._tokens / self.rate)
+        except asyncio.CancelledError:
+            self._tokens += 1  # give the reservation back
+            raise
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def rate_limiter(name: str, rate: float, burst: Optional[float] = None) -> TokenBucket:
+    """Process-wide bucket per name (e.g. one per provider), shared by all requests."""
+    bucket = _buckets.get(name)
+    if bucket is None or bucket.rate != max(float(rate), 1e-6):
+        bucket = _buckets[name] = TokenBucket(rate, burst)
+    return bucket
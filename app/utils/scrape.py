@@ -1,30 +1,75 @@
-import re
+import asyncio
 import httpx
-from bs4 import BeautifulSoup
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-DEFAULT_HEADERS = {"User-Agent": "lead-scouting-agent/1.0"}
+from .http import request
+from .html_page import extract_text
+from .limits import gather_limited
+from .. import page_cache
+
+# Same URL requested concurrently (e.g. enrich and identify both want /chi-siamo): one network fetch.
+# url -> [future, number of waiters]; the fetch is cancelled only when its last waiter is.
+_inflight: Dict[str, list] = {}
 
 def clean_text(html: str) -> str:
-    # Use stdlib parser to avoid heavy lxml dependency (Vercel-friendly)
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script","style","noscript","iframe"]):
-        tag.decompose()
-    text = soup.get_text("\n")
-    text = re.sub(r"\n{2,}", "\n\n", text)
-    return text.strip()
-
-async def fetch(url: str) -> str:
-    async with httpx.AsyncClient(timeout=60, follow_redirects=True, headers=DEFAULT_HEADERS) as client:
-        r = await client.get(url)
-        r.raise_for_status()
-        return r.text
-
-async def fetch_many(urls: List[str], limit: int = 5) -> List[Tuple[str, str]]:
-    out = []
-    for u in urls[:limit]:
+    # Fastest installed parser backend, html.parser on Vercel (see app/utils/html_page.py)
+    return extract_text(html)
+
+def _raise_cached_error(url: str, status: int) -> None:
+    httpx.Response(status, request=httpx.Request("GET", url)).raise_for_status()
+
+async def _fetch_network(url: str, use_cache: bool) -> str:
+    cached = await asyncio.to_thread(page_cache.get_page, url) if use_cache else None
+    if cached and cached.fresh:
+        if cached.status >= 400:
+            _raise_cached_error(url, cached.status)
+        return cached.body
+
+    headers = {}
+    if cached and cached.status < 400:
+        # conditional GET: a 304 costs no body transfer
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    r = await request("GET", url, follow_redirects=True, headers=headers or None)
+    ttl = page_cache.ttl_from_headers(r.headers.get("cache-control"))
+    if r.status_code == 304 and cached:
+        await asyncio.to_thread(page_cache.revalidated, url, ttl or 0)
+        return cached.body
+    if use_cache and r.status_code in page_cache.NEGATIVE_STATUSES:
+        await asyncio.to_thread(page_cache.set_page, url, "", r.status_code, None, None, page_cache.NEGATIVE_TTL_SECONDS)
+    r.raise_for_status()
+    if use_cache and ttl is not None:
+        await asyncio.to_thread(
+            page_cache.set_page, url, r.text, r.status_code, r.headers.get("etag"), r.headers.get("last-modified"), ttl
+        )
+    return r.text
+
+async def fetch(url: str, use_cache: bool = page_cache.ENABLED) -> str:
+    """GET a page as text, through the on-disk page cache (see app/page_cache.py)."""
+    entry = _inflight.get(url)
+    if entry is None or entry[0].done() or entry[0].get_loop() is not asyncio.get_running_loop():
+        fut = asyncio.ensure_future(_fetch_network(url, use_cache))
+        entry = _inflight[url] = [fut, 0]
+        fut.add_done_callback(lambda f: _inflight.pop(url, None) if _inflight.get(url, [None])[0] is f else None)
+    fut = entry[0]
+    entry[1] += 1
+    try:
+        return await asyncio.shield(fut)
+    finally:
+        entry[1] -= 1
+        if entry[1] <= 0 and not fut.done():
+            fut.cancel()
+
+async def fetch_many(urls: List[str], limit: int = 5, concurrency: int = 5) -> List[Tuple[str, str]]:
+    """(url, html) of the first `limit` urls, fetched concurrently; failed fetches are skipped."""
+    async def _one(u: str) -> Optional[Tuple[str, str]]:
         try:
-            out.append((u, await fetch(u)))
+            return u, await fetch(u)
         except Exception:
-            continue
-    return out
+            return None
+
+    results = await gather_limited([_one(u) for u in urls[:limit]], concurrency)
+    return [r for r in results if r is not None]
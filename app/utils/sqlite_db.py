@@ -0,0 +1,69 @@
+"""One long-lived SQLite connection per database file, shared by the threads of a process.
+
+The SQLite stores (page cache, verification cache, email patterns, run store) are called
+from asyncio.to_thread workers; opening a connection per call also re-ran their schema
+statements every time. connection(path, init) hands out the file's connection under its
+lock; `init` (CREATE TABLE / migrations) runs once, when the connection is opened.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+import os
+import sqlite3
+import threading
+
+_conns: Dict[str, sqlite3.Connection] = {}
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _ensure_dir(path: str) -> None:
+    d = os.path.dirname(os.path.abspath(path))
+    if d and not os.path.exists(d):
+        os.makedirs(d, exist_ok=True)
+
+
+def open_db(path: str) -> sqlite3.Connection:
+    """A new WAL connection usable from any thread (one at a time)."""
+    _ensure_dir(path)
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+
+def _lock(path: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+@contextmanager
+def connection(path: str, init: Callable[[sqlite3.Connection], None]) -> Iterator[sqlite3.Connection]:
+    """The shared connection to `path`, held under its lock for the with-block. A block
+    that raises is rolled back; a connection that cannot roll back is replaced next time."""
+    with _lock(path):
+        conn = _conns.get(path)
+        if conn is None:
+            conn = open_db(path)
+            try:
+                init(conn)
+                conn.commit()
+            except BaseException:
+                conn.close()
+                raise
+            _conns[path] = conn
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                _conns.pop(path, None)
+                conn.close()
+            raise
+
+
+def close(path: str) -> None:
+    with _lock(path):
+        conn = _conns.pop(path, None)
+        if conn is not None:
+            conn.close()
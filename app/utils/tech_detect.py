@@ -1,6 +1,8 @@
 from __future__ import annotations
-import re
-from typing import List
+from typing import List, Union
+
+from .html_page import ParsedPage
+from .keyword_match import get_matcher
 
 SIGNATURES = [
     ("WordPress", [r"wp-content", r"wp-includes"]),
@@ -11,13 +13,14 @@ SIGNATURES = [
     ("HubSpot", [r"js\.hs-scripts\.com", r"hubspot"]),
 ]
 
-def detect_technologies(html: str, max_items: int = 10) -> List[str]:
+# (pattern, technology) flattened in SIGNATURES order
+_RULES = [(p, name) for name, patterns in SIGNATURES for p in patterns]
+
+def detect_technologies(html: Union[str, ParsedPage], max_items: int = 10) -> List[str]:
+    """Match SIGNATURES against the raw HTML (of a ParsedPage: the page it was parsed from)."""
+    haystack = html.html if isinstance(html, ParsedPage) else html
+    matched = get_matcher(tuple(p for p, _ in _RULES)).matches(haystack)
     hits: List[str] = []
-    for name, patterns in SIGNATURES:
-        for p in patterns:
-            if re.search(p, html, re.IGNORECASE):
-                hits.append(name)
-                break
-        if len(hits) >= max_items:
-            break
-    return list(dict.fromkeys(hits))
+    for i in sorted(matched):
+        hits.append(_RULES[i][1])
+    return list(dict.fromkeys(hits))[:max_items]
@@ -1,14 +1,21 @@
 from __future__ import annotations
+from functools import lru_cache
 import tldextract
 
+# Offline extractor: uses the public suffix snapshot bundled with tldextract and never
+# fetches the list over the network (cold starts on Lambda/Vercel, offline sandboxes).
+# cache_dir=None also avoids writing to a read-only filesystem.
+_EXTRACT = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=(), fallback_to_snapshot=True)
+
 def normalize_url(url: str) -> str:
     url = url.strip()
     if not url.startswith(("http://","https://")):
         url = "https://" + url
     return url
 
+@lru_cache(maxsize=8192)
 def domain_from_url(url: str) -> str:
-    ext = tldextract.extract(url)
+    ext = _EXTRACT(url)
     if not ext.domain:
         return url
     return ".".join([p for p in [ext.domain, ext.suffix] if p])
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+import json
+import os
+import sqlite3
+import time
+
+from .utils import sqlite_db
+
+IS_VERCEL = os.getenv("VERCEL") == "1" or bool(os.getenv("VERCEL_ENV"))
+DEFAULT_DB_PATH = os.environ.get("VERIFY_CACHE_DB_PATH") or ("/tmp/verify_cache.sqlite3" if IS_VERCEL else "./data/verify_cache.sqlite3")
+ENABLED = os.environ.get("VERIFY_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+
+# Paid verification answers, by outcome: "unknown" (catch-all, timeouts, greylisting, no result)
+# is the most likely to change, so it expires first.
+STATUS_TTL_SECONDS = {
+    "valid": int(os.environ.get("VERIFY_CACHE_TTL_DAYS_VALID", "30")) * 24 * 3600,
+    "invalid": int(os.environ.get("VERIFY_CACHE_TTL_DAYS_INVALID", "60")) * 24 * 3600,
+    "unknown": int(os.environ.get("VERIFY_CACHE_TTL_HOURS_UNKNOWN", "24")) * 3600,
+}
+
+# Cached call kinds: (provider.call) keyed by email or by domain
+HUNTER_DOMAIN_SEARCH = "hunter.domain_search"  # key: domain
+HUNTER_VERIFY = "hunter.verify"  # key: email
+
+
+@dataclass
+class VerifyCacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+
+
+STATS = VerifyCacheStats()
+
+
+def _init(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS verifications (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result_json TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (kind, key)
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_verifications_expires_at ON verifications(expires_at)")
+
+
+def _db(path: str):
+    return sqlite_db.connection(path, _init)
+
+
+def verifier_kind(provider: str) -> str:
+    """Cache kind for a generic verifier (key: email)."""
+    return f"verifier.{provider}"
+
+
+def get_result(kind: str, key: str, db_path: str = DEFAULT_DB_PATH) -> Optional[Dict[str, Any]]:
+    """Cached provider answer for (kind, key) if not expired, else None."""
+    try:
+        with _db(db_path) as conn:
+            row = conn.execute(
+                "SELECT result_json FROM verifications WHERE kind = ? AND key = ? AND expires_at > ?",
+                (kind, key.lower(), time.time()),
+            ).fetchone()
+            if not row:
+                STATS.misses += 1
+                return None
+            conn.execute("UPDATE verifications SET hits = hits + 1 WHERE kind = ? AND key = ?", (kind, key.lower()))
+            conn.commit()
+            STATS.hits += 1
+            return json.loads(row[0])
+    except Exception:
+        return None
+
+
+def set_result(kind: str, key: str, status: str, result: Any, db_path: str = DEFAULT_DB_PATH) -> None:
+    """Store a provider answer; its TTL depends on the mapped status (valid/invalid/unknown)."""
+    ttl = STATUS_TTL_SECONDS.get(status, STATUS_TTL_SECONDS["unknown"])
+    try:
+        with _db(db_path) as conn:
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO verifications(kind, key, status, result_json, created_at, expires_at, hits) VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (kind, key.lower(), status, json.dumps(result, ensure_ascii=False, default=str), now, now + ttl),
+            )
+            conn.commit()
+            STATS.writes += 1
+    except Exception:
+        return
+
+
+def purge_expired(db_path: str = DEFAULT_DB_PATH) -> int:
+    """Delete expired entries. Returns number of deleted rows (best effort)."""
+    try:
+        with _db(db_path) as conn:
+            n = conn.execute("DELETE FROM verifications WHERE expires_at <= ?", (time.time(),)).rowcount
+            conn.commit()
+            return int(n or 0)
+    except Exception:
+        return 0
+
+
+def flush_cache(db_path: str = DEFAULT_DB_PATH) -> int:
+    """Delete all cached verifications. Returns number of deleted rows (best effort)."""
+    try:
+        with _db(db_path) as conn:
+            n = conn.execute("DELETE FROM verifications").rowcount
+            conn.commit()
+            return int(n or 0)
+    except Exception:
+        return 0
+
+
+def info(db_path: str = DEFAULT_DB_PATH) -> Dict[str, Any]:
+    """Hit/miss counters of this process + stored entries by kind and status."""
+    lookups = STATS.hits + STATS.misses
+    out: Dict[str, Any] = {
+        **asdict(STATS),
+        "hit_rate": round(STATS.hits / lookups, 4) if lookups else 0.0,
+        "enabled": ENABLED,
+        "ttl_seconds": dict(STATUS_TTL_SECONDS),
+        "entries": {},
+    }
+    try:
+        with _db(db_path) as conn:
+            rows = conn.execute(
+                "SELECT kind, status, COUNT(*), COALESCE(SUM(hits), 0) FROM verifications WHERE expires_at > ? GROUP BY kind, status",
+                (time.time(),),
+            ).fetchall()
+    except Exception:
+        return out
+    for kind, status, count, hits in rows:
+        out["entries"].setdefault(kind, {})[status] = {"count": int(count), "hits": int(hits)}
+    return out
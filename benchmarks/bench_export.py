@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Export memory/throughput: the previous in-memory export (row dicts + normal-mode
+Workbook + BytesIO) vs. the streaming CSV / write-only XLSX export.
+
+Each case runs in its own process, so its peak RSS is its own; "peak" is the peak RSS
+growth while exporting (the leads themselves are built before measuring). Run from
+the project root:  python -m benchmarks.bench_export [n_leads ...]   (default 1000 10000 100000)
+"""
+from __future__ import annotations
+import csv
+import io
+import resource
+import subprocess
+import sys
+import time
+
+from openpyxl import Workbook, load_workbook
+
+from app.models import CompanyProfile, DecisionMaker, Evidence, LeadRecord, VerifiedEmail
+from app.pipeline.exporter import HEADERS, _row, export_leads_stream
+
+CASES = ["csv-legacy", "csv-stream", "xlsx-legacy", "xlsx-stream"]
+
+
+def make_leads(n: int):
+    return [
+        LeadRecord(
+            company=CompanyProfile(
+                company_name=f"Azienda {i}",
+                website=f"https://www.azienda{i}.it",
+                industry="produzione",
+                province="Bologna",
+                employees_est=50 + i % 400,
+                recent_projects=["nuovo stabilimento", "ampliamento linea"],
+                evidences=[Evidence(title="news", url=f"https://news.example.it/{i}/{k}", snippet="x" * 200, source="news") for k in range(6)],
+            ),
+            decision_maker=DecisionMaker(name="Mario Rossi", role="CEO"),
+            verified_email=VerifiedEmail(email=f"mario.rossi@azienda{i}.it", status="valid", source="hunter"),
+            contact_source="hunter",
+            estimated_budget_eur=40000 + i,
+            investment_window_months=[4, 6],
+            score=70,
+            score_class="warm",
+            status="nuovo",
+        )
+        for i in range(n)
+    ]
+
+
+def legacy_bytes(leads, fmt: str) -> bytes:
+    """The export as it was: every row dict first, then the whole file in memory."""
+    rows = [dict(zip(HEADERS, _row(l))) for l in leads]
+    if fmt == "csv":
+        sio = io.StringIO()
+        writer = csv.DictWriter(sio, fieldnames=HEADERS)
+        writer.writeheader()
+        for r in rows:
+            writer.writerow({k: ("" if r.get(k) is None else r.get(k)) for k in HEADERS})
+        return sio.getvalue().encode("utf-8-sig")
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Leads"
+    ws.append(HEADERS)
+    for r in rows:
+        ws.append([r.get(h) for h in HEADERS])
+    bio = io.BytesIO()
+    wb.save(bio)
+    return bio.getvalue()
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KiB
+
+
+def run_case(case: str, n: int) -> None:
+    leads = make_leads(n)
+    fmt, kind = case.split("-")
+    base = _rss_mb()
+    t0 = time.perf_counter()
+    size = 0
+    if kind == "legacy":
+        # the old /export/download also wrapped the bytes in another BytesIO
+        for chunk in io.BytesIO(legacy_bytes(leads, fmt)):
+            size += len(chunk)
+    else:
+        chunks, _, _ = export_leads_stream(leads, fmt)
+        for chunk in chunks:
+            size += len(chunk)
+    dt = time.perf_counter() - t0
+    print(f"{case:12s} {n:>7d} leads  {dt:7.2f} s  {n / dt:9.0f} leads/s  peak +{_rss_mb() - base:7.1f} MB  ({size / 1e6:.1f} MB out)")
+
+
+def check_same() -> None:
+    leads = make_leads(300)
+    for fmt in ("csv", "xlsx"):
+        new = b"".join(export_leads_stream(leads, fmt)[0])
+        old = legacy_bytes(leads, fmt)
+        if fmt == "csv":
+            assert new == old
+        else:
+            def cells(b):
+                return [list(r) for r in load_workbook(io.BytesIO(b), read_only=True)["Leads"].iter_rows(values_only=True)]
+            assert cells(new) == cells(old)
+
+
+def main() -> None:
+    if len(sys.argv) == 4 and sys.argv[1] == "--case":
+        run_case(sys.argv[2], int(sys.argv[3]))
+        return
+    check_same()
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    for n in sizes:
+        for case in CASES:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_export", "--case", case, str(n)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Throughput of the HTML parser backends (ParsedPage.parse / extract_text).
+
+Run from the project root:
+    python -m benchmarks.bench_html                 # synthetic Italian SME homepages
+    python -m benchmarks.bench_html path/to/corpus  # a folder of saved *.html pages
+
+Backends that are not installed (selectolax, lxml) are skipped. The "equal"
+column counts pages whose non-empty text lines match the html.parser output.
+"""
+from __future__ import annotations
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from app.utils.html_page import BACKENDS, ParsedPage, _available, extract_text
+
+SECTIONS = [
+    "Chi siamo", "Servizi", "Soluzioni per la logistica", "Impianti di videosorveglianza",
+    "Controllo accessi e antintrusione", "Clienti e settori", "Lavora con noi", "Contatti",
+    "Produzione e manutenzione", "Certificazioni ISO 9001", "News", "Progetti realizzati",
+]
+
+
+def synthetic_page(rnd: random.Random, i: int) -> str:
+    parts = [
+        "<!doctype html><html lang='it'><head><meta charset='utf-8'>",
+        f"<title>Azienda {i} S.r.l. | Bologna</title>",
+        f"<meta name='description' content='Azienda {i}: soluzioni per industria e logistica'>",
+        "<link rel='stylesheet' href='/wp-content/themes/x/style.css'>",
+        "<script src='https://www.googletagmanager.com/gtm.js?id=GTM-XXXX'></script>",
+        "<script>window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments)}</script>",
+        "<style>" + ".c{color:#333}" * 200 + "</style></head><body>",
+        "<nav><ul>" + "".join(f"<li><a href='/{s.lower().replace(' ', '-')}'>{s}</a></li>" for s in SECTIONS) + "</ul></nav>",
+    ]
+    for _ in range(rnd.randint(20, 60)):
+        s = rnd.choice(SECTIONS)
+        parts.append(
+            f"<section class='block {s.lower().replace(' ', '-')}'><h2>{s}</h2>"
+            f"<p>Da oltre {rnd.randint(10, 60)} anni offriamo servizi di {s.lower()} per PMI e clienti enterprise "
+            f"in Emilia-Romagna. <b>Mario Rossi</b> – Amministratore Delegato.</p>"
+            f"<ul><li>Installazione</li><li>Assistenza 24/7</li><li><a href='/contatti'>Richiedi un preventivo</a></li></ul>"
+            f"<img src='/wp-content/uploads/{rnd.randint(1, 999)}.jpg' alt='{s}'></section>"
+        )
+    parts.append("<footer><p>P.IVA 0123456789 &copy; 2024</p><noscript>Abilita JavaScript</noscript></footer></body></html>")
+    return "".join(parts)
+
+
+def load_corpus(argv: List[str]) -> List[str]:
+    if argv:
+        files = sorted(Path(argv[0]).glob("*.htm*"))
+        return [f.read_text(encoding="utf-8", errors="replace") for f in files]
+    rnd = random.Random(7)
+    return [synthetic_page(rnd, i) for i in range(200)]
+
+
+def _lines(text: str) -> List[str]:
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def main() -> None:
+    pages = load_corpus(sys.argv[1:])
+    mb = sum(len(p.encode("utf-8")) for p in pages) / 1e6
+    reference = [_lines(extract_text(p, "html.parser")) for p in pages]
+    print(f"corpus: {len(pages)} pages, {mb:.1f} MB")
+    print(f"{'backend':<12} {'parse pages/s':>14} {'MB/s':>7} {'text pages/s':>13} {'equal':>7}")
+    for name in BACKENDS:
+        if not _available(name):
+            print(f"{name:<12} (not installed)")
+            continue
+        t0 = time.perf_counter()
+        for p in pages:
+            ParsedPage.parse(p, name)
+        t_parse = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        texts = [extract_text(p, name) for p in pages]
+        t_text = time.perf_counter() - t0
+        equal = sum(_lines(t) == ref for t, ref in zip(texts, reference))
+        print(f"{name:<12} {len(pages) / t_parse:>14.1f} {mb / t_parse:>7.2f} {len(pages) / t_text:>13.1f} {equal:>4}/{len(pages)}")
+
+
+if __name__ == "__main__":
+    main()
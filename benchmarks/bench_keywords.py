@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Per-page cost of keyword matching: compiled KeywordMatcher vs. one regex/`in` per rule and line.
+
+Run from the project root:  python -m benchmarks.bench_keywords
+
+The "legacy" functions are the previous per-rule implementations, kept here as
+the reference: results are asserted identical before timing.
+"""
+from __future__ import annotations
+import random
+import re
+import time
+from typing import Callable, List
+
+from app.pipeline.budget import KEYWORD_BOOSTS
+from app.pipeline.enrich import SERVICE_PATTERN, TARGET_PATTERN, _extract_services_and_target
+from app.pipeline.identify import DM_ROLE_PATTERNS, _extract_people
+from app.pipeline.project_profile import (
+    INDUSTRY_KEYWORDS, PROOF_KEYWORDS, SERVICE_KEYWORDS, TECH_KEYWORDS, _extract_lists,
+)
+from app.utils.html_page import extract_text
+from app.utils.keyword_match import get_matcher
+from app.utils.tech_detect import SIGNATURES, detect_technologies
+from benchmarks.bench_html import synthetic_page
+
+
+def legacy_services(text: str):
+    services, targets = [], []
+    for line in text.splitlines():
+        s = line.strip(" -•\t")
+        if 3 <= len(s) <= 120:
+            if re.search(SERVICE_PATTERN, s, re.IGNORECASE):
+                services.append(s)
+            if re.search(TARGET_PATTERN, s, re.IGNORECASE):
+                targets.append(s)
+        if len(services) > 12 and len(targets) > 12:
+            break
+    return list(dict.fromkeys(services))[:12], list(dict.fromkeys(targets))[:12]
+
+
+def legacy_people(text: str):
+    dms = []
+    for line in text.splitlines():
+        s = line.strip()
+        if len(s) < 8 or len(s) > 140:
+            continue
+        for role, pat in DM_ROLE_PATTERNS:
+            if re.search(pat, s, re.IGNORECASE):
+                m = re.search(r"([A-ZÀ-ÖØ-Ý][\w'’\-]+\s+[A-ZÀ-ÖØ-Ý][\w'’\-]+)", s)
+                dms.append((m.group(1) if m else "N/D", role))
+                break
+        if len(dms) >= 6:
+            break
+    return list(dict.fromkeys((n, r) for n, r in dms if (n.lower(), r.lower())))
+
+
+def legacy_tech(html: str) -> List[str]:
+    hits = []
+    for name, patterns in SIGNATURES:
+        for p in patterns:
+            if re.search(p, html, re.IGNORECASE):
+                hits.append(name)
+                break
+    return list(dict.fromkeys(hits))[:10]
+
+
+def legacy_lists(text: str):
+    lines = [l.strip(" -•\t") for l in text.splitlines() if l.strip()]
+    out = ([], [], [], [])
+    for c in (l for l in lines if 3 <= len(l) <= 90):
+        cl = c.lower()
+        for bucket, kws in zip(out, (SERVICE_KEYWORDS, TECH_KEYWORDS, INDUSTRY_KEYWORDS, PROOF_KEYWORDS)):
+            if any(k in cl for k in kws):
+                bucket.append(c)
+
+    def dedup(xs, n):
+        return list(dict.fromkeys(xs))[:n]
+    services, tech, industries, proof = out
+    return dedup(services, 12), dedup(industries, 10), dedup(tech, 12), dedup(proof, 10)
+
+
+def legacy_budget_kw(corpus: str) -> float:
+    return sum(b for pat, b in KEYWORD_BOOSTS if re.search(pat, corpus, re.IGNORECASE))
+
+
+def _time(fn: Callable, items) -> float:
+    t0 = time.perf_counter()
+    for x in items:
+        fn(x)
+    return time.perf_counter() - t0
+
+
+FILLER = (
+    "La nostra storia nasce in una piccola officina di provincia e cresce insieme al territorio",
+    "Lavoriamo ogni giorno con passione, attenzione al dettaglio e rispetto per le persone",
+    "Scopri le ultime notizie, gli eventi in programma e le iniziative dedicate alla comunita",
+    "Informativa cookie: questo sito utilizza cookie tecnici e di profilazione di terze parti",
+    "Via Emilia 120, 40100 Bologna - Tel. 051 000000 - orari dal lunedi al venerdi 9-18",
+)
+
+
+def sparse_text(rnd: random.Random, dense: str) -> str:
+    """Realistic copy: mostly filler, a few keyword lines from a synthetic page."""
+    lines = [rnd.choice(FILLER) for _ in range(rnd.randint(150, 400))]
+    for kw_line in rnd.sample(dense.splitlines(), 8):
+        lines.insert(rnd.randrange(len(lines)), kw_line)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    rnd = random.Random(11)
+    htmls = [synthetic_page(rnd, i) for i in range(100)]
+    dense = [extract_text(h) for h in htmls]
+    sparse = [sparse_text(rnd, t) for t in dense]
+    budget_kw = lambda corpus: sum(KEYWORD_BOOSTS[i][1] for i in get_matcher(tuple(p for p, _ in KEYWORD_BOOSTS)).matches(corpus))
+
+    # identical results first
+    for h, t in zip(htmls, dense + sparse):
+        for text in (t, t.lower()):
+            assert legacy_services(text) == _extract_services_and_target(text)
+            assert legacy_people(text) == [(d.name, d.role) for d in _extract_people(text)]
+            assert legacy_lists(text) == _extract_lists(text)
+            assert legacy_budget_kw(text.lower()) == budget_kw(text.lower())
+        assert legacy_tech(h) == detect_technologies(h)
+        assert legacy_tech(t) == detect_technologies(t)
+
+    for label, texts in (("keyword-dense pages", dense), ("sparse pages (mostly filler copy)", sparse)):
+        corpora = [t.lower() for t in texts]
+        cases = [
+            ("enrich services/targets", legacy_services, _extract_services_and_target, texts),
+            ("identify roles", legacy_people, _extract_people, texts),
+            ("tech detection", legacy_tech, detect_technologies, htmls),
+            ("profile keyword lists", legacy_lists, _extract_lists, texts),
+            ("budget keywords", legacy_budget_kw, budget_kw, corpora),
+        ]
+        print(f"\n{label}: {len(texts)}")
+        print(f"{'call site':<26} {'legacy us/page':>15} {'matcher us/page':>16} {'speedup':>8}")
+        for name, old, new, items in cases:
+            _time(new, items[:5])  # compile/cache the matcher outside the timing
+            t_old = _time(old, items) / len(items) * 1e6
+            t_new = _time(new, items) / len(items) * 1e6
+            print(f"{name:<26} {t_old:>15.1f} {t_new:>16.1f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
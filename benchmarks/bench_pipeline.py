@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Wall-clock of a simulated run: barrier stages (each stage waits for the previous one
+to finish every company) vs. the staged pipeline used by run_pipeline.
+
+Network waits are simulated with asyncio.sleep (long-tailed latencies, fixed seed), with
+the default *_CONCURRENCY worker counts. Run from the project root:
+python -m benchmarks.bench_pipeline [leads]
+"""
+from __future__ import annotations
+import asyncio
+import random
+import sys
+import time
+
+from app.pipeline.stages import Stage, run_stages
+from app.settings import settings
+from app.utils.limits import gather_limited
+
+# seconds per company and stage: mostly fast, a few slow sites / providers
+STAGES = [("enrich", 0.30), ("identify", 0.20), ("verify", 0.10)]
+WORKERS = {"enrich": settings.ENRICH_CONCURRENCY, "identify": settings.IDENTIFY_CONCURRENCY, "verify": settings.VERIFY_CONCURRENCY}
+
+
+def _latencies(n: int):
+    rnd = random.Random(42)
+    return [{name: rnd.lognormvariate(0, 0.8) * base for name, base in STAGES} for _ in range(n)]
+
+
+def _step(name: str, lat):
+    async def fn(i: int) -> int:
+        await asyncio.sleep(lat[i][name])
+        return i
+    return fn
+
+
+async def barrier(lat) -> float:
+    t0 = time.perf_counter()
+    items = list(range(len(lat)))
+    for name, _ in STAGES:
+        items = await gather_limited([_step(name, lat)(i) for i in items], WORKERS[name])
+    return time.perf_counter() - t0
+
+
+async def staged(lat) -> float:
+    t0 = time.perf_counter()
+    stages = [Stage(name, _step(name, lat), WORKERS[name]) for name, _ in STAGES]
+    got = sorted([i async for i, _ in run_stages(list(range(len(lat))), stages, settings.PIPELINE_QUEUE_SIZE)])
+    assert got == list(range(len(lat)))
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    lat = _latencies(n)
+    slowest = max(sum(x.values()) for x in lat)
+    t_barrier = asyncio.run(barrier(lat))
+    t_staged = asyncio.run(staged(lat))
+    print(f"leads: {n}  workers: {WORKERS}  queue: {settings.PIPELINE_QUEUE_SIZE}")
+    print(f"slowest single lead path: {slowest:.2f} s")
+    print(f"barrier stages:           {t_barrier:.2f} s")
+    print(f"staged pipeline:          {t_staged:.2f} s  (x{t_barrier / t_staged:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Lead scoring throughput: score_leads lead by lead vs. the NumPy batch path
+(app/pipeline/score_batch.py), with scores and classes checked identical.
+
+"rescore" times score_features alone: scoring the same leads again with other
+weights, once their features are extracted. Lists of 1M leads are built from
+lightweight objects (same attributes as LeadRecord) to keep memory in check.
+Run from the project root:  python -m benchmarks.bench_score [n_leads ...]   (default 10000 1000000)
+"""
+from __future__ import annotations
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from app.config_loader import FocusConfig
+from app.models import CompanyProfile, Evidence, LeadRecord
+from app.pipeline import score, score_batch
+
+SERVICES = ["impianti elettrici", "automazione", "manutenzione", "cablaggio", "domotica", "fotovoltaico", "sicurezza", "reti"]
+TECHS = ["plc", "scada", "knx", "bms", "iot"]
+INDUSTRIES = [None, "produzione", "logistica", "alimentare"]
+MODEL_LEADS = 100_000  # above this, lightweight leads
+
+
+def _fields(rnd: random.Random):
+    return dict(
+        industry=rnd.choice(INDUSTRIES),
+        services=rnd.sample(SERVICES, rnd.randint(0, len(SERVICES))),
+        techs=rnd.sample(TECHS, rnd.randint(0, len(TECHS))),
+        evidences=rnd.randint(0, 8),
+        budget=rnd.choice([None, 0, -5000, 10000, 30000, 60000, 150000, rnd.randint(1, 200000)]),
+        window=rnd.choice([None, [], [4, 6], [1, 3], [7, 12], [2, 8], [5]]),
+    )
+
+
+def make_leads(n: int, seed: int = 1):
+    rnd = random.Random(seed)
+    out = []
+    if n <= MODEL_LEADS:
+        for i in range(n):
+            f = _fields(rnd)
+            out.append(LeadRecord(
+                company=CompanyProfile(
+                    company_name=f"Azienda {i}", website=f"https://www.azienda{i}.it", industry=f["industry"],
+                    services_products=f["services"], technologies=f["techs"],
+                    evidences=[Evidence(title="news", url=f"https://news.example.it/{i}/{k}") for k in range(f["evidences"])],
+                ),
+                estimated_budget_eur=f["budget"],
+                investment_window_months=f["window"],
+            ))
+        return out
+    evidence = object()
+    for i in range(n):
+        f = _fields(rnd)
+        company = SimpleNamespace(
+            industry=f["industry"], services_products=f["services"], technologies=f["techs"],
+            evidences=[evidence] * f["evidences"],
+        )
+        out.append(SimpleNamespace(company=company, estimated_budget_eur=f["budget"], investment_window_months=f["window"], score=0, score_class="cold"))
+    return out
+
+
+def make_focus(weights=None) -> FocusConfig:
+    raw = {
+        "lead_scouting": {"min_estimated_budget_eur": 25000, "target_budget_eur": 50000},
+        "scoring": {"weights": weights or {}, "classes": {"hot": [75, 100], "warm": [50, 74], "tiepido": [30, 49]}},
+    }
+    return FocusConfig(raw=raw)
+
+
+def _legacy(leads, focus, profile=None):
+    """score_leads with the batch path disabled: the per-lead loop."""
+    saved, score.BATCH_MIN_LEADS = score.BATCH_MIN_LEADS, sys.maxsize
+    try:
+        return score.score_leads(leads, focus, profile)
+    finally:
+        score.BATCH_MIN_LEADS = saved
+
+
+def _results(leads):
+    return [(l.score, l.score_class) for l in leads]
+
+
+def check(leads) -> None:
+    """Batch == per-lead for int and float weights, with and without reference keywords."""
+    profile = SimpleNamespace(services_offered=["Automazione", "domotica", "reti"], technologies=["plc", "knx"], industries_served=["produzione"])
+    focuses = [make_focus(), make_focus({"fit_settore": 20.5, "capacita_budget": 33, "timing_investimento": 17.25, "segnali_crescita": 12.4, "allineamento_referenze": 17.7})]
+    for focus in focuses:
+        for p in (None, profile):
+            expected = _results(_legacy(leads, focus, p))
+            got = _results(score_batch.score_leads_batch(leads, focus, score._reference_keywords(p)))
+            assert got == expected, "batch scoring differs from score_leads"
+
+
+def bench(n: int) -> None:
+    leads = make_leads(n)
+    check(leads[:20000])
+    focus = make_focus()
+
+    t0 = time.perf_counter()
+    _legacy(leads, focus)
+    loop = time.perf_counter() - t0
+    expected = _results(leads)
+
+    t0 = time.perf_counter()
+    score.score_leads(leads, focus)
+    batch = time.perf_counter() - t0
+    assert _results(leads) == expected
+
+    features = score_batch.extract_features(leads, set())
+    other = make_focus({"fit_settore": 30, "capacita_budget": 20})
+    t0 = time.perf_counter()
+    score_batch.score_features(features, other)
+    rescore = time.perf_counter() - t0
+
+    print(f"{n:>9} leads  loop {loop:7.3f}s  batch {batch:7.3f}s  ({loop / batch:4.1f}x)  rescore {rescore * 1000:7.1f}ms  ({n / rescore / 1e6:5.1f}M leads/s)")
+
+
+def main(argv) -> None:
+    if not score_batch.HAS_NUMPY:
+        sys.exit("numpy is not installed (pip install -r requirements-extra.txt)")
+    for n in [int(a) for a in argv] or [10_000, 1_000_000]:
+        bench(n)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
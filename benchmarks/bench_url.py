@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: domain_from_url (offline extractor + LRU) vs. a plain tldextract call.
+
+Run from the project root:  python -m benchmarks.bench_url
+"""
+from __future__ import annotations
+import random
+import time
+
+import tldextract
+
+from app.utils.url import domain_from_url
+
+# Realistic mix: discover/enrich/verify ask for the same few hundred sites over and over
+HOSTS = [f"https://www.azienda{i}.it/chi-siamo" for i in range(300)] + [
+    "https://news.example.co.uk/article/1",
+    "https://shop.brand.com.br/",
+    "http://sub.dominio.bo.it/contatti",
+]
+CALLS = 100_000
+
+
+def _bench(fn, urls) -> float:
+    t0 = time.perf_counter()
+    for u in urls:
+        fn(u)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    rnd = random.Random(42)
+    urls = [rnd.choice(HOSTS) for _ in range(CALLS)]
+    plain = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=())
+
+    def baseline(url: str) -> str:
+        ext = plain(url)
+        return ".".join([p for p in [ext.domain, ext.suffix] if p]) if ext.domain else url
+
+    t_cold = time.perf_counter()
+    domain_from_url.cache_clear()
+    domain_from_url(HOSTS[0])
+    t_cold = time.perf_counter() - t_cold
+
+    t_base = _bench(baseline, urls)
+    t_memo = _bench(domain_from_url, urls)
+    assert all(baseline(u) == domain_from_url(u) for u in HOSTS)
+
+    print(f"calls: {CALLS}  distinct urls: {len(HOSTS)}")
+    print(f"first call (suffix snapshot load): {t_cold * 1e3:.1f} ms")
+    print(f"tldextract per call:      {t_base / CALLS * 1e6:.2f} us")
+    print(f"domain_from_url per call: {t_memo / CALLS * 1e6:.2f} us  (x{t_base / t_memo:.1f})")
+    print(f"lru: {domain_from_url.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
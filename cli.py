@@ -5,6 +5,7 @@ import json
 from app.config_loader import load_focus_config
 from app.models import RunRequest, Geography, Segment
 from app.pipeline.orchestrator import run_pipeline
+from app.utils.http import open_client, close_client
 
 async def main():
     focus = load_focus_config("config/focus.yaml")
@@ -19,7 +20,11 @@ async def main():
         include_email_drafts=False,
         session_id="cli",
     )
-    res = await run_pipeline(req, focus)
+    await open_client()
+    try:
+        res = await run_pipeline(req, focus)
+    finally:
+        await close_client()
     # Print summary
     print(json.dumps({
         "run_id": res["run_id"],
@@ -0,0 +1,55 @@
+import asyncio
+
+from app.config_loader import FocusConfig
+from app.models import Geography, Segment
+from app.pipeline import discover
+from app.providers.search_cache import CachedSearchProvider, SearchCache
+
+
+class SlowProvider:
+    """Answers every query with 3 domains of its own; the first query is fast, the others slow."""
+
+    def __init__(self, fast_query):
+        self.fast_query = fast_query
+        self.calls = 0
+        self.cancelled = 0
+
+    async def web_search(self, query, num=10, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(0.01 if query == self.fast_query else 0.2)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        slug = "-".join(query.split())
+        return [{"link": f"https://{slug}-{k}.it", "title": query} for k in range(3)]
+
+    async def news_search(self, query, num=10, **kwargs):
+        return []
+
+
+def test_early_stop_does_not_cancel_shared_queries_of_other_runs(monkeypatch):
+    focus = FocusConfig(raw={"lead_scouting": {"growth_signals_keywords": ["nuova sede", "assunzioni", "investimenti"]}})
+    geo = Geography(provinces=["Bologna", "Modena"])
+    queries = discover._build_queries("produzione", geo, focus.growth_keywords)
+    inner = SlowProvider(queries[0])
+    cache = SearchCache()
+    monkeypatch.setattr(discover, "get_search_provider", lambda *a, **k: CachedSearchProvider(inner, cache))
+    monkeypatch.setattr(discover, "get_news_provider", lambda *a, **k: CachedSearchProvider(inner, cache))
+    n_queries = len(queries)
+
+    async def both():
+        # same queries in flight for both runs; the first run has enough after its (fast) first query
+        # and stops while the others are still waiting upstream
+        return await asyncio.gather(
+            discover.discover_candidates(focus, "produzione", geo, Segment(), limit=2, concurrency=4),
+            discover.discover_candidates(focus, "produzione", geo, Segment(), limit=1000, concurrency=4),
+        )
+
+    early, full = asyncio.run(both())
+
+    assert len(early) == 2
+    assert len(full) == 3 * n_queries
+    # the second run still got every query answered once, nothing was cancelled under it
+    assert inner.cancelled == 0
+    assert inner.calls == n_queries  # each web query sent once for both runs
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Background run worker: executes the runs queued with POST /runs.
+
+Run next to the API (same RUN_STORE_DB_PATH), as many processes as needed:
+    python worker.py
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import signal
+
+from app.config_loader import load_focus_config
+from app.run_worker import RunWorker
+from app.settings import settings
+from app.utils.http import open_client, close_client
+
+async def main():
+    focus = load_focus_config(settings.FOCUS_CONFIG_PATH)
+    worker = RunWorker(focus, settings.RUN_WORKER_CONCURRENCY, settings.RUN_WORKER_POLL_SECONDS)
+    # docker stop / systemd send SIGTERM: stop like on Ctrl+C, so running runs go back to the queue
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:  # Windows
+        pass
+    await open_client()
+    try:
+        await worker.run_forever()
+    finally:
+        await worker.stop()
+        await close_client()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass